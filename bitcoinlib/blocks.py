@@ -22,8 +22,9 @@ import struct
 from bitcoinlib.config.config import DEFAULT_NETWORK, PY3
 from bitcoinlib.encoding import (change_base, double_sha256, int_to_varbyteint, to_bytes, to_hexstring,
                                  varbyteint_to_int)
+from bitcoinlib.keys import verify_batch
 from bitcoinlib.networks import Network
-from bitcoinlib.transactions import Transaction, transaction_deserialize
+from bitcoinlib.transactions import Transaction, transaction_deserialize_from
 
 
 class Block:
@@ -123,11 +124,44 @@ class Block:
             return True
         return False
 
+    def verify_transactions(self, max_workers=None):
+        """
+        Verify signatures of all parsed transactions in this block. The signatures of all transactions are collected
+        and checked in one batch, so verification of large blocks is divided over multiple processes.
+
+        Input values are not included in raw blocks, so segwit inputs can only be verified if their value is updated
+        first. Does not check if UTXO's are valid or already spent.
+
+        :param max_workers: Number of worker processes for signature verification. Leave empty to use max_workers setting from config
+        :type max_workers: int
+
+        :return bool: True if all transactions are valid
+        """
+        if not self.transactions:
+            return False
+        tx_checks = []
+        items = []
+        for t in self.transactions:
+            if not isinstance(t, Transaction):
+                return False
+            checks = t.signature_checks()
+            if checks is None:
+                return False
+            tx_checks.append(checks)
+            items += [c[1:] for c in checks]
+        results = iter(verify_batch(items, max_workers=max_workers))
+        verified = True
+        for t, checks in zip(self.transactions, tx_checks):
+            if not t.verify_results({c[0]: next(results) for c in checks}):
+                verified = False
+        return verified
+
     def __repr__(self):
         return "<Block(%s, %s, transactions: %s)>" % (to_hexstring(self.block_hash), self.height, self.tx_count)
 
     @classmethod
-    def from_raw(cls, raw, block_hash=None, height=None, parse_transactions=False, limit=0, network=DEFAULT_NETWORK):
+    def from_raw(cls, raw, block_hash=None, height=None, parse_transactions=False, limit=0, network=DEFAULT_NETWORK,
+                 lazy=False):
         """
         Create Block object from raw serialized block in bytes.
 
@@ -151,6 +185,8 @@ class Block:
         :type limit: int
         :param network: Name of network
         :type network: str
+        :param lazy: Create lazy Transaction objects, which only create their inputs and outputs when accessed. Default is False
+        :type lazy: bool
 
         :return Block:
         """
@@ -168,26 +204,22 @@ class Block:
         bits = raw[72:76][::-1]
         nonce = raw[76:80][::-1]
         tx_count, size = varbyteint_to_int(raw[80:89])
-        txs_data = raw[80+size:]
+        if not isinstance(network, Network):
+            network = Network(network)
+        txs_data = memoryview(raw)
+        offset = 80 + size
 
         # Parse coinbase transaction so we can extract extra information
-        transactions = [transaction_deserialize(txs_data, network=network, check_size=False)]
-        txs_data = txs_data[transactions[0].size:]
+        t, size = transaction_deserialize_from(txs_data, offset, network=network)
+        transactions = [t]
+        offset += size
 
-        while parse_transactions and txs_data:
+        while parse_transactions and offset < len(txs_data):
             if limit != 0 and len(transactions) >= limit:
                 break
-            t = transaction_deserialize(txs_data, network=network, check_size=False)
+            t, size = transaction_deserialize_from(txs_data, offset, network=network, lazy=lazy)
             transactions.append(t)
-
-            # t.rawtx = b''
-            # traw = t.raw_hex()
-            # tblock = txs_data[:t.size].hex()
-            # if traw != tblock:
-            #     print(t.txid)
-            #     print(traw)
-            #     print(tblock)
-            txs_data = txs_data[t.size:]
+            offset += size
             # TODO: verify transactions, need input value from previous txs
             # if verify and not t.verify():
             #     raise ValueError("Could not verify transaction %s in block %s" % (t.txid, block_hash))
@@ -198,25 +230,34 @@ class Block:
 
         block = cls(block_hash, version, prev_block, merkle_root, time, bits, nonce, transactions, height,
                     network=network)
-        block.txs_data = txs_data
+        block.txs_data = txs_data[offset:]
         block.tx_count = tx_count
         return block
 
-    def parse_transactions(self, limit=0):
+    def parse_transactions(self, limit=0, lazy=False):
         """
         Parse raw transactions from Block, if transaction data is available in txs_data attribute. Creates
         Transaction objects in Block.transactions list
 
+        The txs_data attribute is a memoryview on the raw block, so the remaining data is not copied after each
+        parsed transaction.
+
         :param limit: Maximum number of transactions to parse
+        :type limit: int
+        :param lazy: Create lazy Transaction objects, which only create their inputs and outputs when accessed. Default is False
+        :type lazy: bool
 
         :return:
         """
         n = 0
-        while self.txs_data and (limit == 0 or n < limit):
-            t = transaction_deserialize(self.txs_data, network=self.network, check_size=False)
+        offset = 0
+        while self.txs_data is not None and offset < len(self.txs_data) and (limit == 0 or n < limit):
+            t, size = transaction_deserialize_from(self.txs_data, offset, network=self.network, lazy=lazy)
             self.transactions.append(t)
-            self.txs_data = self.txs_data[t.size:]
+            offset += size
             n += 1
+        if offset:
+            self.txs_data = self.txs_data[offset:]
 
     def as_dict(self):
         """
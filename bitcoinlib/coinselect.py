@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+#
+#    BitcoinLib - Python Cryptocurrency Library
+#    COIN SELECTION - Select unspent outputs to use as transaction inputs
+#    © 2020 - 1200 Web Development <http://1200wd.com/>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+import os
+import random
+import sys
+
+_logger = logging.getLogger(__name__)
+
+USE_NUMPY = os.getenv("USE_NUMPY") not in ["false", "False", "0", "FALSE"]
+try:
+    if USE_NUMPY != False:
+        import numpy as np
+        USE_NUMPY = True
+except ImportError:
+    pass
+if 'numpy' not in sys.modules:
+    _logger.info("Could not include numpy library, using slower coin selection in pure python")
+    USE_NUMPY = False
+
+BNB_MAX_TRIES = 100000
+KNAPSACK_ITERATIONS = 1000
+KNAPSACK_MAX_STEPS = 1000000
+
+
+class CoinSelectionError(Exception):
+    """
+    Handle CoinSelection class Exceptions
+    """
+
+    def __init__(self, msg=''):
+        self.msg = msg
+        _logger.error(msg)
+
+    def __str__(self):
+        return self.msg
+
+
+def input_size(script_type='sig_pubkey', witness_type='legacy', n_keys=1, sigs_required=1, compressed=True):
+    """
+    Get estimated virtual size of a transaction input in bytes. Uses the same estimates as
+    :func:`Transaction.estimate_size`, with the witness discount applied for segwit inputs.
+
+    >>> input_size()
+    147
+    >>> input_size(witness_type='segwit')
+    68
+
+    :param script_type: Unlocking script type: sig_pubkey, p2sh_multisig or signature. Default is sig_pubkey
+    :type script_type: str
+    :param witness_type: Witness type of input: legacy, segwit or p2sh-segwit. Default is legacy
+    :type witness_type: str
+    :param n_keys: Number of keys for multisig inputs
+    :type n_keys: int
+    :param sigs_required: Number of signatures required for multisig inputs
+    :type sigs_required: int
+    :param compressed: Use compressed public key. Default is True
+    :type compressed: bool
+
+    :return int:
+    """
+    size = 40
+    if witness_type != 'legacy':
+        size += 1
+    if script_type == 'sig_pubkey':
+        scr_size = 107
+        if not compressed:
+            scr_size += 33
+        if witness_type == 'p2sh-segwit':
+            scr_size += 24
+    elif script_type == 'p2sh_multisig':
+        scr_size = 9 + (n_keys * 34) + (sigs_required * 72)
+        if witness_type == 'p2sh-segwit':
+            scr_size += 17 * sigs_required
+    elif script_type == 'signature':
+        scr_size = 9 + 72
+    else:
+        raise CoinSelectionError("Unknown input script type %s cannot estimate input size" % script_type)
+    if witness_type == 'legacy':
+        return size + scr_size
+    return size + -(-scr_size // 4)
+
+
+class CoinSelection(object):
+    """
+    Select unspent outputs (UTXO's) for a transaction.
+
+    Values and input sizes of all candidate UTXO's are loaded once, as NumPy arrays if numpy is installed. The
+    selection strategies work with the effective value of each UTXO: the value minus the fee needed to spend it at
+    the given fee rate, rounded up. The following strategies are available:
+
+    * default: A single UTXO with the exact amount, preferring the most confirmations, otherwise the smallest larger UTXO, otherwise lesser UTXO's ordered by descending value. Ignores fees
+    * bnb: Branch and bound search for a combination which does not need a change output
+    * knapsack: Random approximation of the smallest combination larger then the target
+    * srd: Single random draw, adds random UTXO's until the target is reached
+    * auto: Use bnb if a solution is found, otherwise the knapsack or srd result with the lowest waste
+
+    Other strategies can be added by subclassing and adding a method with the strategy name to the strategies list.
+
+    >>> cs = CoinSelection([100000, 50000, 30000, 25000], sizes=147, fee_per_kb=1024)
+    >>> cs.effective_values
+    [99853, 49853, 29853, 24853]
+    >>> cs.select(54700, 'bnb', cost_of_change=2000)
+    [2, 3]
+    """
+
+    strategies = ['default', 'bnb', 'knapsack', 'srd', 'auto']
+
+    def __init__(self, values, sizes=147, fee_per_kb=0, long_term_fee_per_kb=None, confirmations=None,
+                 max_utxos=None):
+        """
+        Initialize CoinSelection object with list of candidate UTXO's
+
+        :param values: List of UTXO values in smallest denominator (satoshi)
+        :type values: list of int
+        :param sizes: List of estimated input sizes in bytes for each UTXO, or one size for all UTXO's. Default is 147, the size of a p2pkh input. Use :func:`input_size` to estimate sizes.
+        :type sizes: list of int, int
+        :param fee_per_kb: Fee rate in smallest denominator per kilobyte. Default is 0: ignore fees
+        :type fee_per_kb: int
+        :param long_term_fee_per_kb: Expected future fee rate, used to calculate the waste of a selection. Default is fee_per_kb
+        :type long_term_fee_per_kb: int
+        :param confirmations: Number of confirmations for each UTXO, used by the default strategy to prefer older UTXO's with the exact amount
+        :type confirmations: list of int
+        :param max_utxos: Maximum number of UTXO's to select. Default is None: no maximum
+        :type max_utxos: int
+        """
+        if long_term_fee_per_kb is None:
+            long_term_fee_per_kb = fee_per_kb
+        n = len(values)
+        if isinstance(sizes, int):
+            sizes = [sizes] * n
+        if confirmations is None:
+            confirmations = [0] * n
+        if len(sizes) != n or len(confirmations) != n:
+            raise CoinSelectionError("Number of values, sizes and confirmations must be equal")
+        self.fee_per_kb = fee_per_kb
+        self.long_term_fee_per_kb = long_term_fee_per_kb
+        self.max_utxos = max_utxos
+        if USE_NUMPY:
+            self._values = np.array(values, dtype=np.int64)
+            sizes = np.array(sizes, dtype=np.int64)
+            self._fees = -((sizes * -fee_per_kb) // 1024)
+            self._waste = self._fees + (sizes * -long_term_fee_per_kb) // 1024
+            self._effective_values = self._values - self._fees
+            self._confirmations = np.array(confirmations, dtype=np.int64)
+        else:
+            self._values = list(values)
+            self._fees = [-((s * -fee_per_kb) // 1024) for s in sizes]
+            self._waste = [f + (s * -long_term_fee_per_kb) // 1024 for f, s in zip(self._fees, sizes)]
+            self._effective_values = [v - f for v, f in zip(self._values, self._fees)]
+            self._confirmations = list(confirmations)
+
+    @property
+    def values(self):
+        return [int(v) for v in self._values]
+
+    @property
+    def effective_values(self):
+        return [int(v) for v in self._effective_values]
+
+    def _candidates(self, minimum=1, maximum=None, descending=True):
+        """
+        Indices of UTXO's with an effective value between minimum and maximum, sorted by effective value
+
+        :return list of int:
+        """
+        if USE_NUMPY:
+            mask = self._effective_values >= minimum
+            if maximum is not None:
+                mask &= self._effective_values < maximum
+            indices = np.flatnonzero(mask)
+            order = np.argsort(self._effective_values[indices], kind='stable')
+            if descending:
+                order = order[::-1]
+            return indices[order].tolist()
+        indices = [i for i, e in enumerate(self._effective_values)
+                   if e >= minimum and (maximum is None or e < maximum)]
+        return sorted(indices, key=lambda i: self._effective_values[i], reverse=descending)
+
+    def total(self, selection):
+        """
+        Total value of selected UTXO's
+
+        :param selection: List of UTXO indices
+        :type selection: list of int
+
+        :return int:
+        """
+        return sum([int(self._values[i]) for i in selection])
+
+    def effective_total(self, selection):
+        """
+        Total effective value of selected UTXO's, so the value minus the fees to spend them
+
+        :param selection: List of UTXO indices
+        :type selection: list of int
+
+        :return int:
+        """
+        return sum([int(self._effective_values[i]) for i in selection])
+
+    def waste(self, selection, target, cost_of_change=0):
+        """
+        Calculate waste of a selection: the difference between the fee paid now and at the long term fee rate for
+        the inputs, plus the cost of a change output or the excess amount if no change output is created.
+
+        :param selection: List of UTXO indices
+        :type selection: list of int
+        :param target: Target effective value
+        :type target: int
+        :param cost_of_change: Cost of creating and later spending a change output
+        :type cost_of_change: int
+
+        :return int:
+        """
+        excess = self.effective_total(selection) - target
+        change_waste = excess if excess <= cost_of_change else cost_of_change
+        return sum([int(self._waste[i]) for i in selection]) + change_waste
+
+    def select(self, target, strategy='auto', variance=0, cost_of_change=0):
+        """
+        Select UTXO's for the target amount with given strategy
+
+        :param target: Amount to select. For all strategies except default the effective value of the selection, which is the total value minus input fees, must be larger or equal to this target
+        :type target: int
+        :param strategy: Name of selection strategy. Default is auto
+        :type strategy: str
+        :param variance: Allowed difference with target for an exact match in the default strategy
+        :type variance: int
+        :param cost_of_change: Cost of creating and spending a change output. A selection with an excess up to this cost does not need a change output.
+        :type cost_of_change: int
+
+        :return list of int: Indices of selected UTXO's, or an empty list if target can not be reached
+        """
+        if strategy not in self.strategies:
+            raise CoinSelectionError("Unknown coin selection strategy %s, use one of %s" % (strategy, self.strategies))
+        if strategy == 'default':
+            return self.default(target, variance)
+        return getattr(self, strategy)(target, cost_of_change)
+
+    def default(self, target, variance=0):
+        """
+        Select a single UTXO with an amount between target and target + variance, the one with the most confirmations
+        if more UTXO's match. If not found select smallest UTXO larger then target, otherwise add lesser UTXO's
+        ordered by descending value. Ignores fees.
+
+        :return list of int:
+        """
+        values = self.values
+        confs = self._confirmations
+        n = len(values)
+        exact = [i for i in range(n) if target <= values[i] <= target + variance]
+        if exact:
+            return [min(exact, key=lambda i: (-confs[i], values[i]))]
+        larger = [i for i in range(n) if values[i] >= target]
+        if larger:
+            return [min(larger, key=lambda i: values[i])]
+        if self.max_utxos and self.max_utxos <= 1:
+            return []
+        lessers = sorted(range(n), key=lambda i: -values[i])[:self.max_utxos]
+        selection = []
+        total = 0
+        for i in lessers:
+            if total >= target:
+                break
+            selection.append(i)
+            total += values[i]
+        return selection if total >= target else []
+
+    def bnb(self, target, cost_of_change=0):
+        """
+        Branch and bound search for a selection with an effective value between target and target + cost_of_change,
+        so no change output is needed. If more solutions are found the one with the least waste is returned.
+
+        :return list of int:
+        """
+        utxos = self._candidates()
+        effective = [int(self._effective_values[i]) for i in utxos]
+        waste = [int(self._waste[i]) for i in utxos]
+        remaining = sum(effective)
+        if remaining < target:
+            return []
+        upper = target + cost_of_change
+        max_utxos = self.max_utxos or len(utxos)
+
+        curr_selection = []
+        curr_value = 0
+        curr_waste = 0
+        n_selected = 0
+        best_selection = None
+        best_waste = None
+        for _ in range(BNB_MAX_TRIES):
+            backtrack = False
+            if curr_value + remaining < target or curr_value > upper or \
+                    (best_waste is not None and curr_waste > best_waste and self.fee_per_kb > self.long_term_fee_per_kb):
+                backtrack = True
+            elif curr_value >= target:
+                selection_waste = curr_waste + curr_value - target
+                if best_waste is None or selection_waste <= best_waste:
+                    best_selection = list(curr_selection)
+                    best_waste = selection_waste
+                backtrack = True
+            elif n_selected >= max_utxos:
+                backtrack = True
+
+            if backtrack:
+                # Walk back to last included UTXO, all excluded UTXO's are undecided again
+                while curr_selection and not curr_selection[-1]:
+                    curr_selection.pop()
+                    remaining += effective[len(curr_selection)]
+                if not curr_selection:
+                    break
+                # Exclude last included UTXO and continue with next branch
+                i = len(curr_selection) - 1
+                curr_selection[-1] = False
+                curr_value -= effective[i]
+                curr_waste -= waste[i]
+                n_selected -= 1
+            else:
+                i = len(curr_selection)
+                remaining -= effective[i]
+                # Skip UTXO's equal to previous excluded UTXO, this results in the same selection
+                if curr_selection and not curr_selection[-1] and effective[i] == effective[i - 1] and \
+                        waste[i] == waste[i - 1]:
+                    curr_selection.append(False)
+                else:
+                    curr_selection.append(True)
+                    curr_value += effective[i]
+                    curr_waste += waste[i]
+                    n_selected += 1
+
+        if best_selection is None:
+            return []
+        return [utxos[i] for i, included in enumerate(best_selection) if included]
+
+    def knapsack(self, target, cost_of_change=0):
+        """
+        Stochastic approximation of the smallest selection with an effective value of at least target +
+        cost_of_change. Compares the result with the smallest single UTXO which is large enough.
+
+        :return list of int:
+        """
+        target_change = target + cost_of_change
+        for i in self._candidates(target, target + 1):
+            return [i]
+        lowest_larger = self._candidates(target_change, descending=False)[:1]
+        lessers = self._candidates(1, target_change)
+        if self.max_utxos:
+            max_utxos = self.max_utxos
+        else:
+            max_utxos = len(lessers)
+        lesser_total = self.effective_total(lessers[:max_utxos])
+        if lesser_total < target:
+            return lowest_larger
+        if lesser_total == target:
+            return lessers[:max_utxos]
+
+        best_selection = lessers[:max_utxos]
+        best_total = lesser_total
+        for goal in [target, target_change]:
+            selection, total = self._approximate_best_subset(lessers, goal, max_utxos)
+            if selection and total < best_total:
+                best_selection, best_total = selection, total
+            if best_total == goal:
+                break
+        if lowest_larger and ((best_total != target and best_total < target_change) or
+                              self.effective_total(lowest_larger) <= best_total):
+            return lowest_larger
+        return sorted(best_selection, key=lambda i: self._effective_values[i], reverse=True)
+
+    def _approximate_best_subset(self, lessers, goal, max_utxos):
+        """
+        Randomly include UTXO's in order of descending value. When the goal is reached the selection is stored if
+        it is the best so far, the last UTXO is removed again and the search continues with the following UTXO's. In
+        a second pass all UTXO's not included yet are tried. Repeated a number of times, the number of iterations
+        is lowered for large UTXO sets.
+
+        :return tuple: List of UTXO indices and total effective value of best selection
+        """
+        effective = [int(self._effective_values[i]) for i in lessers]
+        n = len(effective)
+        best_selection = []
+        best_total = None
+        iterations = max(1, min(KNAPSACK_ITERATIONS, KNAPSACK_MAX_STEPS // max(n, 1)))
+        for _ in range(iterations):
+            if best_total == goal:
+                break
+            if USE_NUMPY:
+                draw = (np.random.random_sample(n) < 0.5).tolist()
+            else:
+                draw = [random.random() < 0.5 for _ in range(n)]
+            included = [False] * n
+            selected = []
+            total = 0
+            reached = False
+            for npass in range(2):
+                if reached:
+                    break
+                for i in range(n):
+                    if (draw[i] if npass == 0 else not included[i]) and len(selected) < max_utxos:
+                        total += effective[i]
+                        if total >= goal:
+                            reached = True
+                            if best_total is None or total < best_total:
+                                best_total = total
+                                best_selection = selected + [i]
+                            total -= effective[i]
+                        else:
+                            included[i] = True
+                            selected.append(i)
+        return [lessers[i] for i in best_selection], best_total
+
+    def srd(self, target, cost_of_change=0):
+        """
+        Single random draw: Add UTXO's in random order until the effective value of target + cost_of_change is
+        reached.
+
+        :return list of int:
+        """
+        utxos = self._candidates()
+        random.shuffle(utxos)
+        target_change = target + cost_of_change
+        selection = []
+        total = 0
+        for i in utxos:
+            selection.append(i)
+            total += int(self._effective_values[i])
+            if self.max_utxos and len(selection) > self.max_utxos:
+                # Remove smallest UTXO to stay within maximum number of UTXO's
+                smallest = min(selection, key=lambda j: self._effective_values[j])
+                selection.remove(smallest)
+                total -= int(self._effective_values[smallest])
+            if total >= target_change:
+                return selection
+        return []
+
+    def auto(self, target, cost_of_change=0):
+        """
+        Use branch and bound to find a selection without change output. If no solution is found, use the knapsack or
+        single random draw result with the least waste.
+
+        :return list of int:
+        """
+        selection = self.bnb(target, cost_of_change)
+        if selection:
+            return selection
+        results = [s for s in [self.knapsack(target, cost_of_change), self.srd(target, cost_of_change)] if s]
+        if not results:
+            return []
+        return min(results, key=lambda s: (self.waste(s, target, cost_of_change), len(s)))
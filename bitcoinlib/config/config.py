@@ -58,6 +58,26 @@ ALLOW_DATABASE_THREADS = None
 TIMEOUT_REQUESTS = 10
 MAX_TRANSACTIONS = 20
 BLOCK_COUNT_CACHE_TIME = 3
+SERVICE_POOL_SIZE = 10  # Maximum number of open connections per service provider
+SERVICE_MAX_RETRIES = 2  # Number of retries on server errors for get requests, connection errors are not retried
+SERVICE_RETRY_BACKOFF = 0.5  # Backoff factor in seconds between retries
+SERVICE_KEEP_ALIVE = True  # Keep connections to service providers open and reuse them
+SERVICE_RATE_LIMIT = 0  # Maximum number of requests per second per service provider, 0 is unlimited
+SERVICE_SYNC_WORKERS = 1  # Number of threads used to update wallet addresses, 1 disables concurrent updates
+SERVICE_SYNC_BATCH_SIZE = 100  # Number of addresses, transactions or utxo's written to the database in one commit
+
+# Parallel processing
+MAX_WORKERS = 0  # Number of worker processes for batch operations, 0 is number of CPU's, 1 disables process pools
+PARALLEL_MIN_BATCH_SIZE = 256  # Smaller batches are processed in current process
+
+# Number of derived child keys to keep in memory, use 0 to disable caching
+DERIVATION_CACHE_SIZE = 1000
+
+# Coin selection strategy used to select UTXO's for new transactions: default, bnb, knapsack, srd or auto
+COIN_SELECTION_STRATEGY = 'default'
+
+# Keep unspent outputs and balances of opened wallets in memory, changes are written through to the database
+WALLET_UTXO_CACHE = False
 
 # Transactions
 SCRIPT_TYPES_LOCKING = {
@@ -216,6 +236,9 @@ def read_config():
     global BCL_LOG_FILE, LOGLEVEL, ENABLE_BITCOINLIB_LOGGING
     global TIMEOUT_REQUESTS, DEFAULT_LANGUAGE, DEFAULT_NETWORK, DEFAULT_WITNESS_TYPE
     global UNITTESTS_FULL_DATABASE_TEST, SERVICE_CACHING_ENABLED, CACHE_STORE_RAW_TRANSACTIONS
+    global MAX_WORKERS, PARALLEL_MIN_BATCH_SIZE, DERIVATION_CACHE_SIZE, COIN_SELECTION_STRATEGY
+    global SERVICE_POOL_SIZE, SERVICE_MAX_RETRIES, SERVICE_RETRY_BACKOFF, SERVICE_KEEP_ALIVE
+    global SERVICE_RATE_LIMIT, SERVICE_SYNC_WORKERS, SERVICE_SYNC_BATCH_SIZE, WALLET_UTXO_CACHE
 
     # Read settings from Configuration file provided in OS environment~/.bitcoinlib/ directory
     config_file_name = os.environ.get('BCL_CONFIG_FILE')
@@ -251,11 +274,23 @@ def read_config():
 
     # Other settings
     TIMEOUT_REQUESTS = int(config_get('common', 'timeout_requests', fallback=TIMEOUT_REQUESTS))
+    SERVICE_POOL_SIZE = int(config_get('common', 'service_pool_size', fallback=SERVICE_POOL_SIZE))
+    SERVICE_MAX_RETRIES = int(config_get('common', 'service_max_retries', fallback=SERVICE_MAX_RETRIES))
+    SERVICE_RETRY_BACKOFF = float(config_get('common', 'service_retry_backoff', fallback=SERVICE_RETRY_BACKOFF))
+    SERVICE_KEEP_ALIVE = config_get('common', 'service_keep_alive', fallback=True, is_boolean=True)
+    SERVICE_RATE_LIMIT = float(config_get('common', 'service_rate_limit', fallback=SERVICE_RATE_LIMIT))
+    SERVICE_SYNC_WORKERS = int(config_get('common', 'service_sync_workers', fallback=SERVICE_SYNC_WORKERS))
+    SERVICE_SYNC_BATCH_SIZE = int(config_get('common', 'service_sync_batch_size', fallback=SERVICE_SYNC_BATCH_SIZE))
     DEFAULT_LANGUAGE = config_get('common', 'default_language', fallback=DEFAULT_LANGUAGE)
     DEFAULT_NETWORK = config_get('common', 'default_network', fallback=DEFAULT_NETWORK)
     DEFAULT_WITNESS_TYPE = config_get('common', 'default_witness_type', fallback=DEFAULT_WITNESS_TYPE)
 
     CACHE_STORE_RAW_TRANSACTIONS = config_get('common', 'cache_store_raw_transactions', fallback=True, is_boolean=True)
+    MAX_WORKERS = int(config_get('common', 'max_workers', fallback=MAX_WORKERS))
+    PARALLEL_MIN_BATCH_SIZE = int(config_get('common', 'parallel_min_batch_size', fallback=PARALLEL_MIN_BATCH_SIZE))
+    DERIVATION_CACHE_SIZE = int(config_get('common', 'derivation_cache_size', fallback=DERIVATION_CACHE_SIZE))
+    COIN_SELECTION_STRATEGY = config_get('common', 'coin_selection_strategy', fallback=COIN_SELECTION_STRATEGY)
+    WALLET_UTXO_CACHE = config_get('common', 'wallet_utxo_cache', fallback=False, is_boolean=True)
 
     # Convert paths to strings
 
@@ -25,9 +25,9 @@ try:
     import enum
 except ImportError:
     import enum34 as enum
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy import (Column, Integer, BigInteger, UniqueConstraint, CheckConstraint, String, Boolean, Sequence,
-                        ForeignKey, DateTime, Numeric, Text)
+                        ForeignKey, DateTime, Numeric, Text, Index)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 try:
@@ -111,6 +111,20 @@ def add_column(engine, table_name, column):
     engine.execute('ALTER TABLE %s ADD COLUMN %s %s' % (table_name, column_name, column_type))
 
 
+def add_index(engine, index):
+    """
+    Used to add new index to an existing database table with migration and update scripts. Does nothing if an index
+    with the same name already exists.
+
+    :param engine:
+    :param index:
+    :return:
+    """
+    if index.name in [ix['name'] for ix in inspect(engine).get_indexes(index.table.name)]:
+        return
+    index.create(bind=engine)
+
+
 class DbConfig(Base):
     """
     BitcoinLib configuration variables
@@ -329,6 +343,7 @@ class DbTransaction(Base):
         CheckConstraint(status.in_(['new', 'incomplete', 'unconfirmed', 'confirmed']),
                         name='constraint_status_allowed'),
         CheckConstraint(witness_type.in_(['legacy', 'segwit']), name='transaction_constraint_allowed_types'),
+        Index('ix_transactions_wallet_id_network_name_block_height', 'wallet_id', 'network_name', 'block_height'),
     )
 
     def __repr__(self):
@@ -372,7 +387,8 @@ class DbTransactionInput(Base):
                                       name='transactioninput_constraint_script_types_allowed'),
                       CheckConstraint(witness_type.in_(['legacy', 'segwit', 'p2sh-segwit']),
                                       name='transactioninput_constraint_allowed_types'),
-                      UniqueConstraint('transaction_id', 'index_n', name='constraint_transaction_input_unique'))
+                      UniqueConstraint('transaction_id', 'index_n', name='constraint_transaction_input_unique'),
+                      Index('ix_transaction_inputs_prev_hash_output_n', 'prev_hash', 'output_n'))
 
 
 class DbTransactionOutput(Base):
@@ -404,7 +420,10 @@ class DbTransactionOutput(Base):
     __table_args__ = (CheckConstraint(script_type.in_(['', 'p2pkh',  'multisig', 'p2sh', 'p2pk', 'nulldata',
                                                        'unknown', 'p2wpkh', 'p2wsh']),
                                       name='transactionoutput_constraint_script_types_allowed'),
-                      UniqueConstraint('transaction_id', 'output_n', name='constraint_transaction_output_unique'))
+                      UniqueConstraint('transaction_id', 'output_n', name='constraint_transaction_output_unique'),
+                      Index('ix_transaction_outputs_transaction_id_output_n_spent', 'transaction_id', 'output_n',
+                            'spent'),
+                      Index('ix_transaction_outputs_key_id_spent', 'key_id', 'spent'))
 
 
 def db_update_version_id(db, version):
@@ -432,6 +451,12 @@ def db_update(db, version_db, code_version=BITCOINLIB_VERSION):
         add_column(db.engine, 'transaction_outputs', column1)
         add_column(db.engine, 'transaction_outputs', column2)
         version_db = db_update_version_id(db, '0.4.15')
+    if version_db <= '0.4.16' and code_version >= '0.4.17':
+        # Composite indexes for wallet key, transaction and unspent output lookups
+        for table in [DbTransaction, DbTransactionInput, DbTransactionOutput]:
+            for index in table.__table__.indexes:
+                add_index(db.engine, index)
+        version_db = db_update_version_id(db, '0.4.17')
 
     return version_db
 
@@ -90,6 +90,20 @@ code_strings = {
     'bech32': b'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
 }
 
+# Lookup tables for base58 and bech32 encoding and decoding
+_base58_alphabet = code_strings[58].decode() if PY3 else code_strings[58]
+_base58_index = dict((c, i) for i, c in enumerate(bytearray(code_strings[58])))
+_base58_chunk_size = 10
+_base58_chunk = 58 ** _base58_chunk_size
+_bech32_alphabet = code_strings['bech32'].decode()
+_bech32_index = dict((c, i) for i, c in enumerate(bytearray(code_strings['bech32'])))
+_bech32_generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+_bech32_polymod_table = [0] * 32
+for _top in range(32):
+    for _i in range(5):
+        if (_top >> _i) & 1:
+            _bech32_polymod_table[_top] ^= _bech32_generator[_i]
+
 
 def _get_code_string(base):
     if base in code_strings:
@@ -428,6 +442,112 @@ def der_encode_sig(r, s):
         return ecdsa.der.encode_sequence(rb, sb)
 
 
+def base58_encode(data):
+    """
+    Encode bytes to base58 string. Leading zero bytes are encoded as '1' characters.
+
+    Faster alternative for change_base(data, 256, 58): the input is converted to one integer and then divided into
+    chunks of 10 base58 characters, which are converted with small integer arithmetic.
+
+    >>> base58_encode(b'\\x00\\x00hello world')
+    '11StV1DL6CwTryKyV'
+
+    :param data: Bytes to encode
+    :type data: bytes, bytearray
+
+    :return str: Base58 encoded string
+    """
+    data = bytes(data)
+    if PY3:
+        n = int.from_bytes(data, 'big')
+    else:
+        n = int(binascii.hexlify(data), 16) if data else 0
+    digits = []
+    while n:
+        n, chunk = divmod(n, _base58_chunk)
+        for _ in range(_base58_chunk_size):
+            chunk, r = divmod(chunk, 58)
+            digits.append(r)
+    while digits and not digits[-1]:
+        digits.pop()
+    zeros = len(data) - len(data.lstrip(b'\0'))
+    return '1' * zeros + ''.join([_base58_alphabet[d] for d in reversed(digits)])
+
+
+def base58_decode(data):
+    """
+    Decode base58 string to bytes. Leading '1' characters are decoded as zero bytes.
+
+    Faster alternative for change_base(data, 58, 256) which uses a lookup table for the characters and converts
+    chunks of 10 characters at once.
+
+    >>> base58_decode('11StV1DL6CwTryKyV')
+    b'\\x00\\x00hello world'
+
+    :param data: Base58 encoded string
+    :type data: str, bytes
+
+    :return bytes:
+    """
+    if not isinstance(data, (bytes, bytearray)):
+        if not isinstance(data, TYPE_TEXT):
+            raise EncodingError("Unknown input format %s, must be string or bytes" % data)
+        try:
+            data = data.encode('ascii')
+        except UnicodeError:
+            raise EncodingError("Invalid base58 character in string %r" % data)
+    data = bytearray(data)
+    n = 0
+    try:
+        for pos in range(0, len(data), _base58_chunk_size):
+            chars = data[pos:pos + _base58_chunk_size]
+            chunk = 0
+            for c in chars:
+                chunk = chunk * 58 + _base58_index[c]
+            n = n * 58 ** len(chars) + chunk
+    except KeyError as e:
+        raise EncodingError("Unknown character %s found in input string" % chr(e.args[0]))
+    zeros = len(data) - len(data.lstrip(b'1'))
+    if PY3:
+        return b'\0' * zeros + n.to_bytes((n.bit_length() + 7) // 8, 'big')
+    hex_n = '%x' % n if n else ''
+    return b'\0' * zeros + binascii.unhexlify(hex_n.zfill(len(hex_n) + len(hex_n) % 2))
+
+
+def base58check_encode(data):
+    """
+    Add 4 byte double SHA256 checksum to data and encode as base58 string. Used for addresses and WIF keys.
+
+    >>> base58check_encode(bytes.fromhex('0021342f229392d7c9ed82c932916cee6517fbc9a2'))
+    '142Zp9WZn9Fh4MV8F3H5Dv4Rbg7Ja1sPWZ'
+
+    :param data: Bytes to encode
+    :type data: bytes, bytearray
+
+    :return str: Base58 encoded string
+    """
+    data = bytes(data)
+    return base58_encode(data + double_sha256(data)[:4])
+
+
+def base58check_decode(data):
+    """
+    Decode base58 string, verify and remove 4 byte checksum.
+
+    >>> base58check_decode('142Zp9WZn9Fh4MV8F3H5Dv4Rbg7Ja1sPWZ').hex()
+    '0021342f229392d7c9ed82c932916cee6517fbc9a2'
+
+    :param data: Base58 encoded string
+    :type data: str, bytes
+
+    :return bytes: Decoded data without checksum
+    """
+    decoded = base58_decode(data)
+    if len(decoded) < 4 or double_sha256(decoded[:-4])[:4] != decoded[-4:]:
+        raise EncodingError("Invalid checksum for base58 string %s" % data)
+    return decoded[:-4]
+
+
 def addr_to_pubkeyhash(address, as_hex=False, encoding=None):
     """
     Convert base58 or bech32 address to public key hash
@@ -471,7 +591,7 @@ def addr_base58_to_pubkeyhash(address, as_hex=False):
     """
 
     try:
-        address = change_base(address, 58, 256, 25)
+        address = base58_decode(address)
     except EncodingError as err:
         raise EncodingError("Invalid address %s: %s" % (address, err))
     check = address[-4:]
@@ -479,7 +599,7 @@ def addr_base58_to_pubkeyhash(address, as_hex=False):
     checksum = double_sha256(pkh)[0:4]
     assert (check == checksum), "Invalid address, checksum incorrect"
     if as_hex:
-        return change_base(pkh, 256, 16)[2:]
+        return to_hexstring(pkh[1:])
     else:
         return pkh[1:]
 
@@ -514,7 +634,10 @@ def addr_bech32_to_pubkeyhash(bech, prefix=None, include_witver=False, as_hex=Fa
         raise EncodingError("Invalid bech32 address. Prefix '%s', prefix expected is '%s'" % (bech[:pos], prefix))
     else:
         hrp = bech[:pos]
-    data = _codestring_to_array(bech[pos + 1:], 'bech32')
+    try:
+        data = [_bech32_index[c] for c in bytearray(bech[pos + 1:].encode())]
+    except KeyError as e:
+        raise EncodingError("Character '%s' not found in codebase" % chr(e.args[0]))
     hrp_expanded = [ord(x) >> 5 for x in hrp] + [0] + [ord(x) & 31 for x in hrp]
     if not _bech32_polymod(hrp_expanded + data) == 1:
         raise EncodingError("Bech polymod check failed")
@@ -579,8 +702,7 @@ def pubkeyhash_to_addr_base58(pubkeyhash, prefix=b'\x00'):
     """
     # prefix = to_bytes(prefix)
     key = to_bytearray(prefix) + to_bytearray(pubkeyhash)
-    addr256 = key + double_sha256(key)[:4]
-    return change_base(addr256, 256, 58)
+    return base58check_encode(key)
 
 
 def pubkeyhash_to_addr_bech32(pubkeyhash, prefix='bc', witver=0, separator='1'):
@@ -621,20 +743,17 @@ def pubkeyhash_to_addr_bech32(pubkeyhash, prefix='bc', witver=0, separator='1'):
     polymod = _bech32_polymod(hrp_expanded + data + [0, 0, 0, 0, 0, 0]) ^ 1
     checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
 
-    return prefix + separator + _array_to_codestring(data, 'bech32') + _array_to_codestring(checksum, 'bech32')
+    return prefix + separator + ''.join([_bech32_alphabet[d] for d in data + checksum])
 
 
 def _bech32_polymod(values):
     """
-    Internal function that computes the Bech32 checksum
+    Internal function that computes the Bech32 checksum. Uses a lookup table with the combined generator values for
+    each of the 32 possible top bit combinations.
     """
-    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
     chk = 1
     for value in values:
-        top = chk >> 25
-        chk = (chk & 0x1ffffff) << 5 ^ value
-        for i in range(5):
-            chk ^= generator[i] if ((top >> i) & 1) else 0
+        chk = ((chk & 0x1ffffff) << 5 ^ value) ^ _bech32_polymod_table[chk >> 25]
     return chk
 
 
@@ -827,7 +946,7 @@ def bip38_decrypt(encrypted_privkey, passphrase):
 
     :return tupple (bytes, bytes): (Private Key bytes, 4 byte address hash for verification)
     """
-    d = change_base(encrypted_privkey, 58, 256)[2:]
+    d = base58_decode(encrypted_privkey)[2:]
     flagbyte = d[0:1]
     d = d[1:]
     if flagbyte == b'\xc0':
@@ -886,5 +1005,4 @@ def bip38_encrypt(private_hex, address, passphrase, flagbyte=b'\xe0'):
     encryptedhalf2 = aes.encrypt(binascii.unhexlify('%0.32x' % (int(private_hex[32:64], 16) ^
                                                                 int(binascii.hexlify(derivedhalf1[16:32]), 16))))
     encrypted_privkey = b'\x01\x42' + flagbyte + addresshash + encryptedhalf1 + encryptedhalf2
-    encrypted_privkey += double_sha256(encrypted_privkey)[:4]
-    return change_base(encrypted_privkey, 256, 58)
+    return base58check_encode(encrypted_privkey)
@@ -28,16 +28,18 @@ import os
 import random
 import struct
 import sys
+import threading
 import warnings
-from copy import deepcopy
+from copy import copy, deepcopy
 
-from bitcoinlib.config.config import (DEFAULT_NETWORK, DEFAULT_WITNESS_TYPE, ENCODING_BECH32_PREFIXES, PY3,
-                                      SIGHASH_ALL, TYPE_TEXT, WALLET_KEY_STRUCTURES)
+from bitcoinlib.config.config import (DEFAULT_NETWORK, DEFAULT_WITNESS_TYPE, DERIVATION_CACHE_SIZE,
+                                      ENCODING_BECH32_PREFIXES, PY3, SIGHASH_ALL, TYPE_TEXT, WALLET_KEY_STRUCTURES)
 from bitcoinlib.config.secp256k1 import secp256k1_Gx, secp256k1_Gy, secp256k1_a, secp256k1_b, secp256k1_n, secp256k1_p
 from bitcoinlib.encoding import (EncodingError, USE_FASTECDSA, addr_bech32_to_pubkeyhash, addr_to_pubkeyhash,
-                                 bip38_decrypt, bip38_encrypt, change_base, convert_der_sig, der_encode_sig,
-                                 double_sha256, hash160, pubkeyhash_to_addr, to_bytes, to_hexstring, varstr)
-from bitcoinlib.main import deprecated, get_encoding_from_witness, script_type_default
+                                 base58_decode, base58check_encode, bip38_decrypt, bip38_encrypt, change_base,
+                                 convert_der_sig, der_encode_sig, double_sha256, hash160, pubkeyhash_to_addr, to_bytes,
+                                 to_hexstring, varstr)
+from bitcoinlib.main import deprecated, get_encoding_from_witness, parallel_imap, parallel_map, script_type_default
 from bitcoinlib.mnemonic import Mnemonic
 from bitcoinlib.networks import Network, network_by_value, wif_prefix_search
 
@@ -69,6 +71,95 @@ class BKeyError(Exception):
         return self.msg
 
 
+class DerivationCache(object):
+    """
+    Bounded least recently used cache for derived HD child keys. Used by :func:`HDKey.child_private` and
+    :func:`HDKey.child_public`, so wallets and :func:`HDKey.subkey_for_path` do not derive the same keys again.
+
+    Keys are a tuple of parent key bytes, parent chain code, depth, child index and the key settings such as network
+    and witness type. Values are the derived HDKey objects, callers receive a copy so cached keys are never changed.
+    Use the hits and misses attributes to check effectiveness of the cache.
+
+    The default size can be set with the derivation_cache_size setting in config.ini, use 0 to disable caching. To
+    free memory or to start with an empty cache use the clear method, for instance derivation_cache.clear() for the
+    module level cache used by HDKey.
+    """
+
+    def __init__(self, size=DERIVATION_CACHE_SIZE):
+        """
+        Create a new derivation cache
+
+        :param size: Maximum number of items in cache
+        :type size: int
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<DerivationCache(size=%d, items=%d, hits=%d, misses=%d)>" % \
+               (self.size, len(self._items), self.hits, self.misses)
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        """
+        Get cached item and mark as most recently used
+
+        :param key: Tuple with parent key, chain code, index and key settings
+        :type key: tuple
+
+        :return HDKey: Child key or None if not found
+        """
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._move_to_end(key, value)
+                self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Add item to cache, removes least recently used item if cache is full
+
+        :param key: Tuple with parent key, chain code, index and key settings
+        :type key: tuple
+        :param value: Derived child key
+        :type value: HDKey
+        """
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._move_to_end(key, value)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def _move_to_end(self, key, value):
+        if PY3:
+            self._items[key] = value
+            self._items.move_to_end(key)
+        else:
+            self._items.pop(key, None)
+            self._items[key] = value
+
+    def clear(self):
+        """
+        Remove all items from cache and reset hit and miss counters
+        """
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+derivation_cache = DerivationCache()
+
+
 def check_network_and_key(key, network=None, kf_networks=None, default_network=DEFAULT_NETWORK):
     """
     Check if given key corresponds with given network and return network if it does. If no network is specified
@@ -186,17 +277,18 @@ def get_key_format(key, is_private=None):
         is_private = True
     else:
         try:
-            key_hex = change_base(key, 58, 16)
-            networks = network_by_value('prefix_wif', key_hex[:2])
+            key_bytes = base58_decode(key)
+            prefix_hex = binascii.hexlify(key_bytes[:4]).decode().upper()
+            networks = network_by_value('prefix_wif', prefix_hex[:2])
             # TODO: First search for longer prefix, to avoid wrong matches
             if networks:
-                if key_hex[-10:-8] == '01':
+                if key_bytes[-5:-4] == b'\x01':
                     key_format = 'wif_compressed'
                 else:
                     key_format = 'wif'
                 is_private = True
             else:
-                prefix_data = wif_prefix_search(key_hex[:8])
+                prefix_data = wif_prefix_search(prefix_hex)
                 if prefix_data:
                     networks = list(set([n['network'] for n in prefix_data]))
                     if is_private is None and len(set([n['is_private'] for n in prefix_data])) > 1:
@@ -267,7 +359,7 @@ def deserialize_address(address, encoding=None, network=None):
 
     if encoding is None or encoding == 'base58':
         try:
-            address_bytes = change_base(address, 58, 256, 25)
+            address_bytes = base58_decode(address)
         except EncodingError:
             pass
         else:
@@ -814,7 +906,7 @@ class Key(object):
                 self.compressed = True
             elif self.is_private and self.key_format in ['wif', 'wif_compressed']:
                 # Check and remove Checksum, prefix and postfix tags
-                key = change_base(import_key, 58, 256)
+                key = base58_decode(import_key)
                 checksum = key[-4:]
                 key = key[:-4]
                 if checksum != double_sha256(key)[:4]:
@@ -995,6 +1087,37 @@ class Key(object):
         flagbyte = b'\xe0' if self.compressed else b'\xc0'
         return bip38_encrypt(self.private_hex, self.address(), passphrase, flagbyte)
 
+    @staticmethod
+    def bip38_decrypt_many(encrypted_keys, passphrase, network=DEFAULT_NETWORK, witness_type=None, max_workers=None):
+        """
+        Decrypt a list of BIP0038 encrypted private keys with the same passphrase.
+
+        BIP0038 decryption uses scrypt and is slow by design, so the keys are divided over a pool of worker processes,
+        see the max_workers setting in config.ini. Returns a generator which yields Key objects in the same order as
+        the encrypted keys as soon as they are available.
+
+        >>> keys = Key.bip38_decrypt_many(['6PYM8wAnnmAK5mHYoF7zqj88y5HtK7eiPeqPdu4WnYEFkYKEEoMFEVfuDg'], 'test', 'testnet')
+        >>> next(keys).wif()
+        'cNUpWJbC1hVJtyxyV4bVAnb4uJ7FPhr82geo1vnoA29XWkeiiCQn'
+
+        :param encrypted_keys: List of encrypted private keys using WIF protected key format
+        :type encrypted_keys: list of str
+        :param passphrase: Required passphrase for decryption
+        :type passphrase: str
+        :param network: Network name, used to verify address hash and for the returned keys
+        :type network: str
+        :param witness_type: Witness type of the address used to verify the address hash. Leave empty to use the address of a Key object
+        :type witness_type: str
+        :param max_workers: Number of worker processes. Leave empty to use the max_workers setting from config, 1 disables the process pool
+        :type max_workers: int
+
+        :return generator: Key objects
+        """
+        items = [(encrypted_key, passphrase, network, witness_type) for encrypted_key in encrypted_keys]
+        # Each decryption takes longer than starting a worker process, so use a process pool for every batch
+        for priv, compressed in parallel_imap(_bip38_decrypt_values, items, max_workers, min_batch_size=2):
+            yield Key(priv, network=network, compressed=compressed)
+
     def wif(self, prefix=None):
         """
         Get private Key in Wallet Import Format, steps:
@@ -1022,8 +1145,7 @@ class Key(object):
         key = versionbyte + change_base(self.secret, 10, 256, 32)
         if self.compressed:
             key += b'\1'
-        key += double_sha256(key)[:4]
-        self._wif = change_base(key, 256, 58)
+        self._wif = base58check_encode(key)
         self._wif_prefix = versionbyte
         return self._wif
 
@@ -1311,7 +1433,7 @@ class HDKey(Key):
                     multisig = kf['multisig'][0]
                 network = Network(check_network_and_key(import_key, network, kf["networks"]))
                 if kf['format'] in ['hdkey_private', 'hdkey_public']:
-                    bkey = change_base(import_key, 58, 256)
+                    bkey = base58_decode(import_key)
                     # Derive key, chain, depth, child_index and fingerprint part from extended key WIF
                     if ord(bkey[45:46]):
                         is_private = False
@@ -1350,6 +1472,146 @@ class HDKey(Key):
         self.child_index = child_index
         self.key_type = key_type
 
+    @staticmethod
+    def _from_trusted(key, chain, depth=0, parent_fingerprint=b'\0\0\0\0', child_index=0, is_private=True,
+                      network=DEFAULT_NETWORK, key_type='bip32', encoding=None, witness_type=None, multisig=False,
+                      script_type=None, point=None):
+        """
+        Create HDKey object from key material which is already validated, such as derived child keys or keys from
+        a wallet database.
+
+        Skips the key format detection and network checks of the :func:`__init__` method. If the public key point is
+        not provided it is calculated from the private key, or the y-coordinate is calculated from the compressed
+        public key.
+
+        :param key: Private key (32 bytes) or compressed public key (33 bytes)
+        :type key: bytes
+        :param chain: A chain code (32 bytes)
+        :type chain: bytes
+        :param depth: Level of depth in BIP32 key path
+        :type depth: int
+        :param parent_fingerprint: 4-byte fingerprint of parent
+        :type parent_fingerprint: bytes
+        :param child_index: Index number of child as integer
+        :type child_index: int
+        :param is_private: True for private, False for public key. Default is True
+        :type is_private: bool
+        :param network: Network name or object
+        :type network: str, Network
+        :param key_type: HD BIP32 or normal Private Key. Default is 'bip32'
+        :type key_type: str
+        :param encoding: Encoding used for address, i.e.: base58 or bech32. Default is base58 or derive from witness type
+        :type encoding: str
+        :param witness_type: Witness type used when creating scripts: legacy, p2sh-segwit or segwit.
+        :type witness_type: str
+        :param multisig: Specify if key is part of multisig wallet
+        :type multisig: bool
+        :param script_type: Script type of key. Default is derived from witness type and multisig
+        :type script_type: str
+        :param point: Tuple with x and y coordinate of public key point
+        :type point: tuple of int
+
+        :return HDKey:
+        """
+        hdkey = HDKey.__new__(HDKey)
+        if not encoding and witness_type:
+            encoding = get_encoding_from_witness(witness_type)
+        hdkey.script_type = script_type if script_type else script_type_default(witness_type, multisig)
+        hdkey.network = Network(network)
+        hdkey.compressed = True
+        hdkey.is_private = is_private
+        if is_private:
+            hdkey.key_format = 'bin'
+            hdkey.private_byte = key
+            hdkey.private_hex = to_hexstring(key)
+            hdkey.secret = change_base(key, 256, 10)
+            if point is None:
+                p = ec_point(hdkey.secret)
+                point = (p.x, p.y) if USE_FASTECDSA else (p.x(), p.y())
+        else:
+            hdkey.key_format = 'bin_compressed'
+            hdkey.private_byte = None
+            hdkey.private_hex = None
+            hdkey.secret = None
+            if point is None:
+                x = change_base(key[1:33], 256, 10)
+                y = mod_sqrt(pow(x, 3, secp256k1_p) + 7 % secp256k1_p)
+                if y & 1 != (key[:1] == b'\x03'):
+                    y = secp256k1_p - y
+                point = (x, y)
+        hdkey._x, hdkey._y = point
+        hdkey.x_hex = change_base(hdkey._x, 10, 16, 64)
+        hdkey.y_hex = change_base(hdkey._y, 10, 16, 64)
+        hdkey.public_compressed_hex = ('03' if hdkey._y % 2 else '02') + hdkey.x_hex
+        hdkey.public_uncompressed_hex = '04' + hdkey.x_hex + hdkey.y_hex
+        hdkey.public_hex = hdkey.public_compressed_hex
+        hdkey.public_compressed_byte = to_bytes(hdkey.public_compressed_hex)
+        hdkey.public_uncompressed_byte = to_bytes(hdkey.public_uncompressed_hex)
+        hdkey.public_byte = hdkey.public_compressed_byte
+        hdkey._hash160 = None
+        hdkey._address_obj = None
+        hdkey._wif = None
+        hdkey._wif_prefix = None
+
+        hdkey.encoding = encoding
+        hdkey.witness_type = witness_type if witness_type is not None else DEFAULT_WITNESS_TYPE
+        hdkey.multisig = multisig
+        hdkey.chain = chain
+        hdkey.depth = depth
+        hdkey.parent_fingerprint = parent_fingerprint
+        hdkey.child_index = child_index
+        hdkey.key_type = key_type
+        return hdkey
+
+    @staticmethod
+    def _from_wif_trusted(wif, network=None, public_hex=None, compressed=True):
+        """
+        Create HDKey object from an extended key WIF which is already validated, for instance a WIF stored in a
+        wallet database. The checksum is not checked, and if the public key is provided the public point is
+        recovered from the public key instead of calculated from the private key.
+
+        Keys which are not extended keys are imported with the :func:`__init__` method.
+
+        :param wif: Extended private or public key WIF
+        :type wif: str
+        :param network: Network name
+        :type network: str
+        :param public_hex: Compressed public key as hexadecimal string
+        :type public_hex: str
+        :param compressed: Is key compressed or not, only used for keys which are not extended keys
+        :type compressed: bool
+
+        :return HDKey:
+        """
+        network_name = network.name if isinstance(network, Network) else network
+        bkey = base58_decode(wif)
+        prefix_data = []
+        if len(bkey) == 82:
+            prefix_data = wif_prefix_search(binascii.hexlify(bkey[:4]).decode().upper(), network=network_name)
+        if not prefix_data:
+            return HDKey(wif, compressed=compressed, network=network)
+        script_types = list(set([n['script_type'] for n in prefix_data]))
+        witness_types = list(set([n['witness_type'] for n in prefix_data]))
+        multisig = list(set([n['multisig'] for n in prefix_data]))
+        witness_type = witness_types[0] if len(witness_types) == 1 else None
+        is_private = not ord(bkey[45:46])
+        key = bkey[46:78] if is_private else bkey[45:78]
+        point = None
+        if is_private and public_hex and len(public_hex) == 66:
+            x = change_base(public_hex[2:], 16, 10)
+            y = mod_sqrt(pow(x, 3, secp256k1_p) + 7 % secp256k1_p)
+            if y & 1 != (public_hex[:2] == '03'):
+                y = secp256k1_p - y
+            point = (x, y)
+        hdkey = HDKey._from_trusted(
+            key, bkey[13:45], depth=ord(bkey[4:5]), parent_fingerprint=bkey[5:9],
+            child_index=int(change_base(bkey[9:13], 256, 10)), is_private=is_private,
+            network=network_name or prefix_data[0]['network'], witness_type=witness_type,
+            multisig=multisig[0] if len(multisig) == 1 else False, point=point)
+        # Like the WIF import in __init__, do not use a default script type if the prefix is ambiguous
+        hdkey.script_type = script_types[0] if len(script_types) == 1 else None
+        return hdkey
+
     def __repr__(self):
         return "<HDKey(public_hex=%s, wif_public=%s, network=%s)>" % \
                (self.public_hex, self.wif_public(), self.network.name)
@@ -1525,9 +1787,7 @@ class HDKey(Key):
             self.child_index = child_index
         raw = prefix + struct.pack('B', self.depth) + self.parent_fingerprint + \
             struct.pack('>L', self.child_index) + self.chain + typebyte + rkey
-        chk = double_sha256(raw)[:4]
-        ret = raw+chk
-        return change_base(ret, 256, 58, 111)
+        return base58check_encode(raw)
 
     def wif_key(self, prefix=None):
         """
@@ -1835,22 +2095,29 @@ class HDKey(Key):
             raise BKeyError("Need a private key to create child private key")
         if hardened:
             index |= 0x80000000
-            data = b'\0' + self.private_byte + struct.pack('>L', index)
-        else:
-            data = self.public_byte + struct.pack('>L', index)
-        key, chain = self._key_derivation(data)
-
-        key = change_base(key, 256, 10)
-        if key >= secp256k1_n:
-            raise BKeyError("Key cannot be greater than secp256k1_n. Try another index number.")
-        newkey = (key + self.secret) % secp256k1_n
-        if newkey == 0:
-            raise BKeyError("Key cannot be zero. Try another index number.")
-        newkey = change_base(newkey, 10, 256, 32)
-
-        return HDKey(key=newkey, chain=chain, depth=self.depth+1, parent_fingerprint=self.fingerprint,
-                     child_index=index, witness_type=self.witness_type, multisig=self.multisig,
-                     encoding=self.encoding, network=network)
+        cache_key = (self.private_byte, self.chain, self.depth, index, network, self.witness_type, self.multisig,
+                     self.encoding)
+        child = derivation_cache.get(cache_key)
+        if child is None:
+            if hardened:
+                data = b'\0' + self.private_byte + struct.pack('>L', index)
+            else:
+                data = self.public_byte + struct.pack('>L', index)
+            key, chain = self._key_derivation(data)
+
+            key = change_base(key, 256, 10)
+            if key >= secp256k1_n:
+                raise BKeyError("Key cannot be greater than secp256k1_n. Try another index number.")
+            newkey = (key + self.secret) % secp256k1_n
+            if newkey == 0:
+                raise BKeyError("Key cannot be zero. Try another index number.")
+            newkey = change_base(newkey, 10, 256, 32)
+
+            child = HDKey._from_trusted(newkey, chain, depth=self.depth+1, parent_fingerprint=self.fingerprint,
+                                        child_index=index, witness_type=self.witness_type, multisig=self.multisig,
+                                        encoding=self.encoding, network=network)
+            derivation_cache.set(cache_key, child)
+        return copy(child)
 
     def child_public(self, index=0, network=None):
         """
@@ -1881,31 +2148,81 @@ class HDKey(Key):
             network = self.network.name
         if index > 0x80000000:
             raise BKeyError("Cannot derive hardened key from public private key. Index must be less than 0x80000000")
-        data = self.public_byte + struct.pack('>L', index)
-        key, chain = self._key_derivation(data)
-        key = change_base(key, 256, 10)
-        if key >= secp256k1_n:
-            raise BKeyError("Key cannot be greater than secp256k1_n. Try another index number.")
+        cache_key = (self.public_byte, self.chain, self.depth, index, network, self.witness_type, self.multisig,
+                     self.encoding)
+        child = derivation_cache.get(cache_key)
+        if child is None:
+            data = self.public_byte + struct.pack('>L', index)
+            key, chain = self._key_derivation(data)
+            key = change_base(key, 256, 10)
+            if key >= secp256k1_n:
+                raise BKeyError("Key cannot be greater than secp256k1_n. Try another index number.")
 
-        x, y = self.public_point()
-        if USE_FASTECDSA:
-            ki = ec_point(key) + fastecdsa_point.Point(x, y, fastecdsa_secp256k1)
-            ki_x = ki.x
-            ki_y = ki.y
-        else:
-            ki = ec_point(key) + ecdsa.ellipticcurve.Point(secp256k1_curve, x, y, secp256k1_n)
-            ki_x = ki.x()
-            ki_y = ki.y()
+            x, y = self.public_point()
+            if USE_FASTECDSA:
+                ki = ec_point(key) + fastecdsa_point.Point(x, y, fastecdsa_secp256k1)
+                ki_x = ki.x
+                ki_y = ki.y
+            else:
+                ki = ec_point(key) + ecdsa.ellipticcurve.Point(secp256k1_curve, x, y, secp256k1_n)
+                ki_x = ki.x()
+                ki_y = ki.y()
 
-        if ki_y % 2:
-            prefix = '03'
-        else:
-            prefix = '02'
-        xhex = change_base(ki_x, 10, 16, 64)
-        secret = binascii.unhexlify(prefix + xhex)
-        return HDKey(key=secret, chain=chain, depth=self.depth+1, parent_fingerprint=self.fingerprint,
-                     child_index=index, is_private=False, witness_type=self.witness_type, multisig=self.multisig,
-                     encoding=self.encoding, network=network)
+            if ki_y % 2:
+                prefix = '03'
+            else:
+                prefix = '02'
+            xhex = change_base(ki_x, 10, 16, 64)
+            secret = binascii.unhexlify(prefix + xhex)
+            child = HDKey._from_trusted(secret, chain, depth=self.depth+1, parent_fingerprint=self.fingerprint,
+                                        child_index=index, is_private=False, witness_type=self.witness_type,
+                                        multisig=self.multisig, encoding=self.encoding, network=network,
+                                        point=(ki_x, ki_y))
+            derivation_cache.set(cache_key, child)
+        return copy(child)
+
+    def derive_public_children(self, indexes, network=None):
+        """
+        Derive public child keys for a range of indexes. Use this method to generate a large number of addresses.
+
+        Unlike :func:`child_public` no HDKey object is created for each child. The parent point and chain code
+        are reused and the child points are calculated with a precomputed table of multiples of the generator point.
+
+        >>> wif = 'xpub661MyMwAqRbcFcXi3aM3fVdd42FGDSdufhrr5tdobiPjMrPUykFMTdaFEr7yoy1xxeifDY8kh2k4h9N77MY6rk18nfgg5rPtbFDF2YHzLfA'
+        >>> k = HDKey(wif)
+        >>> children = list(k.derive_public_children(range(3)))
+        >>> children[2][2] == k.child_public(2).address()
+        True
+
+        :param indexes: List or range of key index numbers, must be smaller than 0x80000000
+        :type indexes: list, range
+        :param network: Network name. Default is network of current key
+        :type network: str
+
+        :return generator: Tuples with index, public key bytes and address
+        """
+        network = self.network if network is None else Network(network)
+        script_type = script_type_default(self.witness_type, self.multisig)
+        x, y = self.public_point()
+        public_byte = self.public_byte
+        indexes = list(indexes)
+        for pos in range(0, len(indexes), 256):
+            batch = indexes[pos:pos + 256]
+            points = []
+            for index in batch:
+                if index >= 0x80000000:
+                    raise BKeyError("Cannot derive hardened key from public private key. Index must be less than "
+                                    "0x80000000")
+                i = hmac.new(self.chain, public_byte + struct.pack('>L', index), hashlib.sha512).digest()
+                key = change_base(i[:32], 256, 10)
+                if key >= secp256k1_n:
+                    raise BKeyError("Key cannot be greater than secp256k1_n. Try another index number.")
+                points.append(_ec_point_multiply_generator(key, (x, y, 1)))
+            for index, (ki_x, ki_y) in zip(batch, _ec_points_to_affine(points)):
+                child_public_byte = (b'\x03' if ki_y % 2 else b'\x02') + to_bytes('%064x' % ki_x)
+                address = Address(child_public_byte, network=network, script_type=script_type,
+                                  encoding=self.encoding, compressed=True).address
+                yield index, child_public_byte, address
 
     def public(self):
         """
@@ -2197,40 +2514,64 @@ class Signature(object):
         if not self.tx_hash or not self.public_key:
             raise BKeyError("Please provide tx_hash and public_key to verify signature")
 
-        if USE_FASTECDSA:
-            return _ecdsa.verify(
-                str(self.r),
-                str(self.s),
-                self.tx_hash,
-                str(self.x),
-                str(self.y),
-                str(secp256k1_p),
-                str(secp256k1_a),
-                str(secp256k1_b),
-                str(secp256k1_n),
-                str(secp256k1_Gx),
-                str(secp256k1_Gy)
-            )
-        else:
-            transaction_to_sign = to_bytes(self.tx_hash)
-            signature = self.bytes()
-            if len(transaction_to_sign) != 32:
-                transaction_to_sign = double_sha256(transaction_to_sign)
-            ver_key = ecdsa.VerifyingKey.from_string(self.public_key.public_uncompressed_byte[1:],
-                                                     curve=ecdsa.SECP256k1)
-            try:
-                if len(signature) > 64 and signature.startswith(b'\x30'):
-                    try:
-                        signature = convert_der_sig(signature[:-1], as_hex=False)
-                    except Exception:
-                        pass
-                ver_key.verify_digest(signature, transaction_to_sign)
-            except ecdsa.keys.BadSignatureError:
-                return False
-            except ecdsa.keys.BadDigestError as e:
-                _logger.info("Bad Digest %s (error %s)" % (binascii.hexlify(signature), e))
-                return False
-            return True
+        return _verify_signature_values((self.r, self.s, self.tx_hash, self.x, self.y))
+
+
+def _bip38_decrypt_values(values):
+    """
+    Decrypt BIP0038 encrypted private key and verify address hash. Worker function for
+    :func:`Key.bip38_decrypt_many`, so all arguments and return values must be picklable.
+
+    :param values: Tuple with encrypted private key, passphrase, network name and witness type
+    :type values: tuple
+
+    :return tuple: Private key bytes and compressed boolean
+    """
+    encrypted_privkey, passphrase, network, witness_type = values
+    if witness_type:
+        return HDKey._bip38_decrypt(encrypted_privkey, passphrase, network, witness_type)
+    return Key._bip38_decrypt(encrypted_privkey, passphrase, network)
+
+
+def _verify_signature_values(values):
+    """
+    Verify signature from plain r, s, tx_hash and public point values. Used by Signature.verify and as worker
+    function for batch verification, so all arguments must be picklable.
+
+    :param values: Tuple with r, s, tx_hash as hexstring, x and y of public key point
+    :type values: tuple
+
+    :return bool:
+    """
+    r, s, tx_hash, x, y = values
+    if USE_FASTECDSA:
+        return _ecdsa.verify(
+            str(r),
+            str(s),
+            tx_hash,
+            str(x),
+            str(y),
+            str(secp256k1_p),
+            str(secp256k1_a),
+            str(secp256k1_b),
+            str(secp256k1_n),
+            str(secp256k1_Gx),
+            str(secp256k1_Gy)
+        )
+    else:
+        transaction_to_sign = to_bytes(tx_hash)
+        signature = to_bytes('%064x%064x' % (r, s))
+        if len(transaction_to_sign) != 32:
+            transaction_to_sign = double_sha256(transaction_to_sign)
+        ver_key = ecdsa.VerifyingKey.from_string(to_bytes('%064x%064x' % (x, y)), curve=ecdsa.SECP256k1)
+        try:
+            ver_key.verify_digest(signature, transaction_to_sign)
+        except ecdsa.keys.BadSignatureError:
+            return False
+        except ecdsa.keys.BadDigestError as e:
+            _logger.info("Bad Digest %s (error %s)" % (binascii.hexlify(signature), e))
+            return False
+        return True
 
 
 def sign(tx_hash, private, use_rfc6979=True, k=None):
@@ -2287,6 +2628,41 @@ def verify(tx_hash, signature, public_key=None):
     return signature.verify(tx_hash, public_key)
 
 
+def verify_batch(items, max_workers=None):
+    """
+    Verify a list of signatures at once. Each item is a tuple with a tx_hash, signature and public key, like the
+    arguments of the :func:`verify` method.
+
+    Large batches are verified in parallel by a pool of worker processes, see the max_workers and
+    parallel_min_batch_size settings in config.ini. Results are returned in the same order as the items.
+
+    >>> k = 'b2da575054fb5daba0efde613b0b8e37159b8110e4be50f73cbe6479f6038f5b'
+    >>> pub_key = HDKey(k).public()
+    >>> tx_hash = '0d12fdc4aac9eaaab9730999e0ce84c3bd5bb38dfd1f4c90c613ee177987429c'
+    >>> sig = '48e994862e2cdb372149bad9d9894cf3a5562b4565035943efe0acc502769d351cb88752b5fe8d70d85f3541046df617f8459e991d06a7c0db13b5d4531cd6d4'
+    >>> verify_batch([(tx_hash, sig, pub_key), (tx_hash, sig, HDKey().public())])
+    [True, False]
+
+    :param items: List of (tx_hash, signature, public_key) tuples
+    :type items: list
+    :param max_workers: Number of worker processes. Leave empty to use the max_workers setting from config, 1 disables the process pool
+    :type max_workers: int
+
+    :return list of bool:
+    """
+    values = []
+    for tx_hash, signature, public_key in items:
+        if not isinstance(signature, Signature):
+            signature = Signature.from_str(signature)
+        if not isinstance(public_key, (Key, HDKey)):
+            public_key = Key(public_key)
+        x, y = public_key.public_point()
+        if USE_FASTECDSA and not fastecdsa_secp256k1.is_point_on_curve((x, y)):
+            raise BKeyError('Invalid public key, point is not on secp256k1 curve')
+        values.append((signature.r, signature.s, to_hexstring(tx_hash), x, y))
+    return parallel_map(_verify_signature_values, values, max_workers)
+
+
 def ec_point(m):
     """
     Method for elliptic curve multiplication on the secp256k1 curve. Multiply Generator point G with m
@@ -2305,6 +2681,108 @@ def ec_point(m):
         return point
 
 
+def _ec_jacobian_double(point):
+    """
+    Double point in Jacobian coordinates (X, Y, Z) on the secp256k1 curve
+    """
+    x1, y1, z1 = point
+    if not z1 or not y1:
+        return 0, 0, 0
+    a = x1 * x1 % secp256k1_p
+    b = y1 * y1 % secp256k1_p
+    c = b * b % secp256k1_p
+    d = 2 * ((x1 + b) ** 2 - a - c) % secp256k1_p
+    e = 3 * a % secp256k1_p
+    x3 = (e * e - 2 * d) % secp256k1_p
+    return x3, (e * (d - x3) - 8 * c) % secp256k1_p, 2 * y1 * z1 % secp256k1_p
+
+
+def _ec_jacobian_add_affine(point, x2, y2):
+    """
+    Add affine point (x2, y2) to point in Jacobian coordinates (X, Y, Z) on the secp256k1 curve
+    """
+    x1, y1, z1 = point
+    if not z1:
+        return x2, y2, 1
+    z1z1 = z1 * z1 % secp256k1_p
+    h = (x2 * z1z1 - x1) % secp256k1_p
+    r = 2 * (y2 * z1 * z1z1 - y1) % secp256k1_p
+    if not h:
+        if not r:
+            return _ec_jacobian_double(point)
+        return 0, 0, 0
+    hh = h * h % secp256k1_p
+    i = 4 * hh
+    j = h * i
+    v = x1 * i
+    x3 = (r * r - j - 2 * v) % secp256k1_p
+    y3 = (r * (v - x3) - 2 * y1 * j) % secp256k1_p
+    z3 = ((z1 + h) ** 2 - z1z1 - hh) % secp256k1_p
+    return x3, y3, z3
+
+
+def _ec_points_to_affine(points):
+    """
+    Convert list of points in Jacobian coordinates to affine (x, y) coordinates. Uses one modular inversion for the
+    whole list.
+    """
+    products = []
+    acc = 1
+    for _, _, z in points:
+        if not z:
+            raise BKeyError("Point at infinity, cannot convert to affine coordinates")
+        products.append(acc)
+        acc = acc * z % secp256k1_p
+    inv = pow(acc, secp256k1_p - 2, secp256k1_p)
+    affine = [None] * len(points)
+    for n in range(len(points) - 1, -1, -1):
+        x, y, z = points[n]
+        z_inv = inv * products[n] % secp256k1_p
+        inv = inv * z % secp256k1_p
+        z_inv2 = z_inv * z_inv % secp256k1_p
+        affine[n] = (x * z_inv2 % secp256k1_p, y * z_inv2 * z_inv % secp256k1_p)
+    return affine
+
+
+_generator_table = []
+_generator_table_lock = threading.Lock()
+
+
+def _ec_generator_table():
+    """
+    Table with multiples of generator point G: table[w][d] is d * 2^(8*w) * G in affine coordinates. Created on
+    first use, so a scalar multiplication only needs 32 point additions. The table is created under a lock and only
+    published when complete, so other threads never use a partially filled table.
+    """
+    if len(_generator_table) < 32:
+        with _generator_table_lock:
+            if len(_generator_table) < 32:
+                table = []
+                base = (secp256k1_Gx, secp256k1_Gy)
+                for _ in range(32):
+                    row = [(0, 0, 0)]
+                    for _ in range(255):
+                        row.append(_ec_jacobian_add_affine(row[-1], *base))
+                    row = [None] + _ec_points_to_affine(row[1:])
+                    table.append(row)
+                    base = _ec_points_to_affine([_ec_jacobian_add_affine(row[128] + (1,), *row[128])])[0]
+                _generator_table[:] = table
+    return _generator_table
+
+
+def _ec_point_multiply_generator(m, point=(0, 0, 0)):
+    """
+    Multiply generator point G with m using precomputed table and add to point. Returns point in Jacobian
+    coordinates, use _ec_points_to_affine to convert.
+    """
+    table = _ec_generator_table()
+    for w in range(32):
+        d = (m >> (8 * w)) & 0xff
+        if d:
+            point = _ec_jacobian_add_affine(point, *table[w][d])
+    return point
+
+
 def mod_sqrt(a):
     """
     Compute the square root of 'a' using the secp256k1 'bitcoin' curve
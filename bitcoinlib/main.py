@@ -20,12 +20,16 @@
 
 import functools
 import logging
+import multiprocessing
 from logging.handlers import RotatingFileHandler
 
 from bitcoinlib.config.config import (BCL_CONFIG_FILE, BCL_DATABASE_DIR, BCL_DATA_DIR, BCL_LOG_FILE,
                                       BITCOINLIB_VERSION,
                                       DEFAULT_DATABASE, ENABLE_BITCOINLIB_LOGGING,
-                                      LOGLEVEL)
+                                      LOGLEVEL, MAX_WORKERS, PARALLEL_MIN_BATCH_SIZE, PY3)
+if PY3:
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
 
 # Initialize logging
 logger = logging.getLogger()
@@ -105,6 +109,82 @@ def get_encoding_from_witness(witness_type=None):
         raise ValueError("Unknown witness type %s" % witness_type)
 
 
+def parallel_map(func, items, max_workers=None, min_batch_size=None):
+    """
+    Apply function to all items and return a list with the results in the same order.
+
+    Large batches are divided over a pool of worker processes, small batches are handled in the current process
+    because starting a process pool is more expensive than the work itself. The function and items must be
+    picklable, so use a module level function and pass plain values such as bytes, strings and integers.
+    On Python 2 all items are handled in the current process.
+
+    >>> parallel_map(abs, [-1, 2, -3])
+    [1, 2, 3]
+
+    :param func: Module level function to call for each item
+    :type func: function
+    :param items: List of arguments, one per call
+    :type items: list
+    :param max_workers: Number of worker processes. Default is max_workers setting from config, where 0 means the number of CPU's. Use 1 to disable the process pool
+    :type max_workers: int
+    :param min_batch_size: Minimum number of items to use a process pool. Default is parallel_min_batch_size setting from config
+    :type min_batch_size: int
+
+    :return list:
+    """
+
+    return list(parallel_imap(func, items, max_workers, min_batch_size))
+
+
+def parallel_imap(func, items, max_workers=None, min_batch_size=None):
+    """
+    Same as :func:`parallel_map` but returns a generator, which yields the results in the same order as the items
+    as soon as they are available.
+
+    >>> list(parallel_imap(abs, [-1, 2, -3]))
+    [1, 2, 3]
+
+    :param func: Module level function to call for each item
+    :type func: function
+    :param items: List of arguments, one per call
+    :type items: list
+    :param max_workers: Number of worker processes. Default is max_workers setting from config, where 0 means the number of CPU's. Use 1 to disable the process pool
+    :type max_workers: int
+    :param min_batch_size: Minimum number of items to use a process pool. Default is parallel_min_batch_size setting from config
+    :type min_batch_size: int
+
+    :return generator:
+    """
+
+    items = list(items)
+    if max_workers is None:
+        max_workers = MAX_WORKERS
+    if not max_workers:
+        try:
+            max_workers = multiprocessing.cpu_count()
+        except NotImplementedError:
+            max_workers = 1
+    if min_batch_size is None:
+        min_batch_size = PARALLEL_MIN_BATCH_SIZE
+    if not PY3 or max_workers <= 1 or len(items) < max(min_batch_size, 2):
+        for item in items:
+            yield func(item)
+        return
+
+    max_workers = min(max_workers, len(items))
+    chunksize = max(1, len(items) // (max_workers * 4))
+    n_done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for result in executor.map(func, items, chunksize=chunksize):
+                yield result
+                n_done += 1
+    except (OSError, NotImplementedError, BrokenProcessPool) as e:
+        logger.warning("Could not use process pool, fall back to single process. Error: %s" % e)
+        for item in items[n_done:]:
+            yield func(item)
+
+
 def deprecated(func):
     """
     This is a decorator which can be used to mark functions as deprecated. It will result in a warning being emitted
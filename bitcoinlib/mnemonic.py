@@ -21,10 +21,59 @@
 import hashlib
 import os
 import sys
+import threading
 
 from bitcoinlib.config.config import BCL_INSTALL_DIR, DEFAULT_LANGUAGE, TYPE_TEXT
 from bitcoinlib.config.secp256k1 import secp256k1_n
 from bitcoinlib.encoding import change_base, normalize_string, to_bytes
+from bitcoinlib.main import parallel_imap
+
+_WORDLISTS = {}
+_WORDLIST_INDEXES = {}
+_WORD_LANGUAGES = {}
+_wordlists_lock = threading.Lock()
+
+
+def _load_wordlist(language):
+    """
+    Read wordlist for given language from the wordlist directory. Wordlists are read once and then kept in memory
+    together with a word to index dictionary.
+
+    :param language: Language of wordlist, i.e. english or spanish
+    :type language: str
+
+    :return dict: Dictionary with words as keys and index number as value
+    """
+    if language not in _WORDLIST_INDEXES:
+        with _wordlists_lock:
+            if language not in _WORDLIST_INDEXES:
+                # TODO: Path(BCL_INSTALL_DIR, 'wordlist', '%s.txt' % language).open() as f:
+                with open(os.path.join(str(BCL_INSTALL_DIR), 'wordlist', '%s.txt' % language)) as f:
+                    wordlist = [w.strip() for w in f.readlines()]
+                _WORDLISTS[language] = wordlist
+                _WORDLIST_INDEXES[language] = dict((w, i) for i, w in enumerate(wordlist))
+    return _WORDLIST_INDEXES[language]
+
+
+def _word_languages():
+    """
+    Get inverted index of all available wordlists, with words as keys and a list of languages as values. Languages
+    are sorted alphabetically.
+
+    :return dict:
+    """
+    if not _WORD_LANGUAGES:
+        # TODO: Use for fn in Path(BCL_INSTALL_DIR, 'wordlist').iterdir():
+        languages = sorted([fn.split('.')[0] for fn in os.listdir(os.path.join(str(BCL_INSTALL_DIR), 'wordlist'))
+                            if fn.endswith(".txt")])
+        word_languages = {}
+        for language in languages:
+            for word in _load_wordlist(language):
+                word_languages.setdefault(word, []).append(language)
+        with _wordlists_lock:
+            if not _WORD_LANGUAGES:
+                _WORD_LANGUAGES.update(word_languages)
+    return _WORD_LANGUAGES
 
 
 class Mnemonic(object):
@@ -44,12 +93,9 @@ class Mnemonic(object):
         :type language: str
 
         """
-        self._wordlist = []
-        with open(os.path.join(str(BCL_INSTALL_DIR), 'wordlist', '%s.txt' % language)) as f:
-            self._wordlist = [w.strip() for w in f.readlines()]
-        # FIXME: Use code below instead of os.path, but doesn't work with pathlib2 (Python 2)
-        # with Path(BCL_INSTALL_DIR, 'wordlist', '%s.txt' % language).open() as f:
-        #     self._wordlist = [w.strip() for w in f.readlines()]
+        self._word_index = _load_wordlist(language)
+        self._language = language
+        self._wordlist = list(_WORDLISTS[language])
 
     @staticmethod
     def checksum(data):
@@ -96,6 +142,33 @@ class Mnemonic(object):
         return hashlib.pbkdf2_hmac(hash_name='sha512', password=mnemonic, salt=b'mnemonic' + password,
                                    iterations=2048)
 
+    def to_seeds(self, words_list, password='', validate=True, max_workers=None):
+        """
+        Create PBKDF2 seeds for a list of Mnemonic passphrases. Same as calling :func:`to_seed` for every passphrase,
+        but large batches are divided over a pool of worker processes, see the max_workers and
+        parallel_min_batch_size settings in config.ini.
+
+        Returns a generator which yields the seeds in the same order as the passphrases as soon as they are available.
+
+        >>> from bitcoinlib.encoding import to_hexstring
+        >>> seeds = Mnemonic().to_seeds(['chunk gun celery million wood kite tackle twenty story episode raccoon dutch'])
+        >>> to_hexstring(next(seeds))
+        '6969ed4666db67fc74fae7869e2acf3c766b5ef95f5e31eb2fcebd93d76069c6de971225f700042b0b513f0ad6c8562277fc4b5ee1344b720f1686dc2dccc220'
+
+        :param words_list: List of Mnemonic passphrases as string with space separated words
+        :type words_list: list of str
+        :param password: A password to protect keys, used for all passphrases. Leave empty to disable
+        :type password: str
+        :param validate: Validate checksum for given word phrases, default is True
+        :type validate: bool
+        :param max_workers: Number of worker processes. Leave empty to use the max_workers setting from config, 1 disables the process pool
+        :type max_workers: int
+
+        :return generator: PBKDF2 seeds as bytes
+        """
+        items = [(words, password, validate, self._language) for words in words_list]
+        return parallel_imap(_mnemonic_to_seed, items, max_workers)
+
     def word(self, index):
         """
         Get word from wordlist
@@ -182,16 +255,20 @@ class Mnemonic(object):
             words = words.split(' ')
         wi = []
         for word in words:
-            wi.append(self._wordlist.index(word))
-        ent = change_base(wi, 2048, 256, output_even=False)
+            if word not in self._word_index:
+                raise ValueError("Word %s not found in wordlist" % word)
+            wi.append(self._word_index[word])
         if includes_checksum:
-            binresult = change_base(ent, 256, 2, len(ent) * 4)
-            ent = change_base(binresult[:-len(binresult) // 33], 2, 256)
+            # Use fixed lengths, so leading zero bits in the entropy are not lost
+            binresult = change_base(wi, 2048, 2, len(wi) * 11)
+            ent = change_base(binresult[:-len(binresult) // 33], 2, 256, len(binresult) // 33 * 4)
 
             # Check checksum
             checksum = binresult[-len(binresult) // 33:]
             if checksum != self.checksum(ent):
                 raise ValueError("Invalid checksum %s for entropy %s" % (checksum, ent))
+        else:
+            ent = change_base(wi, 2048, 256, output_even=False)
 
         return ent
 
@@ -212,24 +289,17 @@ class Mnemonic(object):
         if isinstance(words, TYPE_TEXT):
             words = words.split(' ')
 
+        word_languages = _word_languages()
         wlcount = {}
-        # TODO: Use for fn in Path(BCL_INSTALL_DIR, 'wordlist').iterdir():
-        #     if fn.suffix == ".txt":
-        for fn in os.listdir(os.path.join(str(BCL_INSTALL_DIR), 'wordlist')):
-            if fn.endswith(".txt"):
-                with open(os.path.join(str(BCL_INSTALL_DIR), 'wordlist', fn)) as f:
-                    wordlist = [w.strip() for w in f.readlines()]
-                    language = fn.split('.')[0]
-                    wlcount[language] = 0
-                    for word in words:
-                        if sys.version < '3':
-                            word = word.encode('utf-8')
-                        if word in wordlist:
-                            wlcount[language] += 1
-        detlang = max(wlcount.keys(), key=(lambda key: wlcount[key]))
-        if not wlcount[detlang]:
+        for word in words:
+            if sys.version < '3':
+                word = word.encode('utf-8')
+            for language in word_languages.get(word, []):
+                wlcount[language] = wlcount.get(language, 0) + 1
+        if not wlcount:
             raise Warning("Could not detect language of Mnemonic sentence %s" % words)
-        return detlang
+        # If languages have the same word count the first language in alphabetical order is returned
+        return max(sorted(wlcount.keys()), key=(lambda key: wlcount[key]))
 
     def sanitize_mnemonic(self, words):
         """
@@ -246,12 +316,23 @@ class Mnemonic(object):
         language = self.detect_language(words)
         if isinstance(words, TYPE_TEXT):
             words = words.split(' ')
-        # TODO: Path(BCL_INSTALL_DIR, 'wordlist', '%s.txt' % language).open() as f:
-        with open(os.path.join(str(BCL_INSTALL_DIR), 'wordlist', '%s.txt' % language)) as f:
-            wordlist = [w.strip() for w in f.readlines()]
-            for word in words:
-                if sys.version < '3':
-                    word = word.encode('utf-8')
-                if word not in wordlist:
-                    raise Warning("Unrecognised word %s in mnemonic sentence" % word.encode('utf8'))
+        word_index = _load_wordlist(language)
+        for word in words:
+            if sys.version < '3':
+                word = word.encode('utf-8')
+            if word not in word_index:
+                raise Warning("Unrecognised word %s in mnemonic sentence" % word.encode('utf8'))
         return ' '.join(words)
+
+
+def _mnemonic_to_seed(args):
+    """
+    Create seed from (words, password, validate, language) tuple. Worker function for :func:`Mnemonic.to_seeds`
+
+    :param args: Tuple with arguments for :func:`Mnemonic.to_seed` and the language of the wordlist
+    :type args: tuple
+
+    :return bytes: PBKDF2 seed
+    """
+    words, password, validate, language = args
+    return Mnemonic(language).to_seed(words, password, validate)
@@ -22,10 +22,11 @@ import binascii
 import json
 import logging
 import math
+from copy import deepcopy
 from pathlib import Path
 
 from bitcoinlib.config.config import BCL_DATA_DIR, DEFAULT_NETWORK
-from bitcoinlib.encoding import change_base, to_bytes, to_hexstring
+from bitcoinlib.encoding import base58_decode, to_bytes, to_hexstring
 from bitcoinlib.main import script_type_default
 
 _logger = logging.getLogger(__name__)
@@ -64,6 +65,43 @@ def _read_network_definitions():
 NETWORK_DEFINITIONS = _read_network_definitions()
 
 
+def _network_value_index():
+    """
+    Create index with network names per field and value, network names are sorted by priority. Fields with values
+    which cannot be used as dictionary key such as the prefixes_wif lists are not included.
+
+    :return dict: Dictionary with field names as keys and a dictionary with values and network lists as values
+    """
+    index = {}
+    for nw in sorted(NETWORK_DEFINITIONS, key=lambda x: NETWORK_DEFINITIONS[x]['priority'], reverse=True):
+        for field, value in NETWORK_DEFINITIONS[nw].items():
+            try:
+                hash(value)
+            except TypeError:
+                continue
+            index.setdefault(field, {}).setdefault(value, []).append(nw)
+    return index
+
+
+def _wif_prefix_index():
+    """
+    Create index with HD key version bytes in hexadecimal as keys and a list of (network, prefix definition) tuples
+    as values.
+
+    :return dict:
+    """
+    index = {}
+    for nw in NETWORK_DEFINITIONS:
+        for pf in NETWORK_DEFINITIONS[nw]['prefixes_wif']:
+            index.setdefault(pf[0], []).append((nw, pf))
+    return index
+
+
+_NETWORK_VALUE_INDEX = _network_value_index()
+_WIF_PREFIX_INDEX = _wif_prefix_index()
+_NETWORK_REGISTRY = {}
+
+
 def _format_value(field, value):
     if field[:6] == 'prefix':
         return binascii.unhexlify(value)
@@ -113,6 +151,19 @@ def network_by_value(field, value):
 
     :return list: Of network name strings
     """
+    values = _NETWORK_VALUE_INDEX.get(field)
+    if values is not None:
+        try:
+            nws = values.get(value)
+        except TypeError:
+            nws = None
+        if not nws:
+            try:
+                nws = values.get(to_hexstring(value).upper())
+            except TypeError:
+                pass
+        return list(nws) if nws else []
+
     nws = [(nv, NETWORK_DEFINITIONS[nv]['priority'])
            for nv in NETWORK_DEFINITIONS if NETWORK_DEFINITIONS[nv][field] == value]
     if not nws:
@@ -180,7 +231,7 @@ def wif_prefix_search(wif, witness_type=None, multisig=None, network=None):
     key_hex = ''
     if len(wif) > 8:
         try:
-            key_hex = change_base(wif, 58, 16)
+            key_hex = to_hexstring(base58_decode(wif))
         except Exception:
             pass
     else:
@@ -189,22 +240,20 @@ def wif_prefix_search(wif, witness_type=None, multisig=None, network=None):
         key_hex = to_hexstring(wif)
     prefix = key_hex[:8].upper()
     matches = []
-    for nw in NETWORK_DEFINITIONS:
+    for nw, pf in _WIF_PREFIX_INDEX.get(prefix, []):
         if network is not None and nw != network:
             continue
-        data = NETWORK_DEFINITIONS[nw]
-        for pf in data['prefixes_wif']:
-            if pf[0] == prefix and (multisig is None or pf[3] is None or pf[3] == multisig) and \
-                    (witness_type is None or pf[4] is None or pf[4] == witness_type):
-                matches.append({
-                    'prefix': prefix,
-                    'is_private': True if pf[2] == 'private' else False,
-                    'prefix_str': pf[1],
-                    'network': nw,
-                    'witness_type': pf[4],
-                    'multisig': pf[3],
-                    'script_type': pf[5]
-                })
+        if (multisig is None or pf[3] is None or pf[3] == multisig) and \
+                (witness_type is None or pf[4] is None or pf[4] == witness_type):
+            matches.append({
+                'prefix': prefix,
+                'is_private': True if pf[2] == 'private' else False,
+                'prefix_str': pf[1],
+                'network': nw,
+                'witness_type': pf[4],
+                'multisig': pf[3],
+                'script_type': pf[5]
+            })
     return matches
 
 
@@ -215,11 +264,37 @@ class Network(object):
     Prefixes for WIF, P2SH keys, HD public and private keys, addresses. A currency symbol and type, the
     denominator (such as satoshi) and a BIP0044 cointype.
 
+    Network objects are created once per network name and stored in a registry, so Network('bitcoin') always returns
+    the same object. Network objects are immutable.
+
+    >>> Network('bitcoin') is Network('bitcoin')
+    True
+
     """
 
+    def __new__(cls, network_name=DEFAULT_NETWORK):
+        if isinstance(network_name, Network):
+            return network_name
+        network = _NETWORK_REGISTRY.get(network_name)
+        if network is None:
+            if network_name not in NETWORK_DEFINITIONS:
+                raise NetworkError("Network %s not found in network definitions" % network_name)
+            network = super(Network, cls).__new__(cls)
+            network._load_definition(network_name)
+            network = _NETWORK_REGISTRY.setdefault(network_name, network)
+        return network
+
     def __init__(self, network_name=DEFAULT_NETWORK):
-        if network_name not in NETWORK_DEFINITIONS:
-            raise NetworkError("Network %s not found in network definitions" % network_name)
+        # Attributes are set once in __new__ when the network object is created and registered
+        pass
+
+    def _load_definition(self, network_name):
+        """
+        Set network attributes from network definitions and precompute derived values. Called once per network.
+
+        :param network_name: Name of network
+        :type network_name: str
+        """
         self.name = network_name
 
         self.currency_name = NETWORK_DEFINITIONS[network_name]['currency_name']
@@ -240,13 +315,45 @@ class Network(object):
         self.priority = NETWORK_DEFINITIONS[network_name]['priority']
         self.prefixes_wif = NETWORK_DEFINITIONS[network_name]['prefixes_wif']
 
+        # WIF prefixes in bytes by public or private and script type, first definition is used
+        self._wif_prefixes = {}
+        for pf in self.prefixes_wif:
+            self._wif_prefixes.setdefault((pf[2], pf[5]), to_bytes(pf[0]))
+        self._frozen = True
+
         # This could be more shorter and more flexible with this code, but this gives 'Unresolved attributes' warnings
         # for f in list(NETWORK_DEFINITIONS[network_name].keys()):
         #     exec("self.%s = NETWORK_DEFINITIONS[network_name]['%s']" % (f, f))
 
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise NetworkError("Network objects are immutable, cannot set attribute %s" % name)
+        super(Network, self).__setattr__(name, value)
+
+    def __reduce__(self):
+        return Network, (self.name,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def __repr__(self):
         return "<Network: %s>" % self.name
 
+    def as_dict(self):
+        """
+        Get network attributes as dictionary. Returns a copy, changing the dictionary does not change the shared
+        Network object.
+
+        >>> Network('bitcoin').as_dict()['currency_code']
+        'BTC'
+
+        :return dict:
+        """
+        return deepcopy(dict([(k, v) for k, v in self.__dict__.items() if not k.startswith('_')]))
+
     def __eq__(self, other):
         return self.name == other.name
 
@@ -299,8 +406,8 @@ class Network(object):
             ip = 'private'
         else:
             ip = 'public'
-        found_prefixes = [to_bytes(pf[0]) for pf in self.prefixes_wif if pf[2] == ip and script_type == pf[5]]
-        if found_prefixes:
-            return found_prefixes[0]
+        found_prefix = self._wif_prefixes.get((ip, script_type))
+        if found_prefix:
+            return found_prefix
         else:
             raise NetworkError("WIF Prefix for script type %s not found" % script_type)
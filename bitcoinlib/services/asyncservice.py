@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#
+#    BitcoinLib - Python Cryptocurrency Library
+#    SERVICES - Service connector for asyncio, Python 3 only
+#    © 2020 - 1200 Web Development <http://1200wd.com/>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bitcoinlib.config.config import MAX_TRANSACTIONS
+from bitcoinlib.services.services import Service
+
+_logger = logging.getLogger(__name__)
+
+
+class AsyncService(Service):
+    """
+    Service class for use with asyncio. Queries service providers concurrently, so when more providers are used
+    you do not have to wait for the sum of all provider response times. Only available on Python 3.
+
+    The getbalance, gettxcounts, getutxos, gettransactions, estimatefee and getblock methods are coroutines and take
+    the same arguments as the :class:`Service` methods. Other methods are inherited unchanged and run in the calling
+    thread.
+
+    Requests are send to max_providers providers at once. If a provider fails the next provider in the list is
+    tried. As soon as enough results are received the method returns, requests which are still running are not
+    interrupted but finish in the background and their results are ignored. Use the timeout argument to limit the
+    duration of provider requests. The results, errors and resultcount attributes are updated like in the Service
+    class.
+
+    Calls to the same AsyncService object are handled one at a time to keep the results administration correct,
+    create multiple AsyncService objects to run calls simultaneously. Use close() or an async with statement to stop
+    the worker threads when the object is not needed anymore.
+
+    >>> import asyncio
+    >>> async def fee():
+    ...     async with AsyncService(network='bitcoinlib_test') as srv:
+    ...         return await srv.estimatefee()
+    >>> asyncio.new_event_loop().run_until_complete(fee())
+    33333
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._local = threading.local()
+        self._call_lock = threading.Lock()
+        super(AsyncService, self).__init__(*args, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=max(self.max_providers, len(self.providers)))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await asyncio.get_event_loop().run_in_executor(None, self.close)
+
+    def close(self):
+        """
+        Stop the worker threads used for provider requests. Waits until running requests are finished.
+        """
+        self._executor.shutdown(wait=True)
+
+    def _provider_execute(self, method, *arguments):
+        # Only the worker thread of a coroutine method has an event loop set, it waits for the concurrent requests on
+        # that loop. Calls from any other thread, including the event loop thread itself, are handled synchronously.
+        loop = getattr(self._local, 'loop', None)
+        if loop is None:
+            return super(AsyncService, self)._provider_execute(method, *arguments)
+        return asyncio.run_coroutine_threadsafe(self._provider_execute_async(method, *arguments), loop).result()
+
+    async def _provider_execute_async(self, method, *arguments):
+        self._reset_results()
+        loop = asyncio.get_event_loop()
+        provider_iter = iter(self._provider_list())
+        running = {}
+
+        def start_next():
+            for sp in provider_iter:
+                try:
+                    pc_instance = self._provider_client(sp)
+                except Exception as e:
+                    self._provider_error(sp, method, arguments, e)
+                    continue
+                if not hasattr(pc_instance, method):
+                    continue
+                future = loop.run_in_executor(self._executor, functools.partial(getattr(pc_instance, method),
+                                                                                *arguments))
+                running[future] = sp
+                return True
+            return False
+
+        while len(running) < self.max_providers and start_next():
+            pass
+        while running and self.resultcount < self.max_providers:
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                sp = running.pop(future)
+                try:
+                    res = future.result()
+                except Exception as e:
+                    self._provider_error(sp, method, arguments, e)
+                    start_next()
+                    continue
+                if res is False:  # pragma: no cover
+                    self.errors.update(
+                        {sp: 'Received empty response'}
+                    )
+                    _logger.info("Empty response from %s when calling %s" % (sp, method))
+                    start_next()
+                    continue
+                if self.resultcount < self.max_providers:
+                    self.results.update(
+                        {sp: res}
+                    )
+                    self.resultcount += 1
+        # Requests which did not start yet are cancelled, running requests can not be interrupted
+        for future in running:
+            future.cancel()
+
+        if not self.resultcount:
+            _logger.warning("No successfull response from any serviceprovider: %s" % list(self.providers.keys()))
+            return False
+        return list(self.results.values())[0]
+
+    def _run_locked(self, loop, func, args, kwargs):
+        with self._call_lock:
+            self._local.loop = loop
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self._local.loop = None
+
+    async def _run(self, func, *args, **kwargs):
+        # Run Service method in a thread, provider requests are scheduled concurrently on the event loop
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._run_locked, loop, func, args, kwargs)
+
+    async def getbalance(self, addresslist, addresses_per_request=5):
+        """
+        Get total balance for address or list of addresses. See :func:`Service.getbalance`
+
+        :return int:
+        """
+        return await self._run(Service.getbalance, addresslist, addresses_per_request)
+
+    async def gettxcounts(self, addresslist, addresses_per_request=20):
+        """
+        Get number of transactions for a list of addresses. See :func:`Service.gettxcounts`
+
+        :return dict:
+        """
+        return await self._run(Service.gettxcounts, addresslist, addresses_per_request)
+
+    async def getutxos(self, address, after_txid='', limit=MAX_TRANSACTIONS):
+        """
+        Get list of unspent outputs (UTXO's) for specified address. See :func:`Service.getutxos`
+
+        :return list:
+        """
+        return await self._run(Service.getutxos, address, after_txid, limit)
+
+    async def gettransactions(self, address, after_txid='', limit=MAX_TRANSACTIONS):
+        """
+        Get all transactions for specified address. See :func:`Service.gettransactions`
+
+        :return list of Transaction:
+        """
+        return await self._run(Service.gettransactions, address, after_txid, limit)
+
+    async def estimatefee(self, blocks=3):
+        """
+        Estimate fee per kilobyte for a transaction. See :func:`Service.estimatefee`
+
+        :return int:
+        """
+        return await self._run(Service.estimatefee, blocks)
+
+    async def getblock(self, blockid, parse_transactions=True, page=1, limit=None):
+        """
+        Get block with specified block height or block hash. See :func:`Service.getblock`
+
+        :return Block:
+        """
+        return await self._run(Service.getblock, blockid, parse_transactions, page, limit)
@@ -18,9 +18,15 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from bitcoinlib.config.config import BITCOINLIB_VERSION, TIMEOUT_REQUESTS
+from bitcoinlib.config.config import (BITCOINLIB_VERSION, PY3, SERVICE_KEEP_ALIVE, SERVICE_MAX_RETRIES,
+                                      SERVICE_POOL_SIZE, SERVICE_RATE_LIMIT, SERVICE_RETRY_BACKOFF, TIMEOUT_REQUESTS)
 
 try:
     from urllib.parse import urlencode
@@ -33,6 +39,104 @@ from bitcoinlib.keys import Address
 
 _logger = logging.getLogger(__name__)
 
+_sessions = {}
+_sessions_lock = threading.Lock()
+_rate_limiters = {}
+# Use a clock which cannot go backwards if available
+_clock = time.monotonic if PY3 else time.time
+
+
+def provider_session(provider):
+    """
+    Get HTTP session for this service provider. Sessions are shared by all clients of a provider in this process, so
+    open connections are reused instead of creating a new connection and TLS handshake for each request.
+
+    The connection pool size, retry policy and keep-alive can be configured with the service_pool_size,
+    service_max_retries, service_retry_backoff and service_keep_alive settings in config.ini. Only get requests which
+    return a server error are retried. Connection errors and timeouts are not retried, the :class:`Service` class
+    continues with the next provider instead. Failed post requests such as pushing a transaction are not repeated.
+
+    :param provider: Name of service provider
+    :type provider: str
+
+    :return requests.Session:
+    """
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            retries = Retry(total=SERVICE_MAX_RETRIES, connect=0, read=0, status=SERVICE_MAX_RETRIES,
+                            backoff_factor=SERVICE_RETRY_BACKOFF, status_forcelist=(500, 502, 503, 504),
+                            raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SERVICE_POOL_SIZE, max_retries=retries)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if not SERVICE_KEEP_ALIVE:
+                session.headers['Connection'] = 'close'
+            _sessions[provider] = session
+        return session
+
+
+def close_provider_sessions():
+    """
+    Close all open service provider sessions and connections
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class RateLimiter(object):
+    """
+    Limit number of requests per second to a service provider. Thread safe, so requests from all threads of this
+    process are spread out evenly.
+    """
+
+    def __init__(self, requests_per_second=0):
+        """
+        :param requests_per_second: Maximum number of requests per second, use 0 for unlimited
+        :type requests_per_second: float
+        """
+        self.requests_per_second = requests_per_second
+        self._next_request = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Wait until next request is allowed
+        """
+        if not self.requests_per_second:
+            return
+        with self._lock:
+            now = _clock()
+            request_time = max(now, self._next_request)
+            self._next_request = request_time + 1.0 / self.requests_per_second
+        if request_time > now:
+            time.sleep(request_time - now)
+
+
+def provider_rate_limiter(provider, requests_per_second=None):
+    """
+    Get request rate limiter for this service provider. The default rate is set with the service_rate_limit setting in
+    config.ini.
+
+    :param provider: Name of service provider
+    :type provider: str
+    :param requests_per_second: Set new maximum number of requests per second for this provider
+    :type requests_per_second: float
+
+    :return RateLimiter:
+    """
+    with _sessions_lock:
+        limiter = _rate_limiters.get(provider)
+        if limiter is None:
+            limiter = RateLimiter(SERVICE_RATE_LIMIT)
+            _rate_limiters[provider] = limiter
+        if requests_per_second is not None:
+            limiter.requests_per_second = requests_per_second
+        return limiter
+
 
 class ClientError(Exception):
     def __init__(self, msg=''):
@@ -65,6 +169,15 @@ class BaseClient(object):
         except Exception:
             raise ClientError("This Network is not supported by %s Client" % provider)
 
+    @property
+    def session(self):
+        """
+        Shared HTTP session for this provider, see :func:`provider_session`
+
+        :return requests.Session:
+        """
+        return provider_session(self.provider)
+
     def request(self, url_path, variables=None, method='get', secure=True, post_data=''):
         url_vars = ''
         url = self.base_url + url_path
@@ -77,6 +190,7 @@ class BaseClient(object):
             "Referrer": "https://www.github.com/1200wd/bitcoinlib",
         }
         # ToDo: Check use 'headers = None' for some providers?
+        provider_rate_limiter(self.provider).wait()
         if method == 'get':
             if variables is None:
                 variables = {}
@@ -84,11 +198,11 @@ class BaseClient(object):
                 url_vars = '?' + urlencode(variables)
             url += url_vars
             _logger.info("Url get request %s" % url)
-            self.resp = requests.get(url, timeout=self.timeout, verify=secure, headers=headers)
+            self.resp = self.session.get(url, timeout=self.timeout, verify=secure, headers=headers)
         elif method == 'post':
             _logger.info("Url post request %s" % url)
-            self.resp = requests.post(url, json=dict(variables), data=post_data, timeout=self.timeout, verify=secure,
-                                      headers=headers)
+            self.resp = self.session.post(url, json=dict(variables), data=post_data, timeout=self.timeout,
+                                          verify=secure, headers=headers)
 
         resp_text = self.resp.text
         if len(resp_text) > 1000:
@@ -51,6 +51,10 @@ class BlockchainInfoClient(BaseClient):
             balance += res[address]['final_balance']
         return balance
 
+    def gettxcounts(self, addresslist):
+        res = self.compose_request('balance', variables={'active': '|'.join(addresslist)})
+        return dict([(address, res[address]['n_tx']) for address in res])
+
     def getutxos(self, address, after_txid='', limit=MAX_TRANSACTIONS):
         utxos = []
         variables = {'active': address, 'limit': 1000}
@@ -103,7 +107,6 @@ class BlockchainInfoClient(BaseClient):
             t.date = None
         t.rawtx = to_bytes(raw_tx)
         t.size = tx['size']
-        t.network_name = self.network
         t.locktime = tx['lock_time']
         t.version = struct.pack('>L', tx['ver'])
         t.input_total = input_total
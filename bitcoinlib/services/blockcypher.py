@@ -64,6 +64,14 @@ class BlockCypher(BaseClient):
             balance += float(rec['final_balance'])
         return int(balance * self.units)
 
+    def gettxcounts(self, addresslist):
+        addresslist = self._addresslist_convert(addresslist)
+        res = self.compose_request('addrs', ';'.join([a.address for a in addresslist]), 'balance')
+        if not isinstance(res, list):
+            res = [res]
+        addresses = dict([(a.address, a.address_orig) for a in addresslist])
+        return dict([(addresses.get(rec['address'], rec['address']), rec['final_n_tx']) for rec in res])
+
     def getutxos(self, address, after_txid='', limit=MAX_TRANSACTIONS):
         address = self._address_convert(address)
         res = self.compose_request('addrs', address.address, variables={'unspentOnly': 1, 'limit': 2000})
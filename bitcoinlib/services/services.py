@@ -30,7 +30,7 @@ from sqlalchemy import func
 from bitcoinlib import services
 from bitcoinlib.blocks import Block
 from bitcoinlib.config.config import (BLOCK_COUNT_CACHE_TIME, CACHE_STORE_RAW_TRANSACTIONS, DEFAULT_NETWORK,
-                                      MAX_TRANSACTIONS,
+                                      MAX_TRANSACTIONS, PY3,
                                       SERVICE_CACHING_ENABLED, TIMEOUT_REQUESTS,
                                       TYPE_TEXT)
 from bitcoinlib.db import DbInit
@@ -38,7 +38,8 @@ from bitcoinlib.db_cache import DbCacheAddress, DbCacheBlock, DbCacheTransaction
 from bitcoinlib.encoding import to_bytes, to_hexstring
 from bitcoinlib.main import BCL_DATA_DIR
 from bitcoinlib.networks import Network
-from bitcoinlib.transactions import Transaction, transaction_update_spents
+from bitcoinlib.services.baseclient import provider_rate_limiter
+from bitcoinlib.transactions import Transaction, transaction_spent_index, transaction_update_spents
 
 _logger = logging.getLogger(__name__)
 
@@ -138,6 +139,8 @@ class Service(object):
         self.cache = Cache(self.network, db_uri=cache_uri)
         self.results_cache_n = 0
         self.ignore_priority = ignore_priority
+        self._provider_clients = {}
+        self._spent_indexes = {}
         if self.min_providers > 1:
             self._blockcount = Service(network=network).blockcount()
         else:
@@ -149,26 +152,54 @@ class Service(object):
         self.complete = None
         self.resultcount = 0
 
-    def _provider_execute(self, method, *arguments):
-        self._reset_results()
+    def _provider_client(self, sp):
+        # Provider clients are created once and reused for all calls of this Service object
+        pc_instance = self._provider_clients.get(sp)
+        if pc_instance is None:
+            client = getattr(services, self.providers[sp]['provider'])
+            providerclient = getattr(client, self.providers[sp]['client_class'])
+            pc_instance = providerclient(
+                self.network, self.providers[sp]['url'], self.providers[sp]['denominator'],
+                self.providers[sp]['api_key'], self.providers[sp]['provider_coin_id'],
+                self.providers[sp]['network_overrides'], self.timeout, self._blockcount)
+            self._provider_clients[sp] = pc_instance
+            if self.providers[sp].get('rate_limit') is not None:
+                provider_rate_limiter(self.providers[sp]['provider'], self.providers[sp]['rate_limit'])
+        pc_instance.latest_block = self._blockcount
+        return pc_instance
+
+    def _provider_list(self):
+        # Providers sorted by priority, or in random order if priority is ignored
         provider_lst = [p[0] for p in sorted([(x, self.providers[x]['priority']) for x in self.providers],
                         key=lambda x: (x[1], random.random()), reverse=True)]
         if self.ignore_priority:
             random.shuffle(provider_lst)
+        return [sp for sp in provider_lst if
+                sp in ['bitcoind', 'litecoind', 'dashd', 'dogecoind', 'caching'] or self.providers[sp]['url'] or
+                self.network.name == 'bitcoinlib_test']
+
+    def _provider_error(self, sp, method, arguments, e):
+        if not isinstance(e, AttributeError):
+            try:
+                err = e.msg
+            except AttributeError:
+                err = e
+            self.errors.update(
+                {sp: err}
+            )
+            # -- Use this to debug specific Services errors --
+            # from pprint import pprint
+            # pprint(self.errors)
+        _logger.info("%s.%s(%s) Error %s" % (sp, method, arguments, e))
+
+    def _provider_execute(self, method, *arguments):
+        self._reset_results()
 
-        for sp in provider_lst:
+        for sp in self._provider_list():
             if self.resultcount >= self.max_providers:
                 break
             try:
-                if sp not in ['bitcoind', 'litecoind', 'dashd', 'dogecoind', 'caching'] and not self.providers[sp]['url'] and \
-                        self.network.name != 'bitcoinlib_test':
-                    continue
-                client = getattr(services, self.providers[sp]['provider'])
-                providerclient = getattr(client, self.providers[sp]['client_class'])
-                pc_instance = providerclient(
-                    self.network, self.providers[sp]['url'], self.providers[sp]['denominator'],
-                    self.providers[sp]['api_key'], self.providers[sp]['provider_coin_id'],
-                    self.providers[sp]['network_overrides'], self.timeout, self._blockcount)
+                pc_instance = self._provider_client(sp)
                 if not hasattr(pc_instance, method):
                     continue
                 providermethod = getattr(pc_instance, method)
@@ -184,18 +215,7 @@ class Service(object):
                 )
                 self.resultcount += 1
             except Exception as e:
-                if not isinstance(e, AttributeError):
-                    try:
-                        err = e.msg
-                    except AttributeError:
-                        err = e
-                    self.errors.update(
-                        {sp: err}
-                    )
-                    # -- Use this to debug specific Services errors --
-                    # from pprint import pprint
-                    # pprint(self.errors)
-                _logger.info("%s.%s(%s) Error %s" % (sp, method, arguments, e))
+                self._provider_error(sp, method, arguments, e)
 
             if self.resultcount >= self.max_providers:
                 break
@@ -237,6 +257,31 @@ class Service(object):
             addresslist = addresslist[addresses_per_request:]
         return tot_balance
 
+    def gettxcounts(self, addresslist, addresses_per_request=20):
+        """
+        Get number of transactions for a list of addresses, including unconfirmed transactions.
+
+        Only service providers which can handle multiple addresses in one request support this method, so it can be
+        used to quickly check which addresses are used before requesting their transactions. Returns False if none of
+        the available providers support this method.
+
+        :param addresslist: Address or list of addresses
+        :type addresslist: list, str
+        :param addresses_per_request: Maximum number of addresses per request. Default is 20
+        :type addresses_per_request: int
+
+        :return dict: Number of transactions per address
+        """
+        if isinstance(addresslist, TYPE_TEXT):
+            addresslist = [addresslist]
+        txcounts = {}
+        for n in range(0, len(addresslist), addresses_per_request):
+            res = self._provider_execute('gettxcounts', addresslist[n:n + addresses_per_request])
+            if res is False:
+                return False
+            txcounts.update(res)
+        return txcounts
+
     def getutxos(self, address, after_txid='', limit=MAX_TRANSACTIONS):
         """
         Get list of unspent outputs (UTXO's) for specified address.
@@ -370,30 +415,31 @@ class Service(object):
                 last_block = txs[-1:][0].block_height
             if len(txs):
                 last_txid = txs[-1:][0].txid
+            all_txs = txs_cache + txs
+            # If we have txs for this address update spent information before storing transactions in cache. The
+            # index of spent outpoints is kept per address, only transactions which are not indexed yet are added
+            if self.complete:
+                cache_spents = [[to.spent for to in t.outputs] for t in txs_cache]
+                spent_index, indexed_txids = self._spent_indexes.setdefault(address, ({}, set()))
+                new_txs = [t for t in all_txs if t.txid not in indexed_txids]
+                transaction_spent_index(new_txs, address, spent_index)
+                indexed_txids.update([t.txid for t in new_txs])
+                all_txs = transaction_update_spents(all_txs, address, spent_index)
             if len(self.results):
-                order_n = 0
-                for t in txs:
-                    if t.confirmations != 0:
-                        res = self.cache.store_transaction(t, order_n, commit=False)
-                        order_n += 1
-                        # Failure to store transaction: stop caching transaction and store last tx block height - 1
-                        if res is False:
-                            if t.block_height:
-                                last_block = t.block_height - 1
-                            break
-                self.cache.session.commit()
+                txs_failed = self.cache.store_transactions([t for t in txs if t.confirmations != 0], 0, commit=False)
+                # Failure to store transaction: stop caching transactions and store last tx block height - 1
+                if txs_failed and txs_failed[0].block_height:
+                    last_block = txs_failed[0].block_height - 1
+            if self.complete:
+                # Only write spent information of cached transactions if it is changed
+                self.cache.store_transactions([t for t, spents in zip(txs_cache, cache_spents)
+                                               if [to.spent for to in t.outputs] != spents], commit=False)
+            if len(self.results) or self.complete:
+                self.cache.commit()
                 self.cache.store_address(address, last_block, last_txid=last_txid, txs_complete=self.complete)
+            return all_txs
 
-        all_txs = txs_cache + txs
-        # If we have txs for this address update spent and balance information in cache
-        if self.complete:
-            all_txs = transaction_update_spents(all_txs, address)
-            if caching_enabled:
-                self.cache.store_address(address, last_block, last_txid=last_txid, txs_complete=True)
-                for t in all_txs:
-                    self.cache.store_transaction(t, commit=False)
-                self.cache.session.commit()
-        return all_txs
+        return txs_cache + txs
 
     def getrawtransaction(self, txid):
         """
@@ -530,12 +576,7 @@ class Service(object):
             block.page = page
 
             if parse_transactions and self.min_providers <= 1:
-                order_n = (page-1)*limit
-                for tx in block.transactions:
-                    if isinstance(tx, Transaction):
-                        self.cache.store_transaction(tx, order_n, commit=False)
-                    order_n += 1
-                self.cache.session.commit()
+                self.cache.store_transactions(block.transactions, (page-1)*limit)
             self.complete = True if len(block.transactions) == block.tx_count else False
             self.cache.store_block(block)
         return block
@@ -623,6 +664,8 @@ class Cache(object):
         self.network = network
 
     def commit(self):
+        if not self.session:
+            return
         try:
             self.session.commit()
         except Exception:
@@ -630,24 +673,25 @@ class Cache(object):
             raise
 
     @staticmethod
-    def _parse_db_transaction(db_tx):
+    def _parse_db_transaction(db_tx, lazy=False):
         if not db_tx.raw:
             return False
-        t = Transaction.import_raw(db_tx.raw, db_tx.network_name)
+        t = Transaction.import_raw(db_tx.raw, db_tx.network_name, lazy=lazy)
         # locktime, version, coinbase?, witness_type
         # t = Transaction(locktime=tx['locktime'], version=tx['version'], network=self.network,
         #                 fee=tx['fee'], size=tx['size'], hash=tx['txid'],
         #                 date=tdate, input_total=tx['input_total'], output_total=tx['output_total'],
         #                 confirmations=confirmations, block_height=block_height, status=tx['status'],
         #                 coinbase=tx['coinbase'], rawtx=tx['raw_hex'], witness_type=tx['witness_type'])
+        input_updates = {}
+        output_updates = {}
         for n in db_tx.nodes:
             if n.is_input:
-                t.inputs[n.output_n].value = n.value
-                t.inputs[n.output_n].address = n.address
+                input_updates[n.output_n] = {'value': n.value, 'address': n.address}
             else:
-                t.outputs[n.output_n].spent = n.spent
-                t.outputs[n.output_n].spending_txid = n.spending_txid
-                t.outputs[n.output_n].spending_index_n = n.spending_index_n
+                output_updates[n.output_n] = {'spent': n.spent, 'spending_txid': n.spending_txid,
+                                              'spending_index_n': n.spending_index_n}
+        t.update_items(input_updates, output_updates)
         t.hash = to_bytes(db_tx.txid)
         t._txid = db_tx.txid
         t.date = db_tx.date
@@ -656,7 +700,13 @@ class Cache(object):
         t.block_height = db_tx.block_height
         t.status = 'confirmed'
         t.fee = db_tx.fee
-        t.update_totals()
+        if lazy:
+            t.input_total = sum([u['value'] for u in input_updates.values() if u['value']])
+            t.output_total = sum([n.value for n in db_tx.nodes if not n.is_input and n.value])
+            if t.input_total:
+                t.fee = t.input_total - t.output_total
+        else:
+            t.update_totals()
         if t.coinbase:
             t.input_total = t.output_total
         _logger.info("Retrieved transaction %s from cache" % t.txid)
@@ -740,7 +790,21 @@ class Cache(object):
             return txs
         return []
 
-    def getblocktransactions(self, height, page, limit):
+    def getblocktransactions(self, height, page, limit, lazy=False):
+        """
+        Get range of transactions from a block from cache
+
+        :param height: Block height
+        :type height: int
+        :param page: Page number, starts with 1
+        :type page: int
+        :param limit: Number of transactions per page
+        :type limit: int
+        :param lazy: Return lazy Transaction objects, which only create inputs and outputs when accessed. Default is False
+        :type lazy: bool
+
+        :return list: List of Transaction objects
+        """
         n_from = (page-1) * limit
         n_to = page * limit
         db_txs = self.session.query(DbCacheTransaction).\
@@ -748,7 +812,7 @@ class Cache(object):
                    DbCacheTransaction.order_n < n_to).all()
         txs = []
         for db_tx in db_txs:
-            t = self._parse_db_transaction(db_tx)
+            t = self._parse_db_transaction(db_tx, lazy=lazy)
             if t:
                 txs.append(t)
         return txs
@@ -902,50 +966,116 @@ class Cache(object):
 
         :return:
         """
-        if not SERVICE_CACHING_ENABLED:
-            return
-        # Only store complete and confirmed transaction in cache
-        if not t.txid:    # pragma: no cover
-            _logger.info("Caching failure tx: Incomplete transaction missing hash, date, block_height, "
-                         "network or confirmations info")
-            return False
-        elif not t.date or not (t.block_height or t.block_hash) or not t.network:
+        if self.store_transactions([t], order_n, commit):
             return False
-        raw_hex = None
-        if CACHE_STORE_RAW_TRANSACTIONS:
-            raw_hex = t.raw_hex()
-            if not raw_hex:    # pragma: no cover
-                _logger.info("Caching failure tx: Raw hex missing in transaction")
-                return False
-        if self.session.query(DbCacheTransaction).filter_by(txid=t.txid).count():
-            return
-        new_tx = DbCacheTransaction(txid=t.txid, date=t.date, confirmations=t.confirmations,
-                                    block_height=t.block_height, block_hash=t.block_hash, network_name=t.network.name,
-                                    fee=t.fee, raw=raw_hex, order_n=order_n)
-        self.session.add(new_tx)
-        for i in t.inputs:
-            if i.value is None or i.address is None or i.output_n is None:    # pragma: no cover
-                _logger.info("Caching failure tx: Input value, address or output_n missing")
-                return False
-            new_node = DbCacheTransactionNode(txid=t.txid, address=i.address, output_n=i.index_n, value=i.value,
-                                              is_input=True)
-            self.session.add(new_node)
-        for o in t.outputs:
-            if o.value is None or o.address is None or o.output_n is None:    # pragma: no cover
-                _logger.info("Caching failure tx: Output value, address, spent info or output_n missing")
-                return False
-            new_node = DbCacheTransactionNode(
-                txid=t.txid, address=o.address, output_n=o.output_n, value=o.value, is_input=False, spent=o.spent,
-                spending_txid=None if not o.spending_txid else to_hexstring(o.spending_txid),
-                spending_index_n=o.spending_index_n)
-            self.session.add(new_node)
+
+    def store_transactions(self, txs, order_n=None, commit=True):
+        """
+        Store list of transactions in cache. Existing transactions are looked up with one query, new transactions and
+        their inputs and outputs are added with bulk inserts. For transactions which are already in cache the spent
+        information of the outputs is updated.
+
+        Caching stops at the first transaction which can not be stored, so the cache contains no gaps.
+
+        :param txs: List of transactions. Items which are not a Transaction object, such as transaction IDs, are skipped
+        :type txs: list of Transaction
+        :param order_n: Order in block of first transaction in the list, following items are numbered sequentially. Leave empty if unknown
+        :type order_n: int
+        :param commit: Commit transactions to database. Default is True
+
+        :return list of Transaction: Transactions which are not stored in cache, starting with the transaction which could not be stored
+        """
+        if not SERVICE_CACHING_ENABLED:
+            return []
+        txs_failed = []
+        tx_items = []
+        for n, t in enumerate(txs):
+            if not isinstance(t, Transaction):
+                continue
+            # Only store complete and confirmed transaction in cache
+            if not t.txid:    # pragma: no cover
+                _logger.info("Caching failure tx: Incomplete transaction missing hash, date, block_height, "
+                             "network or confirmations info")
+                txs_failed = txs[n:]
+                break
+            elif not t.date or not (t.block_height or t.block_hash) or not t.network:
+                txs_failed = txs[n:]
+                break
+            raw_hex = None
+            if CACHE_STORE_RAW_TRANSACTIONS:
+                raw_hex = t.raw_hex()
+                if not raw_hex:    # pragma: no cover
+                    _logger.info("Caching failure tx: Raw hex missing in transaction")
+                    txs_failed = txs[n:]
+                    break
+            nodes = []
+            for i in t.inputs:
+                if i.value is None or i.address is None or i.output_n is None:    # pragma: no cover
+                    _logger.info("Caching failure tx: Input value, address or output_n missing")
+                    break
+                nodes.append({'txid': t.txid, 'address': i.address, 'output_n': i.index_n, 'value': i.value,
+                              'is_input': True, 'spent': None, 'spending_txid': None, 'spending_index_n': None})
+            else:
+                for o in t.outputs:
+                    if o.value is None or o.address is None or o.output_n is None:    # pragma: no cover
+                        _logger.info("Caching failure tx: Output value, address, spent info or output_n missing")
+                        break
+                    nodes.append({'txid': t.txid, 'address': o.address, 'output_n': o.output_n, 'value': o.value,
+                                  'is_input': False, 'spent': o.spent,
+                                  'spending_txid': None if not o.spending_txid else to_hexstring(o.spending_txid),
+                                  'spending_index_n': o.spending_index_n})
+                else:
+                    tx_items.append((t, {'txid': t.txid, 'date': t.date, 'confirmations': t.confirmations,
+                                         'block_height': t.block_height, 'block_hash': t.block_hash,
+                                         'network_name': t.network.name, 'fee': t.fee, 'raw': raw_hex,
+                                         'order_n': None if order_n is None else order_n + n}, nodes))
+                    continue
+            txs_failed = txs[n:]
+            break
+        if not tx_items:
+            return txs_failed
+
+        txids = list(set([t.txid for t, _, _ in tx_items]))
+        txids_cached = set()
+        for n in range(0, len(txids), 500):
+            txids_cached.update([txid for txid, in self.session.query(DbCacheTransaction.txid).
+                                filter(DbCacheTransaction.txid.in_(txids[n:n + 500]))])
+        new_txs = []
+        new_nodes = []
+        txs_cached = {}
+        for t, db_tx, nodes in tx_items:
+            if t.txid in txids_cached:
+                txs_cached[t.txid] = t
+                continue
+            txids_cached.add(t.txid)
+            new_txs.append(db_tx)
+            new_nodes += nodes
+        if new_txs:
+            self.session.bulk_insert_mappings(DbCacheTransaction, new_txs)
+            self.session.bulk_insert_mappings(DbCacheTransactionNode, new_nodes)
+
+        # Update spent information of outputs of transactions which are already cached
+        outputs = dict([((txid, o.output_n), o) for txid, t in txs_cached.items() for o in t.outputs
+                        if o.spent is not None])
+        txids = list(set([txid for txid, _ in outputs]))
+        for n in range(0, len(txids), 500):
+            for node in self.session.query(DbCacheTransactionNode).\
+                    filter(DbCacheTransactionNode.txid.in_(txids[n:n + 500]),
+                           DbCacheTransactionNode.is_input.is_(False)):
+                o = outputs.get((node.txid, node.output_n))
+                if o is None or node.spent == o.spent:
+                    continue
+                node.spent = o.spent
+                node.spending_txid = None if not o.spending_txid else to_hexstring(o.spending_txid)
+                node.spending_index_n = o.spending_index_n
 
         if commit:
             try:
                 self.commit()
-                _logger.info("Added transaction %s to cache" % t.txid)
+                _logger.info("Added %d transactions to cache" % len(new_txs))
             except Exception as e:    # pragma: no cover
                 _logger.warning("Caching failure tx: %s" % e)
+        return txs_failed
 
     def store_address(self, address, last_block=None, balance=0, n_utxos=None, txs_complete=False, last_txid=None):
         """
@@ -1042,3 +1172,8 @@ class Cache(object):
             self.commit()
         except Exception as e:    # pragma: no cover
             _logger.warning("Caching failure block: %s" % e)
+
+
+# AsyncService uses async / await syntax and is only available on Python 3
+if PY3:
+    from bitcoinlib.services.asyncservice import AsyncService
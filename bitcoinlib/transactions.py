@@ -31,9 +31,9 @@ from bitcoinlib.config.config import (DEFAULT_NETWORK, SCRIPT_TYPES_LOCKING, SCR
                                       SEQUENCE_REPLACE_BY_FEE, SIGHASH_ALL, SIGHASH_ANYONECANPAY, SIGHASH_NONE,
                                       SIGHASH_SINGLE)
 from bitcoinlib.config.opcodes import OP_N_CODES, opcode, opcodenames, opcodes
-from bitcoinlib.encoding import (change_base, double_sha256, hash160, int_to_varbyteint, to_bytes, to_hexstring,
-                                 varbyteint_to_int, varstr)
-from bitcoinlib.keys import Address, HDKey, Key, Signature, deserialize_address, sign, verify
+from bitcoinlib.encoding import (double_sha256, hash160, int_to_varbyteint, to_bytes, to_hexstring, varbyteint_to_int,
+                                 varstr)
+from bitcoinlib.keys import Address, HDKey, Key, Signature, deserialize_address, sign, verify_batch
 from bitcoinlib.main import script_type_default
 from bitcoinlib.networks import Network
 
@@ -53,7 +53,22 @@ class TransactionError(Exception):
         return self.msg
 
 
-def transaction_deserialize(rawtx, network=DEFAULT_NETWORK, check_size=True):
+def _read_varbyteint(data, cursor):
+    # Read CompactSize variable length integer from buffer at cursor position. Returns (integer, size)
+    try:
+        ni = struct.unpack_from('B', data, cursor)[0]
+        if ni < 253:
+            return ni, 1
+        if ni == 253:
+            return struct.unpack_from('<H', data, cursor + 1)[0], 3
+        elif ni == 254:
+            return struct.unpack_from('<L', data, cursor + 1)[0], 5
+        return struct.unpack_from('<Q', data, cursor + 1)[0], 9
+    except struct.error:
+        raise TransactionError("Unexpected end of data at position %d. Probably malformed raw transaction" % cursor)
+
+
+def transaction_deserialize(rawtx, network=DEFAULT_NETWORK, check_size=True, lazy=False):
     """
     Deserialize a raw transaction
 
@@ -67,125 +82,235 @@ def transaction_deserialize(rawtx, network=DEFAULT_NETWORK, check_size=True):
     :type network: str, Network
     :param check_size: Check if not bytes are left when parsing is finished. Disable when parsing list of transactions, such as the transactions in a raw block. Default is True
     :type check_size: bool
+    :param lazy: Create Input and Output objects only when they are accessed. Default is False
+    :type lazy: bool
 
     :return Transaction:
     """
 
     rawtx = to_bytes(rawtx)
-    version = rawtx[0:4][::-1]
+    t, _ = transaction_deserialize_from(rawtx, network=network, check_size=check_size, lazy=lazy)
+    return t
+
+
+def transaction_deserialize_from(data, offset=0, network=DEFAULT_NETWORK, check_size=False, lazy=False):
+    """
+    Deserialize a raw transaction starting at given offset in a buffer of raw data.
+
+    The data is read through a memoryview, so no copies of the remaining data are made. This makes it possible to
+    parse a long list of transactions, such as the transactions in a raw block, in linear time by passing the
+    returned number of bytes consumed as offset for the next transaction.
+
+    >>> rawtx = to_bytes('01000000010000000000000000000000000000000000000000000000000000000000000000ffffffff0704ffff001d0104ffffffff0100f2052a0100000043410496b538e853519c726a2c91e61ec11600ae1390813a627c66fb8be7947be63c52da7589379515d4e0a604f8141781e62294721166bf621e73a82cbf2342c858eeac00000000')
+    >>> t, size = transaction_deserialize_from(rawtx)
+    >>> t.txid, size
+    ('0e3e2357e806b6cdb1f70b54c3a3a17b6714ee1f0e68bebb44a74b1efd512098', 134)
+
+    :param data: Buffer with raw transaction data
+    :type data: bytes, bytearray, memoryview
+    :param offset: Position of first byte of transaction in data buffer. Default is 0
+    :type offset: int
+    :param network: Network code, i.e. 'bitcoin', 'testnet', 'litecoin', etc. Leave emtpy for default network
+    :type network: str, Network
+    :param check_size: Check if no bytes are left in buffer when parsing is finished. Default is False
+    :type check_size: bool
+    :param lazy: Only store offsets of inputs and outputs in raw transaction. Input and Output objects are created when the inputs or outputs attribute is accessed for the first time. Default is False
+    :type lazy: bool
+
+    :return (Transaction, int): Transaction object and number of bytes consumed
+    """
+
+    buf = data if isinstance(data, memoryview) else memoryview(data)
+    cursor = offset
+    version = buf[cursor:cursor + 4].tobytes()[::-1]
     coinbase = False
     flag = None
     witness_type = 'legacy'
-    cursor = 4
-    if rawtx[4:5] == b'\0':
-        flag = rawtx[5:6]
+    cursor += 4
+    if buf[cursor:cursor + 1].tobytes() == b'\0':
+        flag = buf[cursor + 1:cursor + 2].tobytes()
         if flag == b'\1':
             witness_type = 'segwit'
         cursor += 2
-    n_inputs, size = varbyteint_to_int(rawtx[cursor:cursor + 9])
+    n_inputs, size = _read_varbyteint(buf, cursor)
     cursor += size
-    inputs = []
-    if not isinstance(network, Network):
-        network = Network(network)
+    input_offsets = []
     for n in range(0, n_inputs):
-        inp_hash = rawtx[cursor:cursor + 32][::-1]
-        if not len(inp_hash):
+        inp_hash = buf[cursor:cursor + 32].tobytes()
+        if len(inp_hash) != 32:
             raise TransactionError("Input transaction hash not found. Probably malformed raw transaction")
         if inp_hash == 32 * b'\0':
             coinbase = True
-        output_n = rawtx[cursor + 32:cursor + 36][::-1]
+        input_pos = cursor - offset
         cursor += 36
-        unlocking_script_size, size = varbyteint_to_int(rawtx[cursor:cursor + 9])
+        unlocking_script_size, size = _read_varbyteint(buf, cursor)
         cursor += size
-        unlocking_script = rawtx[cursor:cursor + unlocking_script_size]
-        inp_type = 'legacy'
-        if witness_type == 'segwit' and not unlocking_script_size:
-            inp_type = 'segwit'
-        cursor += unlocking_script_size
-        sequence_number = rawtx[cursor:cursor + 4]
-        cursor += 4
-        inputs.append(Input(prev_hash=inp_hash, output_n=output_n, unlocking_script=unlocking_script,
-                            witness_type=inp_type, sequence=sequence_number, index_n=n, network=network))
-    if len(inputs) != n_inputs:
-        raise TransactionError("Error parsing inputs. Number of tx specified %d but %d found" % (n_inputs, len(inputs)))
+        input_offsets.append((input_pos, cursor - offset, unlocking_script_size))
+        cursor += unlocking_script_size + 4
 
-    outputs = []
-    n_outputs, size = varbyteint_to_int(rawtx[cursor:cursor + 9])
+    output_offsets = []
+    n_outputs, size = _read_varbyteint(buf, cursor)
     cursor += size
     output_total = 0
     for n in range(0, n_outputs):
-        value = change_base(rawtx[cursor:cursor + 8][::-1], 256, 10)
+        try:
+            value = struct.unpack_from('<Q', buf, cursor)[0]
+        except struct.error:
+            raise TransactionError("Output value not found. Probably malformed raw transaction")
+        output_pos = cursor - offset
         cursor += 8
-        lock_script_size, size = varbyteint_to_int(rawtx[cursor:cursor + 9])
+        lock_script_size, size = _read_varbyteint(buf, cursor)
         cursor += size
-        lock_script = rawtx[cursor:cursor + lock_script_size]
+        output_offsets.append((output_pos, cursor - offset, lock_script_size))
         cursor += lock_script_size
-        outputs.append(Output(value=value, lock_script=lock_script, network=network, output_n=n))
         output_total += value
-    if not outputs:
+    if not output_offsets:
         raise TransactionError("Error no outputs found in this transaction")
+
+    witness_offsets = []
+    witness_start = cursor
     if witness_type == 'segwit':
-        for n in range(0, len(inputs)):
-            n_items, size = varbyteint_to_int(rawtx[cursor:cursor + 9])
+        for n in range(0, n_inputs):
+            witness_offsets.append(cursor - offset)
+            n_items, size = _read_varbyteint(buf, cursor)
             cursor += size
-            witnesses = []
             for m in range(0, n_items):
-                witness = b'\0'
-                item_size, size = varbyteint_to_int(rawtx[cursor:cursor + 9])
-                if item_size:
-                    witness = rawtx[cursor + size:cursor + item_size + size]
+                item_size, size = _read_varbyteint(buf, cursor)
                 cursor += item_size + size
-                witnesses.append(witness)
-            if witnesses and not coinbase:
-                script_type = inputs[n].script_type
-                witness_script_type = 'sig_pubkey'
-                signatures = []
-                keys = []
-                sigs_required = 1
-                public_hash = b''
-                for witness in witnesses:
-                    if witness == b'\0':
-                        continue
-                    if 70 <= len(witness) <= 74 and witness[0:1] == b'\x30':  # witness is DER encoded signature
-                        signatures.append(witness)
-                    elif len(witness) == 33 and len(signatures) == 1:  # key from sig_pk
-                        keys.append(witness)
-                    else:
-                        rsds = script_deserialize(witness, script_types=['multisig'])
-                        if not rsds['script_type'] == 'multisig':
-                            # FIXME: Parse unknown scripts
-                            _logger.warning("Could not parse witnesses in transaction. Multisig redeemscript expected")
-                            witness_script_type = 'unknown'
-                            script_type = 'unknown'
-                        else:
-                            # FIXME: Do not mixup naming signatures and keys
-                            keys = rsds['signatures']
-                            sigs_required = rsds['number_of_sigs_m']
-                            witness_script_type = 'p2sh'
-                            script_type = 'p2sh_multisig'
-
-                inp_witness_type = inputs[n].witness_type
-                usd = script_deserialize(inputs[n].unlocking_script, locking_script=True)
-
-                if usd['script_type'] == "p2wpkh" and witness_script_type == 'sig_pubkey':
-                    inp_witness_type = 'p2sh-segwit'
-                    script_type = 'p2sh_p2wpkh'
-                elif usd['script_type'] == "p2wsh" and witness_script_type == 'p2sh':
-                    inp_witness_type = 'p2sh-segwit'
-                    script_type = 'p2sh_p2wsh'
-                inputs[n] = Input(prev_hash=inputs[n].prev_hash, output_n=inputs[n].output_n, keys=keys,
-                                  unlocking_script_unsigned=inputs[n].unlocking_script_unsigned,
-                                  unlocking_script=inputs[n].unlocking_script, sigs_required=sigs_required,
-                                  signatures=signatures, witness_type=inp_witness_type, script_type=script_type,
-                                  sequence=inputs[n].sequence, index_n=inputs[n].index_n, public_hash=public_hash,
-                                  network=inputs[n].network, witnesses=witnesses)
-    if len(rawtx[cursor:]) != 4 and check_size:
+    if len(buf) - cursor != 4 and check_size:
         raise TransactionError("Error when deserializing raw transaction, bytes left for locktime must be 4 not %d" %
-                               len(rawtx[cursor:]))
-    locktime = change_base(rawtx[cursor:cursor + 4][::-1], 256, 10)
+                               (len(buf) - cursor))
+    try:
+        locktime = struct.unpack_from('<L', buf, cursor)[0]
+    except struct.error:
+        raise TransactionError("Locktime not found. Probably malformed raw transaction")
+    cursor += 4
+    size = cursor - offset
 
-    return Transaction(inputs, outputs, locktime, version, network, size=cursor + 4, output_total=output_total,
-                       coinbase=coinbase, flag=flag, witness_type=witness_type, rawtx=rawtx)
+    # Transaction ID is the double SHA256 of the transaction without marker, flag and witnesses (BIP 144)
+    if witness_type == 'segwit':
+        txid_hash = hashlib.sha256(buf[offset:offset + 4])
+        txid_hash.update(buf[offset + 6:witness_start])
+        txid_hash.update(buf[cursor - 4:cursor])
+        tx_hash = hashlib.sha256(txid_hash.digest()).digest()[::-1]
+    else:
+        tx_hash = double_sha256(buf[offset:cursor])[::-1]
+
+    rawtx = buf[offset:cursor].tobytes()
+    if not isinstance(network, Network):
+        network = Network(network)
+    raw_offsets = {
+        'inputs': input_offsets,
+        'outputs': output_offsets,
+        'witnesses': witness_offsets,
+    }
+    if lazy:
+        t = Transaction(locktime=locktime, version=version, network=network, size=size, hash=tx_hash,
+                        output_total=output_total, coinbase=coinbase, flag=flag, witness_type=witness_type,
+                        rawtx=rawtx)
+        t._inputs = None
+        t._outputs = None
+        t._raw_offsets = raw_offsets
+    else:
+        inputs = _inputs_from_offsets(rawtx, raw_offsets, witness_type, coinbase, network)
+        outputs = _outputs_from_offsets(rawtx, raw_offsets, network)
+        t = Transaction(inputs, outputs, locktime, version, network, size=size, hash=tx_hash,
+                        output_total=output_total, coinbase=coinbase, flag=flag, witness_type=witness_type,
+                        rawtx=rawtx)
+    return t, size
+
+
+def _outputs_from_offsets(rawtx, raw_offsets, network):
+    # Create list of Output objects from raw transaction and output offsets found by transaction_deserialize_from
+    buf = memoryview(rawtx)
+    outputs = []
+    for n, (output_pos, script_pos, script_size) in enumerate(raw_offsets['outputs']):
+        value = struct.unpack_from('<Q', buf, output_pos)[0]
+        lock_script = buf[script_pos:script_pos + script_size].tobytes()
+        output = Output(value=value, lock_script=lock_script, network=network, output_n=n)
+        output._set_raw_span(rawtx, output_pos, script_pos + script_size)
+        outputs.append(output)
+    return outputs
+
+
+def _inputs_from_offsets(rawtx, raw_offsets, witness_type, coinbase, network):
+    # Create list of Input objects from raw transaction and input and witness offsets found by
+    # transaction_deserialize_from
+    buf = memoryview(rawtx)
+    inputs = []
+    for n, (input_pos, script_pos, script_size) in enumerate(raw_offsets['inputs']):
+        inp_hash = buf[input_pos:input_pos + 32].tobytes()[::-1]
+        output_n = buf[input_pos + 32:input_pos + 36].tobytes()[::-1]
+        unlocking_script = buf[script_pos:script_pos + script_size].tobytes()
+        inp_type = 'legacy'
+        if witness_type == 'segwit' and not script_size:
+            inp_type = 'segwit'
+        sequence_number = buf[script_pos + script_size:script_pos + script_size + 4].tobytes()
+        inputs.append(Input(prev_hash=inp_hash, output_n=output_n, unlocking_script=unlocking_script,
+                            witness_type=inp_type, sequence=sequence_number, index_n=n, network=network))
+
+    witness_spans = []
+    for n, cursor in enumerate(raw_offsets['witnesses']):
+        witness_pos = cursor
+        n_items, size = _read_varbyteint(buf, cursor)
+        cursor += size
+        witnesses = []
+        for m in range(0, n_items):
+            witness = b'\0'
+            item_size, size = _read_varbyteint(buf, cursor)
+            if item_size:
+                witness = buf[cursor + size:cursor + item_size + size].tobytes()
+            cursor += item_size + size
+            witnesses.append(witness)
+        witness_spans.append((witness_pos, cursor))
+        if witnesses and not coinbase:
+            script_type = inputs[n].script_type
+            witness_script_type = 'sig_pubkey'
+            signatures = []
+            keys = []
+            sigs_required = 1
+            public_hash = b''
+            for witness in witnesses:
+                if witness == b'\0':
+                    continue
+                if 70 <= len(witness) <= 74 and witness[0:1] == b'\x30':  # witness is DER encoded signature
+                    signatures.append(witness)
+                elif len(witness) == 33 and len(signatures) == 1:  # key from sig_pk
+                    keys.append(witness)
+                else:
+                    rsds = script_deserialize(witness, script_types=['multisig'])
+                    if not rsds['script_type'] == 'multisig':
+                        # FIXME: Parse unknown scripts
+                        _logger.warning("Could not parse witnesses in transaction. Multisig redeemscript expected")
+                        witness_script_type = 'unknown'
+                        script_type = 'unknown'
+                    else:
+                        # FIXME: Do not mixup naming signatures and keys
+                        keys = rsds['signatures']
+                        sigs_required = rsds['number_of_sigs_m']
+                        witness_script_type = 'p2sh'
+                        script_type = 'p2sh_multisig'
+
+            inp_witness_type = inputs[n].witness_type
+            usd = script_deserialize(inputs[n].unlocking_script, locking_script=True)
+
+            if usd['script_type'] == "p2wpkh" and witness_script_type == 'sig_pubkey':
+                inp_witness_type = 'p2sh-segwit'
+                script_type = 'p2sh_p2wpkh'
+            elif usd['script_type'] == "p2wsh" and witness_script_type == 'p2sh':
+                inp_witness_type = 'p2sh-segwit'
+                script_type = 'p2sh_p2wsh'
+            inputs[n] = Input(prev_hash=inputs[n].prev_hash, output_n=inputs[n].output_n, keys=keys,
+                              unlocking_script_unsigned=inputs[n].unlocking_script_unsigned,
+                              unlocking_script=inputs[n].unlocking_script, sigs_required=sigs_required,
+                              signatures=signatures, witness_type=inp_witness_type, script_type=script_type,
+                              sequence=inputs[n].sequence, index_n=inputs[n].index_n, public_hash=public_hash,
+                              network=inputs[n].network, witnesses=witnesses)
+
+    for n, (input_pos, script_pos, script_size) in enumerate(raw_offsets['inputs']):
+        witness_pos, witness_end = witness_spans[n] if n < len(witness_spans) else (None, None)
+        inputs[n]._set_raw_span(rawtx, input_pos, script_pos + script_size + 4, witness_pos, witness_end)
+    return inputs
 
 
 def script_deserialize(script, script_types=None, locking_script=None, size_bytes_check=True):
@@ -610,13 +735,39 @@ def get_unlocking_script_type(locking_script_type, witness_type='legacy', multis
         raise TransactionError("Unknown locking script type %s" % locking_script_type)
 
 
-def transaction_update_spents(txs, address):
+def transaction_spent_index(txs, address, spent_index=None):
+    """
+    Create an index of outpoints spent by the given address. The index is a dictionary with an outpoint tuple
+    (previous transaction hash, output_n) as key and a (spending transaction hash, input index_n) tuple as value.
+
+    An existing index can be passed to add the inputs of new transactions, so the index can be build incrementally.
+
+    :param txs: List of transactions
+    :type txs: list of Transaction
+    :param address: Address string
+    :type address: str
+    :param spent_index: Existing index to update. Leave empty to create a new index
+    :type spent_index: dict
+
+    :return dict:
+    """
+    if spent_index is None:
+        spent_index = {}
+    for t in txs:
+        for inp in t.inputs:
+            if inp.address == address:
+                spent_index[(inp.prev_hash, inp.output_n_int)] = (t.hash, inp.index_n)
+    return spent_index
+
+
+def transaction_update_spents(txs, address, spent_index=None):
     """
     Update spent information for list of transactions for a specific address. This method assumes the list of
     transaction complete and up-to-date.
 
     This methods loops through all the transaction and update all transaction outputs for given address, checks
-    if the output is spent and add the spending transaction ID and index number to the outputs.
+    if the output is spent and add the spending transaction ID and index number to the outputs. Spending inputs are
+    looked up in an outpoint index created with :func:`transaction_spent_index`.
 
     The same list of transactions with updates outputs will be returned
 
@@ -624,28 +775,21 @@ def transaction_update_spents(txs, address):
     :type txs: list of Transaction
     :param address: Address string
     :type address: str
+    :param spent_index: Index of spent outpoints of given address. Leave empty to create index from provided transactions
+    :type spent_index: dict
 
     :return list of Transaction:
     """
-    spend_list = {}
-    for t in txs:
-        for inp in t.inputs:
-            if inp.address == address:
-                spend_list.update({(inp.prev_hash, inp.output_n_int): t})
-    address_inputs = list(spend_list.keys())
+    if spent_index is None:
+        spent_index = transaction_spent_index(txs, address)
     for t in txs:
         for to in t.outputs:
             if to.address != address:
                 continue
-            spent = True if (t.hash, to.output_n) in address_inputs else False
-            txs[txs.index(t)].outputs[to.output_n].spent = spent
-            if spent:
-                spending_tx = spend_list[(t.hash, to.output_n)]
-                spending_index_n = \
-                    [inp for inp in txs[txs.index(spending_tx)].inputs
-                     if inp.prev_hash == t.hash and inp.output_n_int == to.output_n][0].index_n
-                txs[txs.index(t)].outputs[to.output_n].spending_txid = spending_tx.hash
-                txs[txs.index(t)].outputs[to.output_n].spending_index_n = spending_index_n
+            spending = spent_index.get((t.hash, to.output_n))
+            to.spent = bool(spending)
+            if spending:
+                to.spending_txid, to.spending_index_n = spending
     return txs
 
 
@@ -657,8 +801,18 @@ class Input(object):
     To spent the UTXO an unlocking script can be included to prove ownership.
 
     Inputs are verified by the Transaction class.
+
+    Attributes are stored in slots instead of a dictionary to reduce memory usage when many inputs are kept in
+    memory, for instance when parsing blocks. The output number is stored as integer, the bytes representation is
+    created when requested.
     """
 
+    __slots__ = ('prev_hash', 'output_n_int', 'unlocking_script', 'unlocking_script_unsigned', 'sequence',
+                 'compressed', 'network', 'index_n', 'value', 'keys', 'public_hash', 'sort', 'address', 'encoding',
+                 'script_type', 'signatures', 'redeemscript', 'sigs_required', 'double_spend', 'locktime_cltv',
+                 'locktime_csv', 'witness_type', 'valid', 'key_path', 'witnesses', 'script_code', 'hash_type',
+                 '_raw_span')
+
     def __init__(self, prev_hash, output_n, keys=None, signatures=None, public_hash=b'', unlocking_script=b'',
                  unlocking_script_unsigned=None, script_type=None, address='',
                  sequence=0xffffffff, compressed=None, sigs_required=None, sort=False, index_n=0,
@@ -715,14 +869,9 @@ class Input(object):
         :type network: str, Network
         """
 
+        self._raw_span = None
         self.prev_hash = to_bytes(prev_hash)
         self.output_n = output_n
-        if isinstance(output_n, numbers.Number):
-            self.output_n_int = output_n
-            self.output_n = struct.pack('>I', output_n)
-        else:
-            self.output_n_int = struct.unpack('>I', output_n)[0]
-            self.output_n = output_n
         self.unlocking_script = b'' if unlocking_script is None else to_bytes(unlocking_script)
         self.unlocking_script_unsigned = b'' if unlocking_script_unsigned is None \
             else to_bytes(unlocking_script_unsigned)
@@ -851,6 +1000,47 @@ class Input(object):
                     self.hash_type = sig.hash_type
         self.update_scripts(hash_type=self.hash_type)
 
+    @property
+    def output_n(self):
+        """
+        Output number in previous transaction as 4 bytes big endian
+
+        :return bytes:
+        """
+        return struct.pack('>I', self.output_n_int)
+
+    @output_n.setter
+    def output_n(self, value):
+        if isinstance(value, numbers.Number):
+            self.output_n_int = value
+        else:
+            self.output_n_int = struct.unpack('>I', value)[0]
+
+    def _raw_fields(self):
+        return (self.prev_hash, self.output_n_int, self.unlocking_script, self.sequence, self.witness_type,
+                list(self.witnesses))
+
+    def _set_raw_span(self, rawtx, pos, end, witness_pos=None, witness_end=None):
+        """
+        Remember position of this input and its witnesses in the raw transaction it is parsed from, so the original
+        bytes can be reused when the transaction is serialized again.
+        """
+        self._raw_span = (rawtx, pos, end, witness_pos, witness_end, self._raw_fields())
+
+    def _original_raw(self):
+        """
+        Serialized input and witnesses as found in the original raw transaction. Witnesses are None if the raw
+        transaction contains no witnesses.
+
+        :return tuple: Input and witnesses as bytes, or None if input is not parsed from a raw transaction or is modified
+        """
+        if self._raw_span is None:
+            return None
+        rawtx, pos, end, witness_pos, witness_end, fields = self._raw_span
+        if fields != self._raw_fields():
+            return None
+        return rawtx[pos:end], None if witness_pos is None else rawtx[witness_pos:witness_end]
+
     # TODO: Remove / replace?
     # def sequence_timelock_blocks(self, blocks):
     #     if blocks > SEQUENCE_LOCKTIME_MASK:
@@ -1021,8 +1211,15 @@ class Output(object):
     Transaction Output class, normally part of Transaction class.
 
     Contains the amount and destination of a transaction.
+
+    Attributes are stored in slots instead of a dictionary to reduce memory usage. The Address object is only
+    created when the address_obj attribute is requested.
     """
 
+    __slots__ = ('value', 'lock_script', 'public_hash', 'address', '_address_obj', 'public_key', 'network',
+                 'compressed', 'versionbyte', 'script_type', 'encoding', 'spent', 'output_n', 'spending_txid',
+                 'spending_index_n', '_raw_span')
+
     def __init__(self, value, address='', public_hash=b'', public_key=b'', lock_script=b'', spent=False,
                  output_n=0, script_type=None, encoding=None, spending_txid='', spending_index_n=None,
                  network=DEFAULT_NETWORK):
@@ -1066,28 +1263,28 @@ class Output(object):
             raise TransactionError("Please specify address, lock_script, public key or public key hash when "
                                    "creating output")
 
+        self._raw_span = None
         self.value = value
         self.lock_script = b'' if lock_script is None else to_bytes(lock_script)
         self.public_hash = to_bytes(public_hash)
         if isinstance(address, Address):
             self.address = address.address
-            self.address_obj = address
+            self._address_obj = address
         elif isinstance(address, HDKey):
             self.address = address.address()
-            self.address_obj = address.address_obj
+            self._address_obj = address.address_obj
             public_key = address.public_byte
             if not script_type:
                 script_type = script_type_default(address.witness_type, address.multisig, True)
             self.public_hash = address.hash160
         else:
             self.address = address
-            self.address_obj = None
+            self._address_obj = None
         self.public_key = to_bytes(public_key)
         self.network = network
         if not isinstance(network, Network):
             self.network = Network(network)
         self.compressed = True
-        self.k = None
         self.versionbyte = self.network.prefix_address
         self.script_type = script_type
         self.encoding = encoding
@@ -1096,11 +1293,11 @@ class Output(object):
         self.spent = spent
         self.output_n = output_n
 
-        if self.address_obj:
-            self.script_type = self.address_obj.script_type if script_type is None else script_type
-            self.public_hash = self.address_obj.hash_bytes
-            self.network = self.address_obj.network
-            self.encoding = self.address_obj.encoding
+        if self._address_obj:
+            self.script_type = self._address_obj.script_type if script_type is None else script_type
+            self.public_hash = self._address_obj.hash_bytes
+            self.network = self._address_obj.network
+            self.encoding = self._address_obj.encoding
         if self.public_key and not self.public_hash:
             k = Key(self.public_key, is_private=False, network=network)
             self.public_hash = k.hash160
@@ -1139,10 +1336,10 @@ class Output(object):
             if self.encoding == 'bech32':
                 self.script_type = 'p2wpkh'
         if self.public_hash and not self.address:
-            self.address_obj = Address(hashed_data=self.public_hash, script_type=self.script_type,
-                                       encoding=self.encoding, network=self.network)
-            self.address = self.address_obj.address
-            self.versionbyte = self.address_obj.prefix
+            address_obj = Address(hashed_data=self.public_hash, script_type=self.script_type,
+                                  encoding=self.encoding, network=self.network)
+            self.address = address_obj.address
+            self.versionbyte = address_obj.prefix
         if self.lock_script == b'':
             if self.script_type == 'p2pkh':
                 self.lock_script = b'\x76\xa9\x14' + self.public_hash + b'\x88\xac'
@@ -1165,6 +1362,42 @@ class Output(object):
         #     raise TransactionError("Output to %s must be more then dust amount %d" %
         #                            (self.address, self.network.dust_amount))
 
+    @property
+    def address_obj(self):
+        """
+        Address object for this output. Created from public key hash, script type and encoding when requested.
+
+        :return Address:
+        """
+        if self._address_obj is None and self.public_hash:
+            self._address_obj = Address(hashed_data=self.public_hash, script_type=self.script_type,
+                                        encoding=self.encoding, network=self.network)
+        return self._address_obj
+
+    @address_obj.setter
+    def address_obj(self, value):
+        self._address_obj = value
+
+    def _set_raw_span(self, rawtx, pos, end):
+        """
+        Remember position of this output in the raw transaction it is parsed from, so the original bytes can be
+        reused when the transaction is serialized again.
+        """
+        self._raw_span = (rawtx, pos, end, self.value, self.lock_script)
+
+    def _original_raw(self):
+        """
+        Serialized output as found in the original raw transaction.
+
+        :return bytes: Output as bytes, or None if output is not parsed from a raw transaction or is modified
+        """
+        if self._raw_span is None:
+            return None
+        rawtx, pos, end, value, lock_script = self._raw_span
+        if value != self.value or lock_script != self.lock_script:
+            return None
+        return rawtx[pos:end]
+
     def as_dict(self):
         """
         Get transaction output information in json format
@@ -1202,10 +1435,18 @@ class Transaction(object):
     A verify method is available to check if the transaction Inputs have valid unlocking scripts.
 
     Each input in the transaction can be signed with the sign method provided a valid private key.
+
+    Attributes are stored in slots instead of a dictionary to reduce memory usage when many transactions are kept in
+    memory. The version is stored as bytes, the integer representation is created when requested.
     """
 
+    __slots__ = ('_inputs', '_outputs', '_raw_offsets', '_segwit_hashes', '_txid', 'coinbase', 'version', 'locktime',
+                 'network', 'flag', 'fee', 'fee_per_kb', 'size', 'vsize', 'hash', 'date', 'confirmations',
+                 'block_height', 'block_hash', 'input_total', 'output_total', 'rawtx', 'status', 'verified',
+                 'witness_type', 'change')
+
     @staticmethod
-    def import_raw(rawtx, network=DEFAULT_NETWORK, check_size=True):
+    def import_raw(rawtx, network=DEFAULT_NETWORK, check_size=True, lazy=False):
         """
         Import a raw transaction and create a Transaction object
 
@@ -1218,12 +1459,14 @@ class Transaction(object):
         :type network: str, Network
         :param check_size: Check if not bytes are left when parsing is finished. Disable when parsing list of transactions, such as the transactions in a raw block. Default is True
         :type check_size: bool
+        :param lazy: Only parse transaction ID, version, locktime and offsets of inputs and outputs. Input and Output objects are created when they are accessed for the first time. Default is False
+        :type lazy: bool
 
         :return Transaction:
         """
 
         rawtx = to_bytes(rawtx)
-        return transaction_deserialize(rawtx, network=network, check_size=check_size)
+        return transaction_deserialize(rawtx, network=network, check_size=check_size, lazy=lazy)
 
     def __init__(self, inputs=None, outputs=None, locktime=0, version=1, network=DEFAULT_NETWORK,
                  fee=None, fee_per_kb=None, size=None, hash='', date=None, confirmations=None,
@@ -1282,6 +1525,8 @@ class Transaction(object):
 
         """
 
+        self._raw_offsets = None
+        self._segwit_hashes = {}
         self.coinbase = coinbase
         self.inputs = []
         if inputs is not None:
@@ -1311,10 +1556,8 @@ class Transaction(object):
 
         if isinstance(version, int):
             self.version = struct.pack('>L', version)
-            self.version_int = version
         else:
             self.version = version
-            self.version_int = struct.unpack('>L', version)[0]
         self.locktime = locktime
         self.network = network
         if not isinstance(network, Network):
@@ -1343,6 +1586,80 @@ class Transaction(object):
         if not self.hash:
             self.hash = self.signature_hash()[::-1]
 
+    @property
+    def version_int(self):
+        """
+        Transaction version as integer
+
+        :return int:
+        """
+        return struct.unpack('>L', self.version)[0]
+
+    @property
+    def inputs(self):
+        if self._inputs is None:
+            self._inputs = _inputs_from_offsets(self.rawtx, self._raw_offsets, self.witness_type, self.coinbase,
+                                                self.network)
+            self._lazy_update_items(self._inputs, 'input_updates')
+        return self._inputs
+
+    @inputs.setter
+    def inputs(self, value):
+        self._inputs = value
+        self._segwit_hashes = {}
+
+    @property
+    def outputs(self):
+        if self._outputs is None:
+            self._outputs = _outputs_from_offsets(self.rawtx, self._raw_offsets, self.network)
+            self._lazy_update_items(self._outputs, 'output_updates')
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, value):
+        self._outputs = value
+        self._segwit_hashes = {}
+
+    @property
+    def is_lazy(self):
+        """
+        Transaction is lazy and Input or Output objects are not created yet
+
+        :return bool:
+        """
+        return self._raw_offsets is not None and (self._inputs is None or self._outputs is None)
+
+    def _lazy_update_items(self, items, updates_key):
+        for index_n, attributes in self._raw_offsets.get(updates_key, {}).items():
+            for attr, value in attributes.items():
+                setattr(items[index_n], attr, value)
+
+    def update_items(self, inputs=None, outputs=None):
+        """
+        Update attributes of inputs and outputs by index number. For a lazy transaction the updates are stored and
+        applied when the Input and Output objects are created.
+
+        :param inputs: Dictionary with input index number as key and a dictionary with attribute names and values
+        :type inputs: dict
+        :param outputs: Dictionary with output index number as key and a dictionary with attribute names and values
+        :type outputs: dict
+
+        :return:
+        """
+        for updates, items_attr, updates_key in [(inputs, '_inputs', 'input_updates'),
+                                                 (outputs, '_outputs', 'output_updates')]:
+            if not updates:
+                continue
+            items = getattr(self, items_attr)
+            if items is None:
+                pending = self._raw_offsets.setdefault(updates_key, {})
+                for index_n, attributes in updates.items():
+                    pending.setdefault(index_n, {}).update(attributes)
+            else:
+                for index_n, attributes in updates.items():
+                    for attr, value in attributes.items():
+                        setattr(items[index_n], attr, value)
+
     def __repr__(self):
         return "<Transaction(id=%s, inputs=%d, outputs=%d, status=%s, network=%s)>" % \
                (self.txid, len(self.inputs), len(self.outputs), self.status, self.network.name)
@@ -1509,6 +1826,38 @@ class Transaction(object):
         else:
             raise TransactionError("Witness_type %s not supported" % self.witness_type)
 
+    def signature_segwit_hashes(self, hash_type=SIGHASH_ALL):
+        """
+        Get the BIP143 intermediate hashes hashPrevouts, hashSequence and hashOutputs for a segwit signature.
+
+        These hashes are the same for every input, so they are calculated once per hash type and cached in this
+        Transaction object. The cache is keyed on the serialized prevouts, sequences and outputs, so changing a value,
+        sequence, prevout or script of an input or output invalidates the cached hashes.
+
+        :param hash_type: Specific hash type, default is SIGHASH_ALL
+        :type hash_type: int
+
+        :return tuple: hash_prevouts, hash_sequence and hash_outputs as bytes
+        """
+        prevouts_serialized = None
+        sequence_serialized = None
+        outputs_serialized = None
+        if not hash_type & SIGHASH_ANYONECANPAY:
+            prevouts_serialized = b''.join([i.prev_hash[::-1] + i.output_n[::-1] for i in self.inputs])
+            if (hash_type & 0x1f) != SIGHASH_SINGLE and (hash_type & 0x1f) != SIGHASH_NONE:
+                sequence_serialized = b''.join([struct.pack('<L', i.sequence) for i in self.inputs])
+        if (hash_type & 0x1f) != SIGHASH_SINGLE and (hash_type & 0x1f) != SIGHASH_NONE:
+            outputs_serialized = b''.join([struct.pack('<Q', int(o.value)) + varstr(o.lock_script)
+                                           for o in self.outputs])
+        content = (prevouts_serialized, sequence_serialized, outputs_serialized)
+        cached = self._segwit_hashes.get(hash_type)
+        if cached and cached[0] == content:
+            return cached[1]
+
+        hashes = tuple(b'\0' * 32 if serialized is None else double_sha256(serialized) for serialized in content)
+        self._segwit_hashes[hash_type] = (content, hashes)
+        return self._segwit_hashes[hash_type][1]
+
     def signature_segwit(self, sign_id, hash_type=SIGHASH_ALL):
         """
         Serialize transaction signature for segregated witness transaction
@@ -1521,29 +1870,12 @@ class Transaction(object):
         :return bytes: Segwit transaction signature
         """
         assert (self.witness_type == 'segwit')
-        prevouts_serialized = b''
-        sequence_serialized = b''
-        outputs_serialized = b''
-        hash_prevouts = b'\0' * 32
-        hash_sequence = b'\0' * 32
-        hash_outputs = b'\0' * 32
-
-        for i in self.inputs:
-            prevouts_serialized += i.prev_hash[::-1] + i.output_n[::-1]
-            sequence_serialized += struct.pack('<L', i.sequence)
-        if not hash_type & SIGHASH_ANYONECANPAY:
-            hash_prevouts = double_sha256(prevouts_serialized)
-            if (hash_type & 0x1f) != SIGHASH_SINGLE and (hash_type & 0x1f) != SIGHASH_NONE:
-                hash_sequence = double_sha256(sequence_serialized)
-        if (hash_type & 0x1f) != SIGHASH_SINGLE and (hash_type & 0x1f) != SIGHASH_NONE:
-            for o in self.outputs:
-                outputs_serialized += struct.pack('<Q', int(o.value))
-                outputs_serialized += varstr(o.lock_script)
-            hash_outputs = double_sha256(outputs_serialized)
-        elif (hash_type & 0x1f) != SIGHASH_SINGLE and sign_id < len(self.outputs):
-            outputs_serialized += struct.pack('<Q', int(self.outputs[sign_id].value))
-            outputs_serialized += varstr(self.outputs[sign_id].lock_script)
-            hash_outputs = double_sha256(outputs_serialized)
+        hash_prevouts, hash_sequence, hash_outputs = self.signature_segwit_hashes(hash_type)
+        if (hash_type & 0x1f) == SIGHASH_SINGLE or (hash_type & 0x1f) == SIGHASH_NONE:
+            if (hash_type & 0x1f) != SIGHASH_SINGLE and sign_id < len(self.outputs):
+                outputs_serialized = struct.pack('<Q', int(self.outputs[sign_id].value))
+                outputs_serialized += varstr(self.outputs[sign_id].lock_script)
+                hash_outputs = double_sha256(outputs_serialized)
 
         if not self.inputs[sign_id].value:
             raise TransactionError("Need value of input %d to create transaction signature, value can not be 0" %
@@ -1584,6 +1916,10 @@ class Transaction(object):
 
         if witness_type is None:
             witness_type = self.witness_type
+        if sign_id is None and witness_type == self.witness_type and self._inputs is None and \
+                self._outputs is None and self.rawtx:
+            # Lazy transaction which is not modified, return raw transaction as stored
+            return self.rawtx
 
         r = self.version[::-1]
         if sign_id is None and witness_type == 'segwit':
@@ -1593,11 +1929,18 @@ class Transaction(object):
         r += int_to_varbyteint(len(self.inputs))
         r_witness = b''
         for i in self.inputs:
-            r += i.prev_hash[::-1] + i.output_n[::-1]
-            if i.witnesses and i.witness_type != 'legacy':
+            # Reuse bytes of inputs and outputs which are not modified since they are parsed from a raw transaction
+            original = i._original_raw() if sign_id is None else None
+            if original and original[1] is not None:
+                r_witness += original[1]
+            elif i.witnesses and i.witness_type != 'legacy':
                 r_witness += int_to_varbyteint(len(i.witnesses)) + b''.join([bytes(varstr(w)) for w in i.witnesses])
             else:
                 r_witness += b'\0'
+            if original:
+                r += original[0]
+                continue
+            r += i.prev_hash[::-1] + i.output_n[::-1]
             if sign_id is None:
                 r += varstr(i.unlocking_script)
             elif sign_id == i.index_n:
@@ -1608,6 +1951,10 @@ class Transaction(object):
 
         r += int_to_varbyteint(len(self.outputs))
         for o in self.outputs:
+            original = o._original_raw()
+            if original:
+                r += original
+                continue
             if o.value < 0:
                 raise TransactionError("Output value < 0 not allowed")
             r += struct.pack('<Q', int(o.value))
@@ -1640,45 +1987,93 @@ class Transaction(object):
 
         return to_hexstring(self.raw(sign_id, hash_type=hash_type, witness_type=witness_type))
 
-    def verify(self):
+    def verify(self, max_workers=None):
         """
         Verify all inputs of a transaction, check if signatures match public key.
 
         Does not check if UTXO is valid or has already been spent
 
+        All signatures are checked at once with :func:`verify_batch`, so transactions with many inputs are verified
+        in parallel.
+
+        :param max_workers: Number of worker processes for signature verification. Leave empty to use max_workers setting from config
+        :type max_workers: int
+
         :return bool: True if enough signatures provided and if all signatures are valid
         """
 
+        checks = self.signature_checks()
+        if checks is None:
+            return False
+        results = verify_batch([c[1:] for c in checks], max_workers=max_workers)
+        return self.verify_results(dict(zip([c[0] for c in checks], results)))
+
+    def signature_checks(self):
+        """
+        Get list of signature verifications needed to verify this transaction. Used by :func:`verify` and to verify
+        signatures of multiple transactions in one batch.
+
+        Each item is a tuple with an (index_n, signature_n, key_n) identifier, the transaction hash to sign, the
+        signature and the public key. For multisig inputs all signature and key combinations which can lead to a
+        valid input are included.
+
+        :return list: List of tuples, or None if transaction can not be valid
+        """
+
         self.verified = False
+        self._segwit_hashes = {}
+        checks = []
         for i in self.inputs:
             if i.script_type == 'coinbase':
                 i.valid = True
                 break
             if not i.signatures:
                 _logger.info("No signatures found for transaction input %d" % i.index_n)
-                return False
+                return None
             if len(i.signatures) < i.sigs_required:
                 _logger.info("Not enough signatures provided. Found %d signatures but %d needed" %
                              (len(i.signatures), i.sigs_required))
-                return False
+                return None
+            if not i.keys:
+                continue
             transaction_hash = self.signature_hash(i.index_n, witness_type=i.witness_type)
+            if not transaction_hash:
+                _logger.info("Need at least 1 key to create segwit transaction signature")
+                return None
+            # Signatures and keys are in the same order, so signature n can only match keys n until
+            # n + len(keys) - sigs_required
+            for sig_n in range(i.sigs_required):
+                for key_n in range(sig_n, len(i.keys) - i.sigs_required + sig_n + 1):
+                    checks.append(((i.index_n, sig_n, key_n), transaction_hash, i.signatures[sig_n], i.keys[key_n]))
+        return checks
+
+    def verify_results(self, results):
+        """
+        Update verified status of this transaction and valid status of the inputs with the results of the
+        signature checks from :func:`signature_checks`
+
+        :param results: Dictionary with (index_n, signature_n, key_n) identifiers as key and verification result as value
+        :type results: dict
+
+        :return bool: True if enough signatures provided and if all signatures are valid
+        """
+
+        self.verified = False
+        for i in self.inputs:
+            if i.script_type == 'coinbase':
+                break
             sig_id = 0
-            key_n = 0
-            for key in i.keys:
+            for key_n in range(len(i.keys)):
                 if sig_id > i.sigs_required - 1:
                     break
-                if sig_id >= len(i.signatures):
-                    _logger.info("No valid signatures found")
-                    return False
-                if not transaction_hash:
-                    _logger.info("Need at least 1 key to create segwit transaction signature")
-                    return False
-                key_n += 1
-                if verify(transaction_hash, i.signatures[sig_id], key):
-                    sig_id += 1
-                    i.valid = True
-                else:
+                valid = results.get((i.index_n, sig_id, key_n))
+                if valid is None:
+                    # Remaining keys can not provide enough valid signatures anymore
                     i.valid = False
+                    break
+                if valid:
+                    sig_id += 1
+                i.valid = valid
             if sig_id < i.sigs_required:
                 _logger.info("Not enough valid signatures provided for input %d. Found %d signatures but %d needed" %
                              (i.index_n, sig_id, i.sigs_required))
@@ -1706,6 +2101,7 @@ class Transaction(object):
 
         if tid is None:
             tids = range(len(self.inputs))
+            self._segwit_hashes = {}
         else:
             tids = [tid]
 
@@ -1838,6 +2234,7 @@ class Transaction(object):
             sequence_int = struct.unpack('<L', sequence)[0]
         if self.version == b'\x00\x00\x00\x01' and 0 < sequence_int < SEQUENCE_LOCKTIME_DISABLE_FLAG:
             self.version = b'\x00\x00\x00\x02'
+        self._segwit_hashes = {}
         self.inputs.append(
             Input(prev_hash=prev_hash, output_n=output_n, keys=keys, signatures=signatures, public_hash=public_hash,
                   unlocking_script=unlocking_script, unlocking_script_unsigned=unlocking_script_unsigned,
@@ -1886,6 +2283,7 @@ class Transaction(object):
         if lock_script.startswith(b'\x6a'):
             if value != 0:
                 raise TransactionError("Output value for OP_RETURN script must be 0")
+        self._segwit_hashes = {}
         # elif value < self.network.dust_amount and strict:
         #     raise TransactionError("Output must be more then dust amount %d" % self.network.dust_amount)
         self.outputs.append(Output(value=int(value), address=address, public_hash=public_hash,
@@ -22,6 +22,7 @@ import logging
 import numbers
 import random
 import struct
+import threading
 import warnings
 from datetime import datetime
 from itertools import groupby
@@ -29,18 +30,22 @@ from operator import itemgetter
 
 from sqlalchemy import func, or_
 
-from bitcoinlib.config.config import (DEFAULT_NETWORK, DEFAULT_WITNESS_TYPE, MAX_TRANSACTIONS, SIGHASH_ALL, TYPE_INT,
-                                      WALLET_KEY_STRUCTURES)
+from bitcoinlib.coinselect import CoinSelection, CoinSelectionError, input_size
+from bitcoinlib.config.config import (COIN_SELECTION_STRATEGY, DEFAULT_NETWORK, DEFAULT_WITNESS_TYPE, MAX_TRANSACTIONS,
+                                      PY3, SERVICE_SYNC_BATCH_SIZE, SERVICE_SYNC_WORKERS, SIGHASH_ALL, TYPE_INT,
+                                      TYPE_TEXT, WALLET_KEY_STRUCTURES, WALLET_UTXO_CACHE)
 from bitcoinlib.db import (DbInit, DbKey, DbKeyMultisigChildren, DbNetwork, DbTransaction, DbTransactionInput,
                            DbTransactionOutput, DbWallet)
 from bitcoinlib.encoding import EncodingError, to_bytes, to_hexstring
-from bitcoinlib.keys import Address, BKeyError, HDKey, check_network_and_key, path_expand
+from bitcoinlib.keys import Address, BKeyError, HDKey, Key, check_network_and_key, get_key_format, path_expand
 from bitcoinlib.main import deprecated, get_encoding_from_witness, script_type_default
 from bitcoinlib.mnemonic import Mnemonic
 from bitcoinlib.networks import Network
 from bitcoinlib.services.services import Service
-from bitcoinlib.transactions import (Input, Output, Transaction, get_unlocking_script_type,
+from bitcoinlib.transactions import (Input, Output, Transaction, TransactionError, get_unlocking_script_type,
                                      serialize_multisig_redeemscript)
+if PY3:
+    from concurrent.futures import ThreadPoolExecutor, as_completed
 
 _logger = logging.getLogger(__name__)
 
@@ -58,6 +63,30 @@ class WalletError(Exception):
         return self.msg
 
 
+class _WorkerService(Service):
+    """
+    Service object for a worker thread of :func:`HDWallet._service_map`. All worker services share one lock, which is
+    held while the database cache is used and released while waiting for the service providers. So requests to
+    providers are send concurrently, but only one thread at a time reads or writes the cache database.
+    """
+
+    def __init__(self, cache_lock, *args, **kwargs):
+        self._cache_lock = cache_lock
+        with cache_lock:
+            super(_WorkerService, self).__init__(*args, **kwargs)
+
+    def call(self, method, *args, **kwargs):
+        with self._cache_lock:
+            return getattr(self, method)(*args, **kwargs)
+
+    def _provider_execute(self, method, *arguments):
+        self._cache_lock.release()
+        try:
+            return super(_WorkerService, self)._provider_execute(method, *arguments)
+        finally:
+            self._cache_lock.acquire()
+
+
 def wallets_list(db_uri=None, include_cosigners=False):
     """
     List Wallets from database
@@ -404,25 +433,27 @@ class HDWalletKey(object):
         script_type = script_type_default(witness_type, multisig)
 
         if not key_is_address:
-            keyexists = session.query(DbKey).\
-                filter(DbKey.wallet_id == wallet_id,
-                       DbKey.wif == k.wif(witness_type=witness_type, multisig=multisig, is_private=True)).first()
+            wif = k.wif(witness_type=witness_type, multisig=multisig, is_private=True)
+            address = k.address(encoding=encoding, script_type=script_type)
+            # Find existing key by WIF, public key or address in one query, each is covered by a unique index
+            wks = session.query(DbKey).filter(
+                DbKey.wallet_id == wallet_id,
+                or_(DbKey.wif == wif,
+                    DbKey.public == k.public_hex,
+                    DbKey.wif == k.wif(witness_type=witness_type, multisig=multisig, is_private=False),
+                    DbKey.address == address)).all()
+            keyexists = [wk for wk in wks if wk.wif == wif]
             if keyexists:
-                _logger.warning("Key already exists in this wallet. Key ID: %d" % keyexists.id)
-                return HDWalletKey(keyexists.id, session, k)
+                _logger.warning("Key already exists in this wallet. Key ID: %d" % keyexists[0].id)
+                return HDWalletKey(keyexists[0].id, session, k)
 
             if key_type != 'single' and k.depth != len(path.split('/'))-1:
                 if path == 'm' and k.depth > 1:
                     path = "M"
 
-            address = k.address(encoding=encoding, script_type=script_type)
-            wk = session.query(DbKey).filter(
-                DbKey.wallet_id == wallet_id,
-                or_(DbKey.public == k.public_hex,
-                    DbKey.wif == k.wif(witness_type=witness_type, multisig=multisig, is_private=False),
-                    DbKey.address == address)).first()
-            if wk:
-                wk.wif = k.wif(witness_type=witness_type, multisig=multisig, is_private=True)
+            if wks:
+                wk = wks[0]
+                wk.wif = wif
                 wk.is_private = True
                 wk.private = k.private_hex
                 wk.public = k.public_hex
@@ -432,7 +463,7 @@ class HDWalletKey(object):
 
             nk = DbKey(name=name, wallet_id=wallet_id, public=k.public_hex, private=k.private_hex, purpose=purpose,
                        account_id=account_id, depth=k.depth, change=change, address_index=k.child_index,
-                       wif=k.wif(witness_type=witness_type, multisig=multisig, is_private=True), address=address,
+                       wif=wif, address=address,
                        parent_id=parent_id, compressed=k.compressed, is_private=k.is_private, path=path,
                        key_type=key_type, network_name=network, encoding=encoding, cosigner_id=cosigner_id)
         else:
@@ -473,7 +504,7 @@ class HDWalletKey(object):
         """
 
         self._session = session
-        wk = session.query(DbKey).filter_by(id=key_id).first()
+        wk = session.query(DbKey).get(key_id)
         if wk:
             self._dbkey = wk
             self._hdkey_object = hdkey_object
@@ -544,9 +575,10 @@ class HDWalletKey(object):
         if self.key_type == 'multisig':
             self._hdkey_object = []
             for kc in self._dbkey.multisig_children:
-                self._hdkey_object.append(HDKey(import_key=kc.child_key.wif, network=kc.child_key.network_name))
+                self._hdkey_object.append(HDKey._from_wif_trusted(kc.child_key.wif, kc.child_key.network_name,
+                                                                  kc.child_key.public))
         if self._hdkey_object is None and self.wif:
-            self._hdkey_object = HDKey(import_key=self.wif, network=self.network_name)
+            self._hdkey_object = HDKey._from_wif_trusted(self.wif, self.network_name, self.key_public)
         return self._hdkey_object
 
     def balance(self, fmt=''):
@@ -755,6 +787,7 @@ class HDWalletTransaction(Transaction):
         :return None:
         """
         priv_key_list_arg = []
+        self._segwit_hashes = {}
         if keys:
             key_paths = list(set([ti.key_path for ti in self.inputs if ti.key_path[0] == 'm']))
             if not isinstance(keys, list):
@@ -817,8 +850,10 @@ class HDWalletTransaction(Transaction):
             self.save()
 
             # Update db: Update spent UTXO's, add transaction to database
+            outpoints = []
             for inp in self.inputs:
                 tx_hash = to_hexstring(inp.prev_hash)
+                outpoints.append((tx_hash, inp.output_n_int))
                 utxos = self.hdwallet._session.query(DbTransactionOutput).join(DbTransaction).\
                     filter(DbTransaction.hash == tx_hash,
                            DbTransactionOutput.output_n == inp.output_n_int,
@@ -827,98 +862,19 @@ class HDWalletTransaction(Transaction):
                     u.spent = True
 
             self.hdwallet._commit()
+            self.hdwallet._utxo_set_remove(outpoints)
             self.hdwallet._balance_update(network=self.network.name)
             return None
         self.error = "Transaction not send, unknown response from service providers"
 
     def save(self):
         """
-        Save this transaction to database
+        Save this transaction to database. Uses :func:`HDWallet.transactions_save` to store the transaction with its
+        inputs and outputs.
 
         :return int: Transaction ID
         """
-
-        sess = self.hdwallet._session
-        # If tx_hash is unknown add it to database, else update
-        db_tx_query = sess.query(DbTransaction). \
-            filter(DbTransaction.wallet_id == self.hdwallet.wallet_id, DbTransaction.hash == self.txid)
-        db_tx = db_tx_query.scalar()
-        if not db_tx:
-            db_tx_query = sess.query(DbTransaction). \
-                filter(DbTransaction.wallet_id.is_(None), DbTransaction.hash == self.txid)
-            db_tx = db_tx_query.first()
-            if db_tx:
-                db_tx.wallet_id = self.hdwallet.wallet_id
-
-        if not db_tx:
-            new_tx = DbTransaction(
-                wallet_id=self.hdwallet.wallet_id, hash=self.txid, block_height=self.block_height,
-                size=self.size, confirmations=self.confirmations, date=self.date, fee=self.fee, status=self.status,
-                input_total=self.input_total, output_total=self.output_total, network_name=self.network.name,
-                block_hash=self.block_hash, raw=to_hexstring(self.rawtx), verified=self.verified)
-            sess.add(new_tx)
-            self.hdwallet._commit()
-            txid = new_tx.id
-        else:
-            txid = db_tx.id
-            db_tx.block_height = self.block_height if self.block_height else db_tx.block_height
-            db_tx.confirmations = self.confirmations if self.confirmations else db_tx.confirmations
-            db_tx.date = self.date if self.date else db_tx.date
-            db_tx.fee = self.fee if self.fee else db_tx.fee
-            db_tx.status = self.status if self.status else db_tx.status
-            db_tx.input_total = self.input_total if self.input_total else db_tx.input_total
-            db_tx.output_total = self.output_total if self.output_total else db_tx.output_total
-            db_tx.network_name = self.network.name if self.network.name else db_tx.name
-            db_tx.raw = to_hexstring(self.rawtx) if self.rawtx else db_tx.raw
-            db_tx.verified = self.verified
-            self.hdwallet._commit()
-
-        assert txid
-        for ti in self.inputs:
-            tx_key = sess.query(DbKey).filter_by(wallet_id=self.hdwallet.wallet_id, address=ti.address).scalar()
-            key_id = None
-            if tx_key:
-                key_id = tx_key.id
-                tx_key.used = True
-            tx_input = sess.query(DbTransactionInput). \
-                filter_by(transaction_id=txid, index_n=ti.index_n).scalar()
-            if not tx_input:
-                new_tx_item = DbTransactionInput(
-                    transaction_id=txid, output_n=ti.output_n_int, key_id=key_id, value=ti.value,
-                    prev_hash=to_hexstring(ti.prev_hash), index_n=ti.index_n, double_spend=ti.double_spend,
-                    script=to_hexstring(ti.unlocking_script), script_type=ti.script_type, witness_type=ti.witness_type,
-                    sequence=ti.sequence, address=ti.address)
-                sess.add(new_tx_item)
-            elif key_id:
-                tx_input.key_id = key_id
-                if ti.value:
-                    tx_input.value = ti.value
-                if ti.prev_hash:
-                    tx_input.prev_hash = to_hexstring(ti.prev_hash)
-                if ti.unlocking_script:
-                    tx_input.script = to_hexstring(ti.unlocking_script)
-
-            self.hdwallet._commit()
-        for to in self.outputs:
-            tx_key = sess.query(DbKey).\
-                filter_by(wallet_id=self.hdwallet.wallet_id, address=to.address).scalar()
-            key_id = None
-            if tx_key:
-                key_id = tx_key.id
-                tx_key.used = True
-            spent = to.spent
-            tx_output = sess.query(DbTransactionOutput). \
-                filter_by(transaction_id=txid, output_n=to.output_n).scalar()
-            if not tx_output:
-                new_tx_item = DbTransactionOutput(
-                    transaction_id=txid, output_n=to.output_n, key_id=key_id, value=to.value, spent=spent,
-                    script=to_hexstring(to.lock_script), script_type=to.script_type)
-                sess.add(new_tx_item)
-            elif key_id:
-                tx_output.key_id = key_id
-                tx_output.spent = spent if spent is not None else tx_output.spent
-            self.hdwallet._commit()
-        return txid
+        return self.hdwallet.transactions_save([self])[0]
 
     def info(self):
         """
@@ -961,6 +917,94 @@ class HDWalletTransaction(Transaction):
         return mut_list
 
 
+class HDWalletUtxoSet(object):
+    """
+    In-memory set of unspent transaction outputs (UTXO's) of a wallet, with balance totals per key and per account.
+
+    Used as attribute of the HDWallet class if the wallet_utxo_cache setting is enabled. The set is loaded from the
+    database once and then updated by the wallet each time it writes transactions or UTXO's to the database. Keys
+    with a changed balance are tracked, so only these keys need to be updated in the database.
+    """
+
+    def __init__(self):
+        self.utxos = {}
+        self.keys = {}
+        self.key_balances = {}
+        self.account_balances = {}
+        self.changed_keys = set()
+
+    def __repr__(self):
+        return "<HDWalletUtxoSet(utxos=%d, keys=%d)>" % (len(self.utxos), len(self.keys))
+
+    def _balance_add(self, utxo, value):
+        key_id = utxo['key_id']
+        key = self.keys[key_id]
+        self.key_balances[key_id] = self.key_balances.get(key_id, 0) + value
+        account = (key['network_name'], key['account_id'])
+        self.account_balances[account] = self.account_balances.get(account, 0) + value
+        self.changed_keys.add(key_id)
+
+    def add(self, utxo, key):
+        """
+        Add unspent output to set, or replace it if an output with the same transaction hash and output_n exists.
+
+        :param utxo: Unspent output dictionary, in the same format as returned by :func:`HDWallet.utxos`
+        :type utxo: dict
+        :param key: Dictionary with account_id, network_name, compressed and public (boolean) of the output's key
+        :type key: dict
+        """
+        self.remove((utxo['tx_hash'], utxo['output_n']))
+        self.keys[utxo['key_id']] = key
+        self.utxos[(utxo['tx_hash'], utxo['output_n'])] = utxo
+        self._balance_add(utxo, utxo['value'])
+
+    def remove(self, outpoint):
+        """
+        Remove spent output from set
+
+        :param outpoint: Tuple with transaction hash and output_n
+        :type outpoint: tuple
+
+        :return dict: Removed unspent output or None if outpoint is not in set
+        """
+        utxo = self.utxos.pop(outpoint, None)
+        if utxo:
+            self._balance_add(utxo, -utxo['value'])
+        return utxo
+
+    def confirmations_update(self, confirmations):
+        """
+        Update number of confirmations of unspent outputs
+
+        :param confirmations: Dictionary with transaction database ID and new number of confirmations
+        :type confirmations: dict
+
+        :return int: Number of updated outputs
+        """
+        count = 0
+        for utxo in self.utxos.values():
+            if utxo['transaction_id'] in confirmations:
+                utxo['confirmations'] = int(confirmations[utxo['transaction_id']] or 0)
+                count += 1
+        return count
+
+    def filter(self, account_id=None, network=None, min_confirms=0, key_id=None):
+        """
+        Get list of unspent outputs with given filters, ordered by number of confirmations descending.
+
+        :return list of dict:
+        """
+        res = []
+        for utxo in self.utxos.values():
+            key = self.keys[utxo['key_id']]
+            if (account_id is not None and key['account_id'] != account_id) or \
+                    (network is not None and key['network_name'] != network) or \
+                    (key_id is not None and utxo['key_id'] != key_id) or utxo['confirmations'] < min_confirms:
+                continue
+            res.append(utxo)
+        return sorted(res, key=lambda u: u['confirmations'], reverse=True)
+
+
 class HDWallet(object):
     """
     Class to create and manage keys Using the BIP0044 Hierarchical Deterministic wallet definitions, so you can
@@ -973,6 +1017,9 @@ class HDWallet(object):
 
     Each wallet name must be unique and can contain only one cointype and purpose, but practically unlimited
     accounts and addresses.
+
+    Set the utxo_cache attribute to True (or enable wallet_utxo_cache in config.ini) to keep the unspent outputs
+    and balances of this wallet in memory. Balance requests and input selection do not query the database then.
     """
 
     @classmethod
@@ -1386,6 +1433,8 @@ class HDWallet(object):
                     self.depth_public_master = self.key_path.index(hardened_keys[-1])
                 self.key_depth = len(self.key_path) - 1
             self.last_updated = None
+            self.utxo_cache = WALLET_UTXO_CACHE
+            self._utxo_set = None
         else:
             raise WalletError("Wallet '%s' not found, please specify correct wallet ID or name." % wallet)
 
@@ -1681,31 +1730,91 @@ class HDWallet(object):
                     return w.import_master_key(hdkey)
             raise WalletError("Unknown key: Can only import a private key for a known public key in multisig wallets")
 
-    def _new_key_multisig(self, public_keys, name, account_id, change, cosigner_id, network, address_index):
+    def import_keys(self, keys, account_id=0, network=None, purpose=44, key_type=None, passphrase='',
+                    max_workers=None):
+        """
+        Add a list of keys to the wallet. Same as calling :func:`import_key` for every key, but slow key conversions
+        are done in bulk and divided over a pool of worker processes first: seeds for Mnemonic passphrases are created
+        with :func:`Mnemonic.to_seeds` and BIP0038 encrypted keys are decrypted with :func:`Key.bip38_decrypt_many`.
+
+        :param keys: List of keys to import
+        :type keys: list of str, bytes, int, bytearray, HDKey, Address
+        :param account_id: Account ID. Default is last used or created account ID.
+        :type account_id: int
+        :param network: Network name, method will try to extract from key if not specified. Mnemonic passphrases and BIP0038 encrypted keys use the wallet's network if not specified
+        :type network: str
+        :param purpose: BIP definition used, default is BIP44
+        :type purpose: int
+        :param key_type: Key type of imported keys, see :func:`import_key`
+        :type key_type: str
+        :param passphrase: Passphrase to decrypt BIP0038 encrypted keys
+        :type passphrase: str
+        :param max_workers: Number of worker processes. Leave empty to use the max_workers setting from config, 1 disables the process pool
+        :type max_workers: int
+
+        :return list of HDWalletKey:
+        """
+
+        network_name = network if network else self.network.name
+        import_keys = list(keys)
+        mnemonics = []
+        encrypted_keys = []
+        for n, key in enumerate(import_keys):
+            if not isinstance(key, TYPE_TEXT):
+                continue
+            if len(key.split(" ")) > 1:
+                mnemonics.append(n)
+            elif key[:2] == '6P' and get_key_format(key)['format'] == 'wif_protected':
+                encrypted_keys.append(n)
+        seeds = Mnemonic().to_seeds([import_keys[n] for n in mnemonics], max_workers=max_workers)
+        for n, seed in zip(mnemonics, seeds):
+            import_keys[n] = HDKey.from_seed(seed, network=network_name)
+        decrypted_keys = Key.bip38_decrypt_many([import_keys[n] for n in encrypted_keys], passphrase,
+                                                network=network_name, max_workers=max_workers)
+        for n, key in zip(encrypted_keys, decrypted_keys):
+            import_keys[n] = HDKey(key, network=network_name)
+        return [self.import_key(key, account_id=account_id, network=network, purpose=purpose, key_type=key_type)
+                for key in import_keys]
+
+    def _multisig_key_dict(self, public_keys, name, account_id, change, cosigner_id, network, address_index):
+        """
+        Create dictionary with database fields of a multisig key for given list of cosigner public keys.
+
+        :return tuple: Dictionary with DbKey fields and list of cosigner public key IDs in key order
+        """
         if self.sort_keys:
             public_keys.sort(key=lambda pubk: pubk.key_public)
         public_key_list = [pubk.key_public for pubk in public_keys]
         public_key_ids = [str(x.key_id) for x in public_keys]
 
-        # Calculate redeemscript and address and add multisig key to database
+        # Calculate redeemscript and address
         redeemscript = serialize_multisig_redeemscript(public_key_list, n_required=self.multisig_n_required)
         script_type = 'p2sh'
         if self.witness_type == 'p2sh-segwit':
             script_type = 'p2sh_p2wsh'
         address = Address(redeemscript, encoding=self.encoding, script_type=script_type, network=network).address
-        already_found_key = self._session.query(DbKey).filter_by(wallet_id=self.wallet_id, address=address).first()
-        if already_found_key:
-            return self.key(already_found_key.id)
         path = [pubk.path for pubk in public_keys if pubk.wallet.cosigner_id == self.cosigner_id][0]
         depth = self.cosigner[self.cosigner_id].main_key.depth + len(path.split("/")) - 1
         if not name:
             name = "Multisig Key " + '/'.join(public_key_ids)
+        key_dict = {
+            'name': name, 'wallet_id': self.wallet_id, 'purpose': self.purpose, 'account_id': account_id,
+            'depth': depth, 'change': change, 'address_index': address_index, 'parent_id': 0, 'is_private': False,
+            'path': path, 'public': to_hexstring(redeemscript), 'wif': 'multisig-%s' % address, 'address': address,
+            'cosigner_id': cosigner_id, 'key_type': 'multisig', 'network_name': network
+        }
+        return key_dict, public_key_ids
 
-        multisig_key = DbKey(
-            name=name, wallet_id=self.wallet_id, purpose=self.purpose, account_id=account_id,
-            depth=depth, change=change, address_index=address_index, parent_id=0, is_private=False, path=path,
-            public=to_hexstring(redeemscript), wif='multisig-%s' % address, address=address, cosigner_id=cosigner_id,
-            key_type='multisig', network_name=network)
+    def _new_key_multisig(self, public_keys, name, account_id, change, cosigner_id, network, address_index):
+        key_dict, public_key_ids = self._multisig_key_dict(public_keys, name, account_id, change, cosigner_id,
+                                                           network, address_index)
+        already_found_key = self._session.query(DbKey).\
+            filter_by(wallet_id=self.wallet_id, address=key_dict['address']).first()
+        if already_found_key:
+            return self.key(already_found_key.id)
+
+        # Add multisig key to database
+        multisig_key = DbKey(**key_dict)
         self._session.add(multisig_key)
         self._commit()
         for child_id in public_key_ids:
@@ -1782,6 +1891,153 @@ class HDWallet(object):
 
         return self.new_key(name=name, account_id=account_id, network=network, change=1)
 
+    def new_keys(self, count, account_id=None, change=0, cosigner_id=None, network=None):
+        """
+        Create a list of new HD Keys with sequential address indexes. Same as calling :func:`new_key` count times,
+        but all keys are derived from the same parent key in one pass and added to the database with bulk inserts
+        and a single commit.
+
+        For multisig wallets the public keys of each cosigner are derived in bulk as well.
+
+        >>> w = HDWallet('create_legacy_wallet_test')
+        >>> w.new_keys(2) # doctest:+ELLIPSIS
+        [<HDWalletKey(key_id=..., name=address index ..., wif=..., path=m/44'/0'/0'/0/...)>, <HDWalletKey(...)>]
+
+        :param count: Number of keys to create
+        :type count: int
+        :param account_id: Account ID. Default is last used or created account ID.
+        :type account_id: int
+        :param change: Change (1) or payments (0). Default is 0
+        :type change: int
+        :param cosigner_id: Cosigner ID for key path
+        :type cosigner_id: int
+        :param network: Network name. Leave empty for default network
+        :type network: str
+
+        :return list of HDWalletKey:
+        """
+
+        if count < 1:
+            return []
+        if self.scheme == 'single':
+            return [self.main_key] * count
+
+        network, account_id, _ = self._get_account_defaults(network, account_id)
+        if network != self.network.name and "coin_type'" not in self.key_path:
+            raise WalletError("Multiple networks not supported by wallet key structure")
+        if self.multisig:
+            if not self.multisig_n_required:
+                raise WalletError("Multisig_n_required not set, cannot create new key")
+            if cosigner_id is None:
+                if self.cosigner_id is None:
+                    raise WalletError("Missing Cosigner ID value, cannot create new key")
+                cosigner_id = self.cosigner_id
+            if cosigner_id is not None and (len(self.cosigner) > cosigner_id and
+                                            self.cosigner[cosigner_id].key_path == 'm' or
+                                            self.cosigner[cosigner_id].key_path == ['m']):
+                return [self.new_key(account_id=account_id, change=change, cosigner_id=cosigner_id, network=network)
+                        for _ in range(count)]
+
+        address_index = 0
+        prevkey = self._session.query(DbKey.address_index).\
+            filter_by(wallet_id=self.wallet_id, purpose=self.purpose, network_name=network, account_id=account_id,
+                      change=change, cosigner_id=cosigner_id, depth=self.key_depth).\
+            order_by(DbKey.address_index.desc()).first()
+        if prevkey:
+            address_index = prevkey[0] + 1
+
+        if not (self.multisig and self.cosigner):
+            return self._new_keys_bulk(count, account_id, change, cosigner_id, network, address_index)
+
+        cosigner_keys = []
+        for wlt in self.cosigner:
+            if wlt.scheme == 'single':
+                cosigner_keys.append([wlt.main_key] * count)
+            else:
+                cosigner_keys.append(wlt._new_keys_bulk(count, account_id, change, cosigner_id, network,
+                                                        address_index))
+        key_dicts = []
+        children = []
+        for n in range(count):
+            key_dict, public_key_ids = self._multisig_key_dict(
+                [keys[n] for keys in cosigner_keys], '', account_id, change, cosigner_id, network, address_index + n)
+            key_dicts.append(key_dict)
+            children.append(public_key_ids)
+        return self._keys_bulk_insert(key_dicts, children=children)
+
+    def _new_keys_bulk(self, count, account_id, change, cosigner_id, network, address_index):
+        """
+        Derive keys with path [change, address_index] for count sequential address indexes and add them to the
+        database. The first key is created with :func:`key_for_path` to create all missing parent keys, the other
+        keys are derived from the same parent key.
+
+        :return list of HDWalletKey:
+        """
+        first_key = self.key_for_path([change, address_index], account_id=account_id, cosigner_id=cosigner_id,
+                                      network=network, address_index=address_index)
+        if count == 1:
+            return [first_key]
+        parent_key = self.key(first_key.parent_id)
+        parent_hdkey = parent_key.key()
+        level_name = self.key_path[len(first_key.path.split('/')) - 1].replace("'", "").replace("_", " ")
+        encoding = self.encoding or get_encoding_from_witness(self.witness_type)
+        script_type = script_type_default(self.witness_type, False)
+        key_dicts = []
+        hdkeys = {}
+        for index in range(address_index + 1, address_index + count):
+            k = parent_hdkey.subkey_for_path(str(index), network=network)
+            address = k.address(encoding=encoding, script_type=script_type)
+            hdkeys[address] = k
+            key_dicts.append({
+                'name': "%s %d" % (level_name, index), 'wallet_id': self.wallet_id, 'public': k.public_hex,
+                'private': k.private_hex, 'purpose': self.purpose, 'account_id': first_key.account_id,
+                'depth': k.depth, 'change': first_key.change, 'address_index': k.child_index,
+                'wif': k.wif(witness_type=self.witness_type, multisig=False, is_private=True), 'address': address,
+                'parent_id': parent_key.key_id, 'compressed': k.compressed, 'is_private': k.is_private,
+                'path': '%s/%d' % (parent_key.path, index), 'network_name': network,
+                'encoding': encoding, 'cosigner_id': cosigner_id
+            })
+        return [first_key] + self._keys_bulk_insert(key_dicts, hdkeys)
+
+    def _keys_bulk_insert(self, key_dicts, hdkeys=None, children=None):
+        """
+        Add keys to the database with a bulk insert and one commit. Keys with an address which is already in this
+        wallet are not added again.
+
+        :param key_dicts: List of dictionaries with DbKey fields
+        :type key_dicts: list of dict
+        :param hdkeys: Dictionary with address and HDKey object, used to initialise the HDWalletKey objects
+        :type hdkeys: dict
+        :param children: List with list of child key IDs for each multisig key
+        :type children: list of list
+
+        :return list of HDWalletKey: Keys in the same order as key_dicts
+        """
+        hdkeys = hdkeys or {}
+        addresses = [kd['address'] for kd in key_dicts]
+        existing = self.keys_by_address(addresses)
+        new_keys = [kd for kd in key_dicts if kd['address'] not in existing]
+        if new_keys:
+            self._session.merge(DbNetwork(name=new_keys[0]['network_name']))
+            self._session.bulk_insert_mappings(DbKey, new_keys)
+            if children:
+                self._session.flush()
+                dbkeys = self.keys_by_address([kd['address'] for kd in new_keys])
+                self._session.bulk_insert_mappings(DbKeyMultisigChildren, [
+                    {'key_order': key_order, 'parent_id': dbkeys[kd['address']].id, 'child_id': int(child_id)}
+                    for kd, child_ids in zip(key_dicts, children) if kd['address'] not in existing
+                    for key_order, child_id in enumerate(child_ids)])
+            self._commit()
+        dbkeys = self.keys_by_address(addresses)
+        wallet_keys = []
+        for address in addresses:
+            key_id = dbkeys[address].id
+            if key_id not in self._key_objects:
+                self._key_objects[key_id] = HDWalletKey(key_id, self._session, hdkeys.get(address))
+            wallet_keys.append(self._key_objects[key_id])
+        _logger.info("Added %d new keys to wallet %s" % (len(new_keys), self.name))
+        return wallet_keys
+
     def scan_key(self, key):
         if isinstance(key, int):
             key = self.key(key)
@@ -1800,12 +2056,64 @@ class HDWallet(object):
             txs_found = True
         return txs_found
 
-    def scan(self, scan_gap_limit=5, account_id=None, change=None, rescan_used=False, network=None, keys_ignore=None):
+    def _scan_keys(self, keys, network, max_workers=None, srv=None):
+        """
+        Scan list of keys for new transactions and return the keys with transactions.
+
+        The number of transactions of all addresses is requested first with :func:`Service.gettxcounts`, which
+        sends one request for multiple addresses to service providers which support this, so transactions are only
+        requested for used addresses. Transactions are requested with :func:`_transactions_update_addresses`, and
+        addresses with more transactions than fit in 1 request are requested again until all transactions are found.
+
+        Balances are not updated, call :func:`_balance_update` after scanning.
+
+        :param keys: List of HDWalletKey objects
+        :type keys: list of HDWalletKey
+        :param network: Network name
+        :type network: str
+        :param max_workers: Number of threads used to request transactions, see :func:`_service_map`
+        :type max_workers: int
+        :param srv: Service object used to request the number of transactions per address. Leave empty to create a new one
+        :type srv: Service
+
+        :return list of HDWalletKey:
+        """
+        if not keys:
+            return []
+        if srv is None:
+            srv = Service(network=network, providers=self.providers, cache_uri=self.db_cache_uri)
+        addresslist = [k.address for k in keys]
+        txcounts = srv.gettxcounts(addresslist)
+        if txcounts:
+            addresslist = [address for address in addresslist if txcounts.get(address, 1)]
+        if not addresslist:
+            return []
+        _, txs_per_address, _ = self._transactions_update_addresses(network, addresslist, max_workers=max_workers)
+
+        # Keep requesting transactions for addresses with more transactions than fit in 1 request
+        addresses_incomplete = [a for a in txs_per_address if txs_per_address[a] >= MAX_TRANSACTIONS]
+        while addresses_incomplete:
+            latest_txids = dict([(a, k.latest_txid) for a, k in self.keys_by_address(addresses_incomplete).items()])
+            _, txs_more, _ = self._transactions_update_addresses(network, addresses_incomplete,
+                                                                 max_workers=max_workers)
+            keys_updated = self.keys_by_address(addresses_incomplete)
+            for address in txs_more:
+                txs_per_address[address] += txs_more[address]
+            addresses_incomplete = [a for a in txs_more if txs_more[a] >= MAX_TRANSACTIONS and
+                                    a in keys_updated and keys_updated[a].latest_txid != latest_txids.get(a)]
+            _logger.info("Scanning %d addresses with more than %d transactions" %
+                         (len(addresses_incomplete), MAX_TRANSACTIONS))
+        return [key for key in keys if txs_per_address.get(key.address)]
+
+    def scan(self, scan_gap_limit=5, account_id=None, change=None, rescan_used=False, network=None, keys_ignore=None,
+             max_workers=None):
         """
         Generate new addresses/keys and scan for new transactions using the Service providers. Updates all UTXO's and balances.
 
         Keep scanning for new transactions until no new transactions are found for 'scan_gap_limit' addresses. Only scan keys from default network and account unless another network or account is specified.
 
+        Keys are created in bulk for a window of 'scan_gap_limit' unused addresses, and the window is moved forward after the last used address found. If a service provider supports requests for multiple addresses, one request is used to check which addresses in the window have transactions. Balances are updated once when scanning is finished.
+
         Use the faster :func:`utxos_update` method if you are only interested in unspent outputs.
         Use the :func:`transactions_update` method if you would like to manage the key creation yourself or if you want to scan a single key.
 
@@ -1821,6 +2129,8 @@ class HDWallet(object):
         :type network: str
         :param keys_ignore: Id's of keys to ignore
         :type keys_ignore: list of int
+        :param max_workers: Number of threads used to scan addresses concurrently. Default is service_sync_workers from config.ini, use 1 to scan addresses one by one
+        :type max_workers: int
 
         :return:
         """
@@ -1831,22 +2141,16 @@ class HDWallet(object):
         if keys_ignore is None:
             keys_ignore = []
 
+        srv = Service(network=network, providers=self.providers, cache_uri=self.db_cache_uri)
+
         # Rescan used addresses
         if rescan_used:
-            for key in self.keys_addresses(account_id=account_id, change=change, network=network, used=True):
-                self.scan_key(key.id)
+            keys_used = [self.key(k.id) for k in
+                         self.keys_addresses(account_id=account_id, change=change, network=network, used=True)]
+            self._scan_keys(keys_used, network, max_workers, srv)
 
         # Update already known transactions
-        srv = Service(network=network, providers=self.providers, cache_uri=self.db_cache_uri)
-        blockcount = srv.blockcount()
-        db_txs = self._session.query(DbTransaction). \
-            filter(DbTransaction.wallet_id == self.wallet_id,
-                   DbTransaction.network_name == network, DbTransaction.block_height > 0).all()
-        for db_tx in db_txs:
-            self._session.query(DbTransaction).filter_by(id=db_tx.id). \
-                update({DbTransaction.status: 'confirmed',
-                        DbTransaction.confirmations: blockcount - DbTransaction.block_height})
-        self._commit()
+        self._transactions_confirmations_update(network, srv.blockcount())
 
         # Scan each key address, stop when no new transactions are found after set scan gap limit
         if change is None:
@@ -1864,24 +2168,23 @@ class HDWallet(object):
                 if isinstance(keys_to_scan, HDWalletKey):
                     keys_to_scan = [keys_to_scan]
                 n_highest_updated = 0
-                for key in keys_to_scan:
-                    if key.key_id in keys_ignore:
-                        continue
-                    keys_ignore.append(key.key_id)
-                    n_high_new = 0
-                    if self.scan_key(key):
-                        if not key.address_index:
-                            key.address_index = 0
-                        n_high_new = key.address_index + 1
+                keys_to_scan = [key for key in keys_to_scan if key.key_id not in keys_ignore]
+                keys_ignore += [key.key_id for key in keys_to_scan]
+                for key in self._scan_keys(keys_to_scan, network, max_workers, srv):
+                    if not key.address_index:
+                        key.address_index = 0
+                    n_high_new = key.address_index + 1
                     if n_high_new > n_highest_updated:
                         n_highest_updated = n_high_new
                 if not n_highest_updated:
                     break
+        self._balance_update(account_id=account_id, network=network)
 
     def get_key(self, account_id=None, network=None, cosigner_id=None, number_of_keys=1, change=0):
         """
         Get a unused key or create a new one with :func:`new_key` if there are no unused keys.
-        Returns a key from this wallet which has no transactions linked to it.
+        Returns a key from this wallet which has no transactions linked to it. If more than one new key is needed
+        the keys are created with :func:`new_keys`.
 
         >>> w = HDWallet('create_legacy_wallet_test')
         >>> w.get_key() # doctest:+ELLIPSIS
@@ -1921,13 +2224,16 @@ class HDWallet(object):
         if self.cosigner and cosigner_id > len(self.cosigner):
             raise WalletError("Cosigner ID (%d) can not be greater then number of cosigners for this wallet (%d)" %
                               (cosigner_id, len(self.cosigner)))
-        for i in range(number_of_keys):
-            if dbkey:
-                dk = dbkey.pop()
-                nk = self.key(dk.id)
+        while dbkey and len(key_list) < number_of_keys:
+            dk = dbkey.pop()
+            key_list.append(self.key(dk.id))
+        if len(key_list) < number_of_keys:
+            if number_of_keys - len(key_list) == 1:
+                key_list.append(self.new_key(account_id=account_id, change=change, cosigner_id=cosigner_id,
+                                             network=network))
             else:
-                nk = self.new_key(account_id=account_id, change=change, cosigner_id=cosigner_id, network=network)
-            key_list.append(nk)
+                key_list += self.new_keys(number_of_keys - len(key_list), account_id=account_id, change=change,
+                                          cosigner_id=cosigner_id, network=network)
         if len(key_list) == 1:
             return key_list[0]
         else:
@@ -2396,6 +2702,28 @@ class HDWallet(object):
             addresslist.append(key.address)
         return addresslist
 
+    def keys_by_address(self, addresses):
+        """
+        Get keys of this wallet for a list of addresses. The addresses are resolved with one query per 500 addresses
+        instead of a query for every address.
+
+        >>> w = HDWallet('bitcoinlib_legacy_wallet_test')
+        >>> w.keys_by_address(['16QaHuFkfuebXGcYHmehRXBBX7RG9NbtLg']) # doctest:+ELLIPSIS
+        {'16QaHuFkfuebXGcYHmehRXBBX7RG9NbtLg': <DbKey(id=..., name=..., wif=...>}
+
+        :param addresses: List of address strings
+        :type addresses: list of str
+
+        :return dict: Dictionary with address as key and DbKey object as value. Addresses which are not found in this wallet are not included
+        """
+        addresses = list(set(addresses))
+        keys = {}
+        for n in range(0, len(addresses), 500):
+            for key in self._session.query(DbKey).\
+                    filter(DbKey.wallet_id == self.wallet_id, DbKey.address.in_(addresses[n:n + 500])):
+                keys[key.address] = key
+        return keys
+
     def key(self, term):
         """
         Return single key with given ID or name as HDWalletKey object
@@ -2502,9 +2830,7 @@ class HDWallet(object):
         nw_list = list(set(nw_list))
         for nw in nw_list:
             if as_dict:
-                nw = nw.__dict__
-                if '_sa_instance_state' in nw:
-                    del nw['_sa_instance_state']
+                nw = nw.as_dict()
             networks.append(nw)
 
         return networks
@@ -2523,6 +2849,99 @@ class HDWallet(object):
 
         return [getattr(x, field) for x in self.networks()]
 
+    def _utxo_set_query(self):
+        return self._session.query(
+            DbTransactionOutput.transaction_id, DbTransactionOutput.output_n, DbTransactionOutput.key_id,
+            DbTransactionOutput.script, DbTransactionOutput.script_type, DbTransactionOutput.value,
+            DbTransactionOutput.spent, DbTransactionOutput.spending_txid, DbTransactionOutput.spending_index_n,
+            DbKey.address, DbTransaction.confirmations, DbTransaction.hash, DbKey.network_name, DbKey.account_id,
+            DbKey.compressed, DbKey.public).\
+            join(DbTransaction).join(DbKey).filter(DbTransaction.wallet_id == self.wallet_id)
+
+    def _utxo_set_add(self, utxo_set, row):
+        utxo = {
+            'transaction_id': row[0],
+            'output_n': row[1],
+            'key_id': row[2],
+            'script': row[3],
+            'script_type': row[4],
+            'value': row[5],
+            'spent': False,
+            'spending_txid': row[7],
+            'spending_index_n': row[8],
+            'address': row[9],
+            'confirmations': int(row[10] or 0),
+            'tx_hash': row[11],
+            'network_name': row[12],
+        }
+        utxo_set.add(utxo, {'account_id': row[13], 'network_name': row[12], 'compressed': row[14],
+                            'public': bool(row[15])})
+
+    def _utxo_set_get(self):
+        """
+        Get in-memory UTXO set of this wallet. The set is loaded from the database with a single query on first use.
+
+        :return HDWalletUtxoSet: UTXO set or None if the utxo_cache attribute of this wallet is False
+        """
+        if not self.utxo_cache:
+            return None
+        if self._utxo_set is None:
+            utxo_set = HDWalletUtxoSet()
+            for row in self._utxo_set_query().filter(DbTransactionOutput.spent.is_(False)):
+                self._utxo_set_add(utxo_set, row)
+            # Only keys with a balance in the database which differs from the UTXO set need to be updated
+            utxo_set.changed_keys = set([
+                key_id for key_id, balance in self._session.query(DbKey.id, DbKey.balance).
+                filter(DbKey.wallet_id == self.wallet_id)
+                if (balance or 0) != utxo_set.key_balances.get(key_id, 0)])
+            self._utxo_set = utxo_set
+            _logger.info("Loaded UTXO set with %d outputs for wallet %s" % (len(utxo_set.utxos), self.name))
+        return self._utxo_set
+
+    def _utxo_set_update(self, transaction_ids):
+        """
+        Update in-memory UTXO set with the outputs of given transactions after they have been written to the
+        database. Does nothing if the UTXO set is not loaded.
+
+        :param transaction_ids: List of transaction database IDs
+        :type transaction_ids: list of int
+        """
+        if self._utxo_set is None:
+            return
+        transaction_ids = list(set(transaction_ids))
+        for n in range(0, len(transaction_ids), 500):
+            for row in self._utxo_set_query().filter(DbTransaction.id.in_(transaction_ids[n:n + 500])):
+                if row[6]:
+                    self._utxo_set.remove((row[11], row[1]))
+                else:
+                    self._utxo_set_add(self._utxo_set, row)
+
+    def _utxo_set_remove(self, outpoints):
+        """
+        Remove spent outputs from in-memory UTXO set. Does nothing if the UTXO set is not loaded.
+
+        :param outpoints: List of (transaction hash, output_n) tuples
+        :type outpoints: list of tuple
+        """
+        if self._utxo_set is None:
+            return
+        for outpoint in outpoints:
+            self._utxo_set.remove(outpoint)
+
+    def _utxo_set_confirmations_update(self):
+        """
+        Read number of confirmations of transactions with outputs in in-memory UTXO set from the database. Does
+        nothing if the UTXO set is not loaded.
+        """
+        if self._utxo_set is None:
+            return
+        transaction_ids = list(set([u['transaction_id'] for u in self._utxo_set.utxos.values()]))
+        confirmations = {}
+        for n in range(0, len(transaction_ids), 500):
+            confirmations.update(self._session.query(DbTransaction.id, DbTransaction.confirmations).
+                                 filter(DbTransaction.id.in_(transaction_ids[n:n + 500])).all())
+        self._utxo_set.confirmations_update(confirmations)
+
     def balance_update_from_serviceprovider(self, account_id=None, network=None):
         """
         Update balance of currents account addresses using default Service objects :func:`getbalance` method. Update total
@@ -2602,6 +3021,10 @@ class HDWallet(object):
         :return: Updated balance
         """
 
+        utxo_set = self._utxo_set_get()
+        if utxo_set is not None and not min_confirms:
+            return self._balance_update_from_utxo_set(utxo_set, account_id, network, key_id)
+
         qr = self._session.query(DbTransactionOutput, func.sum(DbTransactionOutput.value), DbKey.network_name,
                                  DbKey.account_id).\
             join(DbTransaction).join(DbKey). \
@@ -2674,8 +3097,90 @@ class HDWallet(object):
         _logger.info("Got balance for %d key(s)" % len(key_balance_list))
         return self._balances
 
+    def _balance_update_from_utxo_set(self, utxo_set, account_id=None, network=None, key_id=None):
+        """
+        Update balance from in-memory UTXO set. Same as :func:`_balance_update` but uses the balance totals of the
+        UTXO set and only writes the balance of keys which changed since the last update to the database.
+
+        :return: Updated balance
+        """
+        if not key_id:
+            for (nw, acc_id), balance in utxo_set.account_balances.items():
+                if (account_id is not None and acc_id != account_id) or (network is not None and nw != network):
+                    continue
+                bl_item = [b for b in self._balances if b['network'] == nw and b['account_id'] == acc_id]
+                if bl_item:
+                    bl_item[0]['balance'] = balance
+                else:
+                    self._balances.append({'network': nw, 'account_id': acc_id, 'balance': balance})
+            self._balance = sum([balance for (nw, acc_id), balance in utxo_set.account_balances.items()
+                                 if nw == self.network.name and (account_id is None or acc_id == account_id)])
+        else:
+            self._balance = utxo_set.key_balances.get(key_id, 0)
+
+        key_balance_list = [{'id': k, 'balance': utxo_set.key_balances.get(k, 0)} for k in utxo_set.changed_keys]
+        if key_balance_list:
+            self._session.bulk_update_mappings(DbKey, key_balance_list)
+            self._commit()
+        utxo_set.changed_keys = set()
+        _logger.info("Got balance for %d key(s) from UTXO set" % len(key_balance_list))
+        return self._balances
+
+    def _service_map(self, network, method, requests, max_workers=None):
+        """
+        Call a Service method for a list of addresses. Returns a generator with a (address, result, complete, errors)
+        tuple for each address, where complete is False if the service provider did not return all results.
+
+        If more than 1 worker is used the requests are send concurrently from a pool of threads, each thread with its
+        own Service object. The threads take turns to use the database cache, so only the requests to the service
+        providers run at the same time. The number of requests per service provider can be limited with the
+        service_rate_limit setting. Results are returned in order of arrival to the calling thread, so the wallet
+        database is still updated by a single writer. On Python 2 requests are always send one by one.
+
+        :param network: Network name
+        :type network: str
+        :param method: Name of Service method, i.e. 'gettransactions' or 'getutxos'
+        :type method: str
+        :param requests: List of tuples with an address and a dictionary with keyword arguments for the method
+        :type requests: list of tuple
+        :param max_workers: Number of threads, default is service_sync_workers from config.ini. Use 1 to send requests one by one
+        :type max_workers: int
+
+        :return generator:
+        """
+        if max_workers is None:
+            max_workers = SERVICE_SYNC_WORKERS
+        if not PY3 or max_workers <= 1 or len(requests) <= 1:
+            srv = Service(network=network, providers=self.providers, cache_uri=self.db_cache_uri)
+            for address, kwargs in requests:
+                res = getattr(srv, method)(address, **kwargs)
+                yield address, res, srv.complete, srv.errors
+            return
+
+        local = threading.local()
+        cache_lock = threading.Lock()
+
+        def request(address, kwargs):
+            srv = getattr(local, 'srv', None)
+            if srv is None:
+                srv = local.srv = _WorkerService(cache_lock, network=network, providers=self.providers,
+                                                 cache_uri=self.db_cache_uri)
+            res = srv.call(method, address, **kwargs)
+            return address, res, srv.complete, dict(srv.errors)
+
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(requests)))
+        futures = []
+        try:
+            futures = [executor.submit(request, address, kwargs) for address, kwargs in requests]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
     def utxos_update(self, account_id=None, used=None, networks=None, key_id=None, depth=None, change=None,
-                     utxos=None, update_balance=True, max_utxos=MAX_TRANSACTIONS, rescan_all=True):
+                     utxos=None, update_balance=True, max_utxos=MAX_TRANSACTIONS, rescan_all=True, max_workers=None):
         """
         Update UTXO's (Unspent Outputs) for addresses/keys in this wallet using various Service providers.
 
@@ -2713,6 +3218,8 @@ class HDWallet(object):
         :type max_utxos: int
         :param rescan_all: Remove old utxo's and rescan wallet. Default is True. Set to False if you work with large utxo's sets. Value will be ignored if key_id is specified in your call
         :type rescan_all: bool
+        :param max_workers: Number of threads used to request UTXO's for addresses concurrently. Default is service_sync_workers from config.ini, use 1 to update addresses one by one
+        :type max_workers: int
 
         :return int: Number of new UTXO's added
         """
@@ -2733,6 +3240,7 @@ class HDWallet(object):
             raise WalletError("Please specify maximum 1 network when passing utxo's")
 
         # Remove current UTXO's
+        updated_tx_ids = []
         if rescan_all:
             cur_utxos = self._session.query(DbTransactionOutput).\
                 join(DbTransaction).join(DbKey). \
@@ -2740,6 +3248,7 @@ class HDWallet(object):
                        DbKey.account_id == account_id,
                        DbTransaction.wallet_id == self.wallet_id).all()
             for u in cur_utxos:
+                updated_tx_ids.append(u.transaction_id)
                 self._session.query(DbTransactionOutput).filter_by(
                     transaction_id=u.transaction_id, output_n=u.output_n).update({DbTransactionOutput.spent: True})
             self._commit()
@@ -2758,30 +3267,31 @@ class HDWallet(object):
                     addresslist = self.addresslist(account_id=account_id, used=used, network=network, key_id=key_id,
                                                    change=change, depth=depth)
                     random.shuffle(addresslist)
-                    srv = Service(network=network, providers=self.providers, cache_uri=self.db_cache_uri)
+                    requests = [(address, {'after_txid': '' if rescan_all else self.utxo_last(address),
+                                           'limit': max_utxos}) for address in addresslist]
                     utxos = []
-                    for address in addresslist:
-                        if rescan_all:
-                            last_txid = ''
-                        else:
-                            last_txid = self.utxo_last(address)
-                        new_utxos = srv.getutxos(address, after_txid=last_txid, limit=max_utxos)
+                    complete = None
+                    for _, new_utxos, srv_complete, srv_errors in \
+                            self._service_map(network, 'getutxos', requests, max_workers):
                         if new_utxos:
                             utxos += new_utxos
                         elif new_utxos is False:
                             raise WalletError("No response from any service provider, could not update UTXO's. "
-                                              "Errors: %s" % srv.errors)
-                    if srv.complete:
+                                              "Errors: %s" % srv_errors)
+                        complete = srv_complete if complete is None else complete and srv_complete
+                    if complete:
                         self.last_updated = datetime.now()
                     elif utxos and 'date' in utxos[-1:][0]:
                         self.last_updated = utxos[-1:][0]['date']
 
                 # If UTXO is new, add to database otherwise update depth (confirmation count)
-                for utxo in utxos:
+                keys = {}
+                if not single_key:
+                    keys = self.keys_by_address([utxo['address'] for utxo in utxos])
+                for utxo_n, utxo in enumerate(utxos, 1):
                     key = single_key
                     if not single_key:
-                        key = self._session.query(DbKey).\
-                            filter_by(wallet_id=self.wallet_id, address=utxo['address']).scalar()
+                        key = keys.get(utxo['address'])
                     if not key:
                         raise WalletError("Key with address %s not found in this wallet" % utxo['address'])
                     key.used = True
@@ -2802,6 +3312,7 @@ class HDWallet(object):
                                DbTransactionInput.output_n == utxo['output_n'])
                     if utxo_in_db.count():
                         utxo_record = utxo_in_db.scalar()
+                        updated_tx_ids.append(utxo_record.transaction_id)
                         if not utxo_record.key_id:
                             count_utxos += 1
                         utxo_record.key_id = key.id
@@ -2820,7 +3331,7 @@ class HDWallet(object):
                                                    block_height=block_height,
                                                    confirmations=utxo['confirmations'], network_name=self.network.name)
                             self._session.add(new_tx)
-                            self._commit()
+                            self._session.flush()
                             tid = new_tx.id
                         else:
                             tid = transaction_in_db.scalar().id
@@ -2833,12 +3344,16 @@ class HDWallet(object):
                                                        script_type=script_type,
                                                        spent=bool(spent_in_db.count()))
                         self._session.add(new_utxo)
+                        updated_tx_ids.append(tid)
                         count_utxos += 1
 
-                    self._commit()
+                    if not utxo_n % SERVICE_SYNC_BATCH_SIZE:
+                        self._commit()
 
                 _logger.info("Got %d new UTXOs for account %s" % (count_utxos, account_id))
                 self._commit()
+                self._utxo_set_update(updated_tx_ids)
+                updated_tx_ids = []
                 if update_balance:
                     self._balance_update(account_id=account_id, network=network, key_id=key_id, min_confirms=0)
                 utxos = None
@@ -2866,6 +3381,10 @@ class HDWallet(object):
 
         network, account_id, acckey = self._get_account_defaults(network, account_id, key_id)
 
+        utxo_set = self._utxo_set_get()
+        if utxo_set is not None:
+            return [dict(u) for u in utxo_set.filter(account_id, network, min_confirms, key_id)]
+
         qr = self._session.query(DbTransactionOutput, DbKey.address, DbTransaction.confirmations, DbTransaction.hash,
                                  DbKey.network_name).\
             join(DbTransaction).join(DbKey). \
@@ -2944,6 +3463,136 @@ class HDWallet(object):
             order_by(DbTransaction.confirmations).first()
         return '' if not to else to[0]
 
+    def transactions_save(self, txs, batch_size=None):
+        """
+        Save a list of transactions to the database. Transactions are stored in batches: for each batch existing
+        transactions and keys are looked up with a single query, new inputs and outputs are inserted in bulk and
+        changes are committed once.
+
+        Transactions which are already in the database are updated, inputs and outputs are linked to wallet keys if
+        possible.
+
+        :param txs: List of Transaction or HDWalletTransaction objects
+        :type txs: list of Transaction
+        :param batch_size: Number of transactions to save per commit. Default is service_sync_batch_size from config.ini
+        :type batch_size: int
+
+        :return list of int: List of transaction database IDs in the same order as the provided transactions
+        """
+        if batch_size is None:
+            batch_size = SERVICE_SYNC_BATCH_SIZE
+        batch_size = max(batch_size, 1)
+        tx_ids = []
+        for n in range(0, len(txs), batch_size):
+            batch_tx_ids = self._transactions_save_batch(txs[n:n + batch_size])
+            self._commit()
+            self._utxo_set_update(batch_tx_ids)
+            tx_ids += batch_tx_ids
+        return tx_ids
+
+    def _transactions_save_batch(self, txs):
+        """
+        Add or update transactions with inputs and outputs in the current database session, without committing.
+
+        :param txs: List of Transaction objects
+        :type txs: list of Transaction
+
+        :return list of int: List of transaction database IDs
+        """
+        sess = self._session
+        txids = list(set([t.txid for t in txs]))
+        db_txs = dict([(db_tx.hash, db_tx) for db_tx in sess.query(DbTransaction).
+                      filter(DbTransaction.wallet_id == self.wallet_id, DbTransaction.hash.in_(txids))])
+        txids_unknown = [txid for txid in txids if txid not in db_txs]
+        if txids_unknown:
+            for db_tx in sess.query(DbTransaction).\
+                    filter(DbTransaction.wallet_id.is_(None), DbTransaction.hash.in_(txids_unknown)):
+                if db_tx.hash not in db_txs:
+                    db_tx.wallet_id = self.wallet_id
+                    db_txs[db_tx.hash] = db_tx
+
+        for t in txs:
+            db_tx = db_txs.get(t.txid)
+            if not db_tx:
+                db_txs[t.txid] = DbTransaction(
+                    wallet_id=self.wallet_id, hash=t.txid, block_height=t.block_height, size=t.size,
+                    confirmations=t.confirmations, date=t.date, fee=t.fee, status=t.status, input_total=t.input_total,
+                    output_total=t.output_total, network_name=t.network.name, block_hash=t.block_hash,
+                    raw=to_hexstring(t.rawtx), verified=t.verified)
+                sess.add(db_txs[t.txid])
+            else:
+                db_tx.block_height = t.block_height if t.block_height else db_tx.block_height
+                db_tx.confirmations = t.confirmations if t.confirmations else db_tx.confirmations
+                db_tx.date = t.date if t.date else db_tx.date
+                db_tx.fee = t.fee if t.fee else db_tx.fee
+                db_tx.status = t.status if t.status else db_tx.status
+                db_tx.input_total = t.input_total if t.input_total else db_tx.input_total
+                db_tx.output_total = t.output_total if t.output_total else db_tx.output_total
+                db_tx.network_name = t.network.name if t.network.name else db_tx.network_name
+                db_tx.raw = to_hexstring(t.rawtx) if t.rawtx else db_tx.raw
+                db_tx.verified = t.verified
+        sess.flush()
+        tx_ids = [db_txs[t.txid].id for t in txs]
+
+        # Link inputs and outputs to wallet keys
+        addresses = list(set([item.address for t in txs for item in t.inputs + t.outputs if item.address]))
+        key_ids = {}
+        for n in range(0, len(addresses), 500):
+            key_ids.update(sess.query(DbKey.address, DbKey.id).
+                           filter(DbKey.wallet_id == self.wallet_id, DbKey.address.in_(addresses[n:n + 500])).all())
+        if key_ids:
+            used_key_ids = list(set(key_ids.values()))
+            sess.query(DbKey).filter(DbKey.id.in_(used_key_ids)).\
+                update({DbKey.used: True}, synchronize_session='fetch')
+            # Keep cached wallet key objects in sync with the bulk update
+            for key_id in used_key_ids:
+                if key_id in self._key_objects:
+                    self._key_objects[key_id].used = True
+
+        db_tx_ids = list(set(tx_ids))
+        db_inputs = dict([((i.transaction_id, i.index_n), i) for i in sess.query(DbTransactionInput).
+                         filter(DbTransactionInput.transaction_id.in_(db_tx_ids))])
+        db_outputs = dict([((o.transaction_id, o.output_n), o) for o in sess.query(DbTransactionOutput).
+                          filter(DbTransactionOutput.transaction_id.in_(db_tx_ids))])
+        new_inputs = []
+        new_outputs = []
+        for t, txid in zip(txs, tx_ids):
+            for ti in t.inputs:
+                key_id = key_ids.get(ti.address)
+                tx_input = db_inputs.get((txid, ti.index_n))
+                if tx_input is None:
+                    db_inputs[(txid, ti.index_n)] = True
+                    new_inputs.append({
+                        'transaction_id': txid, 'output_n': ti.output_n_int, 'key_id': key_id, 'value': ti.value,
+                        'prev_hash': to_hexstring(ti.prev_hash), 'index_n': ti.index_n,
+                        'double_spend': ti.double_spend, 'script': to_hexstring(ti.unlocking_script),
+                        'script_type': ti.script_type, 'witness_type': ti.witness_type, 'sequence': ti.sequence,
+                        'address': ti.address})
+                elif key_id and tx_input is not True:
+                    tx_input.key_id = key_id
+                    if ti.value:
+                        tx_input.value = ti.value
+                    if ti.prev_hash:
+                        tx_input.prev_hash = to_hexstring(ti.prev_hash)
+                    if ti.unlocking_script:
+                        tx_input.script = to_hexstring(ti.unlocking_script)
+            for to in t.outputs:
+                key_id = key_ids.get(to.address)
+                tx_output = db_outputs.get((txid, to.output_n))
+                if tx_output is None:
+                    db_outputs[(txid, to.output_n)] = True
+                    new_outputs.append({
+                        'transaction_id': txid, 'output_n': to.output_n, 'key_id': key_id, 'value': to.value,
+                        'spent': to.spent, 'script': to_hexstring(to.lock_script), 'script_type': to.script_type})
+                elif key_id and tx_output is not True:
+                    tx_output.key_id = key_id
+                    tx_output.spent = to.spent if to.spent is not None else tx_output.spent
+        if new_inputs:
+            sess.bulk_insert_mappings(DbTransactionInput, new_inputs)
+        if new_outputs:
+            sess.bulk_insert_mappings(DbTransactionOutput, new_outputs)
+        return tx_ids
+
     def transactions_update_by_txids(self, txids):
         """
         Update transaction or list or transaction for this wallet with provided transaction ID
@@ -2964,25 +3613,14 @@ class HDWallet(object):
             if tx:
                 txs.append(tx)
 
-        # TODO: Avoid duplicate code in this method and transaction_update()
-        utxo_set = set()
-        for t in txs:
-            wt = HDWalletTransaction.from_transaction(self, t)
-            wt.save()
-            utxos = [(to_hexstring(ti.prev_hash), ti.output_n_int) for ti in wt.inputs]
-            utxo_set.update(utxos)
-
-        for utxo in list(utxo_set):
-            tos = self._session.query(DbTransactionOutput).join(DbTransaction). \
-                filter(DbTransaction.hash == utxo[0], DbTransactionOutput.output_n == utxo[1],
-                       DbTransactionOutput.spent.is_(False)).all()
-            for u in tos:
-                u.spent = True
+        self.transactions_save(txs)
+        self._outputs_spent_update(set([(to_hexstring(ti.prev_hash), ti.output_n_int) for t in txs
+                                        for ti in t.inputs]))
         self._commit()
         # self._balance_update(account_id=account_id, network=network, key_id=key_id)
 
     def transactions_update(self, account_id=None, used=None, network=None, key_id=None, depth=None, change=None,
-                            limit=MAX_TRANSACTIONS):
+                            limit=MAX_TRANSACTIONS, max_workers=None):
         """
         Update wallets transaction from service providers. Get all transactions for known keys in this wallet. The balances and unspent outputs (UTXO's) are updated as well. Only scan keys from default network and account unless another network or account is specified.
 
@@ -3002,6 +3640,8 @@ class HDWallet(object):
         :type change: int
         :param limit: Stop update after limit transactions to avoid timeouts with service providers. Default is MAX_TRANSACTIONS defined in config.py
         :type limit: int
+        :param max_workers: Number of threads used to request transactions for addresses concurrently. Default is service_sync_workers from config.ini, use 1 to update addresses one by one
+        :type max_workers: int
 
         :return bool: True if all transactions are updated
         """
@@ -3012,53 +3652,122 @@ class HDWallet(object):
         srv = Service(network=network, providers=self.providers, cache_uri=self.db_cache_uri)
 
         # Update number of confirmations and status for already known transactions
-        blockcount = srv.blockcount()
-        db_txs = self._session.query(DbTransaction).\
-            filter(DbTransaction.wallet_id == self.wallet_id,
-                   DbTransaction.network_name == network, DbTransaction.block_height > 0).all()
-        for db_tx in db_txs:
-            self._session.query(DbTransaction).filter_by(id=db_tx.id).\
-                update({DbTransaction.status: 'confirmed',
-                        DbTransaction.confirmations: blockcount - DbTransaction.block_height})
-        self._commit()
+        self._transactions_confirmations_update(network, srv.blockcount())
 
         # Get transactions for wallet's addresses
-        txs = []
         addresslist = self.addresslist(
             account_id=account_id, used=used, network=network, key_id=key_id, change=change, depth=depth)
         last_updated = datetime.now()
-        for address in addresslist:
-            txs += srv.gettransactions(address, limit=limit, after_txid=self.transaction_last(address))
-            if not srv.complete:
-                if txs and txs[-1].date and txs[-1].date < last_updated:
-                    last_updated = txs[-1].date
+        n_txs, _, oldest_tx_date = self._transactions_update_addresses(network, addresslist, limit, max_workers)
+        if oldest_tx_date and oldest_tx_date < last_updated:
+            last_updated = oldest_tx_date
+
+        self.last_updated = last_updated
+        self._commit()
+        self._balance_update(account_id=account_id, network=network, key_id=key_id)
+
+        return n_txs
+
+    def _transactions_confirmations_update(self, network, blockcount):
+        """
+        Update number of confirmations and status of transactions with a known block height with a single UPDATE
+        statement. Only transactions with an outdated number of confirmations are written, so nothing is updated if
+        no new blocks are found since the last update.
+
+        :param network: Network name
+        :type network: str
+        :param blockcount: Current number of blocks in the blockchain
+        :type blockcount: int
+
+        :return int: Number of updated transactions
+        """
+        if not blockcount:
+            return 0
+        count = self._session.query(DbTransaction).\
+            filter(DbTransaction.wallet_id == self.wallet_id, DbTransaction.network_name == network,
+                   DbTransaction.block_height > 0,
+                   or_(DbTransaction.confirmations.is_(None),
+                       DbTransaction.confirmations != blockcount - DbTransaction.block_height,
+                       DbTransaction.status.is_(None), DbTransaction.status != 'confirmed')).\
+            update({DbTransaction.status: 'confirmed',
+                    DbTransaction.confirmations: blockcount - DbTransaction.block_height},
+                   synchronize_session=False)
+        self._commit()
+        if count:
+            self._utxo_set_confirmations_update()
+        _logger.info("Updated number of confirmations of %d transactions" % count)
+        return count
+
+    def _transactions_update_addresses(self, network, addresslist, limit=MAX_TRANSACTIONS, max_workers=None):
+        """
+        Get new transactions for list of addresses from service providers and store them in the database with
+        :func:`transactions_save`. Transactions are saved and committed in batches of service_sync_batch_size
+        addresses.
+
+        :param network: Network name
+        :type network: str
+        :param addresslist: List of address strings
+        :type addresslist: list of str
+        :param limit: Maximum number of transactions to request per address
+        :type limit: int
+        :param max_workers: Number of threads used to request transactions, see :func:`_service_map`
+        :type max_workers: int
+
+        :return tuple: Number of transactions found, dictionary with number of transactions per address and date of the oldest last transaction of incomplete addresses
+        """
+        keys = self.keys_by_address(addresslist)
+        requests = [(address, {'limit': limit,
+                               'after_txid': (keys[address].latest_txid or '') if address in keys else ''})
+                    for address in addresslist]
+        n_txs = 0
+        txs_per_address = {}
+        oldest_tx_date = None
+        utxo_set = set()
+        txs_to_save = []
+        for address_n, (address, txs, complete, _) in \
+                enumerate(self._service_map(network, 'gettransactions', requests, max_workers), 1):
+            txs_per_address[address] = len(txs)
+            n_txs += len(txs)
+            if txs and not complete and txs[-1].date and (not oldest_tx_date or txs[-1].date < oldest_tx_date):
+                oldest_tx_date = txs[-1].date
             if txs and txs[-1].confirmations:
-                dbkey = self._session.query(DbKey).filter(DbKey.address == address, DbKey.wallet_id == self.wallet_id)
-                if not dbkey.update({DbKey.latest_txid: txs[-1].txid}):
+                if address not in keys:
                     raise WalletError("Failed to update latest transaction id for key with address %s" % address)
-                self._commit()
-        if txs is False:
-            raise WalletError("No response from any service provider, could not update transactions")
+                keys[address].latest_txid = txs[-1].txid
+            for t in txs:
+                utxo_set.update([(to_hexstring(ti.prev_hash), ti.output_n_int) for ti in t.inputs])
+            txs_to_save += txs
+            if not address_n % SERVICE_SYNC_BATCH_SIZE:
+                self.transactions_save(txs_to_save)
+                txs_to_save = []
+        self.transactions_save(txs_to_save)
 
         # Update Transaction outputs to get list of unspent outputs (UTXO's)
-        utxo_set = set()
-        for t in txs:
-            wt = HDWalletTransaction.from_transaction(self, t)
-            wt.save()
-            utxos = [(to_hexstring(ti.prev_hash), ti.output_n_int) for ti in wt.inputs]
-            utxo_set.update(utxos)
-        for utxo in list(utxo_set):
-            tos = self._session.query(DbTransactionOutput).join(DbTransaction).\
-                filter(DbTransaction.hash == utxo[0], DbTransactionOutput.output_n == utxo[1],
-                       DbTransactionOutput.spent.is_(False), DbTransaction.wallet_id == self.wallet_id).all()
-            for u in tos:
-                u.spent = True
-
-        self.last_updated = last_updated
+        self._outputs_spent_update(utxo_set)
         self._commit()
-        self._balance_update(account_id=account_id, network=network, key_id=key_id)
+        return n_txs, txs_per_address, oldest_tx_date
 
-        return len(txs)
+    def _outputs_spent_update(self, outpoints):
+        """
+        Mark unspent transaction outputs of this wallet as spent if they are spent by one of the given outpoints. The
+        outputs are looked up with one query per 500 transaction hashes instead of one query per outpoint.
+
+        :param outpoints: Set of (transaction hash, output_n) tuples of spending inputs
+        :type outpoints: set of tuple
+
+        :return int: Number of outputs marked as spent
+        """
+        tx_hashes = list(set([tx_hash for tx_hash, _ in outpoints]))
+        count = 0
+        for n in range(0, len(tx_hashes), 500):
+            for u, tx_hash in self._session.query(DbTransactionOutput, DbTransaction.hash).join(DbTransaction).\
+                    filter(DbTransaction.hash.in_(tx_hashes[n:n + 500]), DbTransactionOutput.spent.is_(False),
+                           DbTransaction.wallet_id == self.wallet_id):
+                if (tx_hash, u.output_n) in outpoints:
+                    u.spent = True
+                    count += 1
+        self._utxo_set_remove(outpoints)
+        return count
 
     def transaction_last(self, address):
         """
@@ -3256,26 +3965,32 @@ class HDWallet(object):
         if not key:
             raise WalletError("Key '%s' not found in this wallet" % key_id)
         if key.key_type == 'multisig':
-            inp_keys = [HDKey(ck.child_key.wif, network=ck.child_key.network_name) for ck in key.multisig_children]
+            inp_keys = [HDKey._from_wif_trusted(ck.child_key.wif, ck.child_key.network_name, ck.child_key.public)
+                        for ck in key.multisig_children]
         elif key.key_type in ['bip32', 'single']:
             if not key.wif:
                 raise WalletError("WIF of key is empty cannot create HDKey")
-            inp_keys = [HDKey(key.wif, compressed=key.compressed, network=key.network_name)]
+            inp_keys = [HDKey._from_wif_trusted(key.wif, key.network_name, key.public, compressed=key.compressed)]
         else:
             raise WalletError("Input key type %s not supported" % key.key_type)
         return inp_keys, key
 
     def select_inputs(self, amount, variance=None, input_key_id=None, account_id=None, network=None, min_confirms=0,
-                      max_utxos=None, return_input_obj=True):
+                      max_utxos=None, return_input_obj=True, fee_per_kb=None, strategy=None):
         """
         Select available unspent transaction outputs (UTXO's) which can be used as inputs for a transaction for
         the specified amount.
 
+        All candidate UTXO's are loaded with a single query and passed to a :class:`CoinSelection` object, which selects
+        UTXO's with the given strategy. The default strategy selects one UTXO with the exact amount, otherwise the
+        smallest larger UTXO or else a list of lesser UTXO's. Use the 'bnb', 'knapsack', 'srd' or 'auto' strategy
+        with a fee_per_kb to take the fee to spend each UTXO into account.
+
         >>> w = HDWallet('bitcoinlib_legacy_wallet_test')
         >>> w.select_inputs(50000000)
         [<Input(prev_hash='748799c9047321cb27a6320a827f1f69d767fe889c14bf11f27549638d566fe4', output_n=0, address='16QaHuFkfuebXGcYHmehRXBBX7RG9NbtLg', index_n=0, type='sig_pubkey')>]
 
-        :param amount: Total value of inputs in smallest denominator (sathosi) to select
+        :param amount: Total value of inputs in smallest denominator (sathosi) to select. If a fee aware strategy is used this is the total value minus the fees to spend the inputs
         :type amount: int
         :param variance: Allowed difference in total input value. Default is dust amount of selected network.
         :type variance: int
@@ -3291,6 +4006,10 @@ class HDWallet(object):
         :type max_utxos: int
         :param return_input_obj: Return inputs as Input class object. Default is True
         :type return_input_obj: bool
+        :param fee_per_kb: Fee per kilobyte used to calculate the effective value of UTXO's. Default is None: ignore fees
+        :type fee_per_kb: int
+        :param strategy: Coin selection strategy: default, bnb, knapsack, srd or auto. Default is coin_selection_strategy from config.ini. The bnb strategy raises an error if the wallet has enough funds but no selection without a change output is found.
+        :type strategy: str
 
         :return: List of previous outputs
         :rtype: list of DbTransactionOutput, list of Input
@@ -3299,51 +4018,63 @@ class HDWallet(object):
         network, account_id, _ = self._get_account_defaults(network, account_id)
         if variance is None:
             variance = self.network.dust_amount
-
-        utxo_query = self._session.query(DbTransactionOutput).join(DbTransaction).join(DbKey). \
-            filter(DbTransaction.wallet_id == self.wallet_id, DbKey.account_id == account_id,
-                   DbKey.network_name == network, DbKey.public != '',
-                   DbTransactionOutput.spent.is_(False), DbTransaction.confirmations >= min_confirms)
-        if input_key_id:
-            utxo_query = utxo_query.filter(DbKey.id == input_key_id)
-        utxos = utxo_query.order_by(DbTransaction.confirmations.desc()).all()
+        if strategy is None:
+            strategy = COIN_SELECTION_STRATEGY
+
+        utxo_set = self._utxo_set_get()
+        if utxo_set is not None:
+            utxos = [(u['transaction_id'], u['output_n'], u['value'], u['script_type'], u['confirmations'],
+                      utxo_set.keys[u['key_id']]['compressed'])
+                     for u in utxo_set.filter(account_id, network, min_confirms, input_key_id or None)
+                     if utxo_set.keys[u['key_id']]['public']]
+        else:
+            utxo_query = self._session.query(DbTransactionOutput.transaction_id, DbTransactionOutput.output_n,
+                                             DbTransactionOutput.value, DbTransactionOutput.script_type,
+                                             DbTransaction.confirmations, DbKey.compressed).\
+                join(DbTransaction).join(DbKey). \
+                filter(DbTransaction.wallet_id == self.wallet_id, DbKey.account_id == account_id,
+                       DbKey.network_name == network, DbKey.public != '',
+                       DbTransactionOutput.spent.is_(False), DbTransaction.confirmations >= min_confirms)
+            if input_key_id:
+                utxo_query = utxo_query.filter(DbKey.id == input_key_id)
+            utxos = utxo_query.order_by(DbTransaction.confirmations.desc()).all()
         if not utxos:
             raise WalletError("Create transaction: No unspent transaction outputs found or no key available for UTXO's")
 
-        # TODO: Find 1 or 2 UTXO's with exact amount +/- self.network.dust_amount
-
-        # Try to find one utxo with exact amount
-        one_utxo = utxo_query.filter(DbTransactionOutput.spent.is_(False),
-                                     DbTransactionOutput.value >= amount,
-                                     DbTransactionOutput.value <= amount + variance).first()
-        selected_utxos = []
-        if one_utxo:
-            selected_utxos = [one_utxo]
-        else:
-            # Try to find one utxo with higher amount
-            one_utxo = utxo_query. \
-                filter(DbTransactionOutput.spent.is_(False), DbTransactionOutput.value >= amount).\
-                order_by(DbTransactionOutput.value).first()
-            if one_utxo:
-                selected_utxos = [one_utxo]
-            elif max_utxos and max_utxos <= 1:
+        # Estimate size of each input to calculate fee to spend it
+        sizes = []
+        size_types = {}
+        n_keys = len(self.cosigner) if self.multisig else 1
+        for utxo in utxos:
+            size_type = (utxo[3], utxo[5])
+            if size_type not in size_types:
+                try:
+                    script_type = get_unlocking_script_type(utxo[3], self.witness_type,
+                                                            multisig=self.multisig)
+                    size_types[size_type] = input_size(script_type, self.witness_type, n_keys,
+                                                       self.multisig_n_required, utxo[5])
+                except (TransactionError, CoinSelectionError):
+                    size_types[size_type] = input_size()
+            sizes.append(size_types[size_type])
+
+        fee_per_kb = fee_per_kb or 0
+        cs = CoinSelection([utxo[2] for utxo in utxos], sizes, fee_per_kb,
+                           confirmations=[utxo[4] for utxo in utxos], max_utxos=max_utxos)
+        cost_of_change = variance + int((50 / 1024.0) * fee_per_kb)
+        try:
+            selection = cs.select(amount, strategy, variance, cost_of_change)
+        except CoinSelectionError as e:
+            raise WalletError(str(e))
+        if not selection:
+            if strategy == 'bnb' and sum([v for v in cs.effective_values if v > 0]) >= amount:
+                raise WalletError("No selection of UTXO's without change output found with the bnb coin selection "
+                                  "strategy, use the auto strategy to allow a change output")
+            if max_utxos and max_utxos <= 1:
                 _logger.info("No single UTXO found with requested amount, use higher 'max_utxo' setting to use "
                              "multiple UTXO's")
-                return []
-
-        # Otherwise compose of 2 or more lesser outputs
-        if not selected_utxos:
-            lessers = utxo_query. \
-                filter(DbTransactionOutput.spent.is_(False), DbTransactionOutput.value < amount).\
-                order_by(DbTransactionOutput.value.desc()).all()
-            total_amount = 0
-            selected_utxos = []
-            for utxo in lessers[:max_utxos]:
-                if total_amount < amount:
-                    selected_utxos.append(utxo)
-                    total_amount += utxo.value
-            if total_amount < amount:
-                return []
+            return []
+        selected_utxos = [self._session.query(DbTransactionOutput).
+                          get((utxos[i][0], utxos[i][1])) for i in selection]
         if not return_input_obj:
             return selected_utxos
         else:
@@ -3359,7 +4090,7 @@ class HDWallet(object):
             return inputs
 
     def transaction_create(self, output_arr, input_arr=None, input_key_id=None, account_id=None, network=None, fee=None,
-                           min_confirms=0, max_utxos=None, locktime=0):
+                           min_confirms=0, max_utxos=None, locktime=0, strategy=None):
         """
         Create new transaction with specified outputs.
 
@@ -3392,6 +4123,8 @@ class HDWallet(object):
         :type max_utxos: int
         :param locktime: Transaction level locktime. Locks the transaction until a specified block (value from 1 to 5 million) or until a certain time (Timestamp in seconds after 1-jan-1970). Default value is 0 for transactions without locktime
         :type locktime: int
+        :param strategy: Coin selection strategy used to select inputs, see :func:`select_inputs`. Default is coin_selection_strategy from config.ini
+        :type strategy: str
 
         :return HDWalletTransaction: object
         """
@@ -3439,8 +4172,17 @@ class HDWallet(object):
             sequence = 0xfffffffe
         amount_total_input = 0
         if input_arr is None:
-            selected_utxos = self.select_inputs(amount_total_output + fee_estimate, self.network.dust_amount,
-                                                input_key_id, account_id, network, min_confirms, max_utxos, False)
+            if strategy is None:
+                strategy = COIN_SELECTION_STRATEGY
+            select_amount = amount_total_output + fee_estimate
+            fee_per_kb = None
+            if transaction.fee_per_kb and strategy != 'default':
+                # Fee aware strategies use the effective value of UTXO's, so only add fee for outputs and overhead
+                fee_per_kb = max(transaction.fee_per_kb, self.network.fee_min)
+                base_size = max(transaction.estimate_size(add_change_output=True) - input_size(), 0)
+                select_amount = amount_total_output + int((base_size / 1024.0) * fee_per_kb)
+            selected_utxos = self.select_inputs(select_amount, self.network.dust_amount, input_key_id, account_id,
+                                                network, min_confirms, max_utxos, False, fee_per_kb, strategy)
             if not selected_utxos:
                 raise WalletError("Not enough unspent transaction outputs found")
             for utxo in selected_utxos:
@@ -3558,8 +4300,7 @@ class HDWallet(object):
             raise WalletError("Total amount of outputs is greater then total amount of inputs")
         if transaction.change:
             ck = self.get_key(account_id=account_id, network=network, change=1)
-            on = transaction.add_output(transaction.change, ck.address, encoding=self.encoding)
-            transaction.outputs[on].key_id = ck.key_id
+            transaction.add_output(transaction.change, ck.address, encoding=self.encoding)
             amount_total_output += transaction.change
 
         transaction.hash = transaction.signature_hash()[::-1]
@@ -45,7 +45,7 @@ author = 'Lennart (mccwdev)'
 # The short X.Y version.
 version = '0.4'
 # The full version, including alpha/beta/rc tags.
-release = '0.4.16'
+release = '0.4.17'
 
 # The language for content autogenerated by Sphinx. Refer to documentation
 # for a list of supported languages.
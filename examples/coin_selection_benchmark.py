@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#
+#    BitcoinLib - Python Cryptocurrency Library
+#
+#    EXAMPLES - Benchmark coin selection strategies on synthetic UTXO sets
+#
+#    © 2020 - 1200 Web Development <http://1200wd.com/>
+#
+
+import random
+import timeit
+
+from bitcoinlib.coinselect import CoinSelection, USE_NUMPY
+
+random.seed(42)
+FEE_PER_KB = 10000
+COST_OF_CHANGE = 546 + int((50 / 1024.0) * FEE_PER_KB)
+
+
+def synthetic_utxos(n):
+    """
+    Create a UTXO set with many small payments and some larger ones, like a typical merchant wallet
+    """
+    values = []
+    for _ in range(n):
+        if random.random() < 0.9:
+            values.append(random.randint(1000, 500000))
+        else:
+            values.append(random.randint(500000, 50000000))
+    sizes = [random.choice([68, 91, 147]) for _ in range(n)]
+    return values, sizes
+
+
+print("Numpy enabled: %s" % USE_NUMPY)
+print("%8s %10s %10s %8s %12s %10s" % ('utxos', 'strategy', 'time (s)', 'inputs', 'fee', 'waste'))
+for n_utxos in [100, 1000, 10000, 50000]:
+    values, sizes = synthetic_utxos(n_utxos)
+    target = sum(values) // 20
+    for strategy in CoinSelection.strategies:
+        start = timeit.default_timer()
+        cs = CoinSelection(values, sizes, FEE_PER_KB)
+        selection = cs.select(target, strategy, 546, COST_OF_CHANGE)
+        duration = timeit.default_timer() - start
+        fee = cs.total(selection) - cs.effective_total(selection)
+        waste = cs.waste(selection, target, COST_OF_CHANGE) if selection else 0
+        print("%8d %10s %10.4f %8d %12d %10d" % (n_utxos, strategy, duration, len(selection), fee, waste))
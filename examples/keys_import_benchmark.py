@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+#    BitcoinLib - Python Cryptocurrency Library
+#
+#    EXAMPLES - Benchmark key format detection, Key and HDKey imports and child key derivations per second
+#
+#    © 2020 - 1200 Web Development <http://1200wd.com/>
+#
+
+import timeit
+
+from bitcoinlib.keys import HDKey, Key, derivation_cache, get_key_format
+
+N_KEYS = 200
+REPEAT = 3
+
+hdkeys = [HDKey() for _ in range(N_KEYS)]
+keys = {
+    'wif': [k.wif_key() for k in hdkeys],
+    'public hex': [k.public_hex for k in hdkeys],
+    'hdkey private': [k.wif_private() for k in hdkeys],
+    'hdkey public': [k.wif_public() for k in hdkeys],
+    'hdkey segwit': [HDKey(witness_type='segwit').wif_public() for _ in range(N_KEYS)],
+    'address': [k.address() for k in hdkeys],
+}
+
+print("%-16s %16s %16s %16s" % ('key format', 'get_key_format/s', 'Key()/s', 'HDKey()/s'))
+for name, key_list in keys.items():
+    results = []
+    for func in [get_key_format, Key, HDKey]:
+        if func is HDKey and not name.startswith('hdkey'):
+            results.append('-')
+            continue
+        if func is Key and (name == 'address' or name.startswith('hdkey')):
+            results.append('-')
+            continue
+        duration = min(timeit.repeat(lambda: [func(k) for k in key_list], number=1, repeat=REPEAT))
+        results.append('%d' % (len(key_list) / duration))
+    print("%-16s %16s %16s %16s" % (name, results[0], results[1], results[2]))
+
+print("\n%-16s %16s" % ('derivation', 'keys/s'))
+masterkey = HDKey()
+for name, func in [('child_private', masterkey.child_private), ('child_public', masterkey.public().child_public)]:
+    derivation_cache.clear()
+    duration = min(timeit.repeat(lambda: [derivation_cache.clear() or func(i) for i in range(N_KEYS)],
+                                 number=1, repeat=REPEAT))
+    print("%-16s %16d" % (name, N_KEYS / duration))
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+#
+#    BitcoinLib - Python Cryptocurrency Library
+#
+#    EXAMPLES - Benchmark batch creation of Mnemonic seeds and BIP0038 decryption with a process pool
+#
+#    © 2020 - 1200 Web Development <http://1200wd.com/>
+#
+
+import os
+import timeit
+
+from bitcoinlib.keys import Key
+from bitcoinlib.mnemonic import Mnemonic
+
+N_MNEMONICS = 1000
+N_BIP38_KEYS = 16
+
+mnemo = Mnemonic()
+phrases = [mnemo.generate() for _ in range(N_MNEMONICS)]
+passphrase = 'password'
+encrypted_keys = [Key().bip38_encrypt(passphrase) for _ in range(N_BIP38_KEYS)]
+
+print("%-8s %18s %18s" % ('workers', 'mnemonic seeds/s', 'bip38 decrypts/s'))
+for max_workers in sorted(set([1, 2, 4, os.cpu_count() or 1])):
+    duration = timeit.timeit(lambda: list(mnemo.to_seeds(phrases, max_workers=max_workers)), number=1)
+    duration_bip38 = timeit.timeit(
+        lambda: list(Key.bip38_decrypt_many(encrypted_keys, passphrase, max_workers=max_workers)), number=1)
+    print("%-8d %18d %18.1f" % (max_workers, N_MNEMONICS / duration, N_BIP38_KEYS / duration_bip38))
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+#    BitcoinLib - Python Cryptocurrency Library
+#
+#    EXAMPLES - Measure memory usage of parsed Transaction, Input and Output objects
+#
+#    Parses block 330000 from the unittest data and reports memory allocated per transaction, input and output.
+#
+#    © 2020 - 1200 Web Development <http://1200wd.com/>
+#
+
+import os
+import pickle
+import sys
+import timeit
+import tracemalloc
+
+from bitcoinlib.blocks import Block
+from bitcoinlib.transactions import Input, Output, Transaction
+
+filename = os.path.join(os.path.dirname(__file__), '..', 'tests', 'block330000.pickle')
+with open(filename, 'rb') as f:
+    raw_block = pickle.load(f)
+
+for cls in [Transaction, Input, Output]:
+    print("%s: %d slots, %d bytes per instance without attributes" %
+          (cls.__name__, len(cls.__slots__), sys.getsizeof(object.__new__(cls))))
+
+for lazy in [False, True]:
+    tracemalloc.start()
+    start = timeit.default_timer()
+    block = Block.from_raw(raw_block, height=330000, parse_transactions=True, lazy=lazy)
+    duration = timeit.default_timer() - start
+    parsed_size = tracemalloc.get_traced_memory()[0]
+    n_inputs = sum([len(t.inputs) for t in block.transactions])
+    n_outputs = sum([len(t.outputs) for t in block.transactions])
+    total_size, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("\nParse block %d with %d transactions, %d inputs and %d outputs%s" %
+          (block.height, len(block.transactions), n_inputs, n_outputs,
+           ' (lazy)' if lazy else ''))
+    print("Parse time:                   %.4f seconds" % duration)
+    print("Memory after parsing:         %d kB" % (parsed_size // 1024))
+    print("Memory with inputs / outputs: %d kB, peak %d kB" % (total_size // 1024, peak_size // 1024))
+    print("Average per transaction:      %d bytes" % (total_size // len(block.transactions)))
+    del block
@@ -149,3 +149,31 @@ class TestBlocks(unittest.TestCase, CustomAssertions):
         b = Block.from_raw(self.rb330000, parse_transactions=True)
         rb_ser = b.serialize()
         self.assertEqual(rb_ser, self.rb330000)
+
+    def test_blocks_parse_transactions_raw_data(self):
+        b = Block.from_raw(self.rb330000, parse_transactions=True)
+        self.assertEqual(len(b.transactions), 81)
+        self.assertEqual(len(b.txs_data), 0)
+        offset = 81
+        for t in b.transactions:
+            self.assertEqual(t.rawtx, self.rb330000[offset:offset + t.size])
+            offset += t.size
+        self.assertEqual(offset, len(self.rb330000))
+
+    def test_blocks_parse_transactions_lazy(self):
+        b = Block.from_raw(self.rb330000, parse_transactions=True, lazy=True)
+        self.assertEqual(len(b.transactions), 81)
+        self.assertTrue(b.transactions[80].is_lazy)
+        self.assertEqual(b.transactions[80].txid, '7c8483c890942334ecb73db3802f7571b06047b5c15febe3bad11e460065709b')
+        self.assertEqual(b.serialize(), self.rb330000)
+        self.assertTrue(b.transactions[80].is_lazy)
+        self.assertEqual(b.transactions[4].outputs[0].value, 289080000)
+
+    def test_blocks_verify_transactions(self):
+        b = Block.from_raw(self.rb330000, parse_transactions=True)
+        self.assertTrue(b.verify_transactions())
+        self.assertTrue(all([t.verified for t in b.transactions]))
+        b.transactions[5].inputs[0].signatures[0] = b.transactions[6].inputs[0].signatures[0]
+        self.assertFalse(b.verify_transactions(max_workers=1))
+        self.assertFalse(b.transactions[5].verified)
+        self.assertTrue(b.transactions[6].verified)
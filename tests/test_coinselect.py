@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+#    BitcoinLib - Python Cryptocurrency Library
+#    Unit Tests for Coin Selection
+#    © 2020 - 1200 Web Development <http://1200wd.com/>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+import random
+import unittest
+
+from bitcoinlib.coinselect import CoinSelection, CoinSelectionError, input_size
+
+
+class TestCoinSelection(unittest.TestCase):
+
+    def test_coinselect_input_size(self):
+        self.assertEqual(input_size(), 147)
+        self.assertEqual(input_size(compressed=False), 180)
+        self.assertEqual(input_size(witness_type='segwit'), 68)
+        self.assertEqual(input_size('p2sh_multisig', n_keys=3, sigs_required=2), 295)
+        self.assertRaisesRegexp(CoinSelectionError, "Unknown input script type", input_size, 'p2xx')
+
+    def test_coinselect_default(self):
+        cs = CoinSelection([5000, 20000, 12000, 11000], confirmations=[10, 1, 1, 10])
+        self.assertEqual(cs.select(11500, 'default', variance=1000), [2])
+        self.assertEqual(cs.select(10000, 'default'), [3])
+        self.assertEqual(cs.select(25000, 'default'), [1, 2])
+        self.assertEqual(cs.select(50000, 'default'), [])
+        cs = CoinSelection([5000, 20000, 12000, 11000], max_utxos=1)
+        self.assertEqual(cs.select(25000, 'default'), [])
+        # Smallest larger UTXO is selected, regardless of confirmations
+        cs = CoinSelection([100000000, 11000000], confirmations=[100, 1])
+        self.assertEqual(cs.select(10000000, 'default'), [1])
+
+    def test_coinselect_default_previous_selection(self):
+        # Compare with UTXO selection of HDWallet.select_inputs before the CoinSelection class was added
+        def select_inputs_previous(utxos, amount, variance, max_utxos):
+            exact = [u for u in utxos if amount <= u[1] <= amount + variance]
+            if exact:
+                return [exact[0][0]]
+            larger = sorted([u for u in utxos if u[1] >= amount], key=lambda u: u[1])
+            if larger:
+                return [larger[0][0]]
+            if max_utxos and max_utxos <= 1:
+                return []
+            selection = []
+            total = 0
+            for u in sorted(utxos, key=lambda u: -u[1])[:max_utxos]:
+                if total < amount:
+                    selection.append(u[0])
+                    total += u[1]
+            return selection if total >= amount else []
+
+        random.seed(1)
+        for _ in range(200):
+            n = random.randint(1, 10)
+            values = [random.randint(1, 20) * 1000 for _ in range(n)]
+            # Wallet UTXO's are ordered by number of confirmations
+            confirmations = sorted(random.sample(range(100), n), reverse=True)
+            amount = random.randint(1, 60) * 1000
+            variance = random.choice([0, 500])
+            max_utxos = random.choice([None, 1, 3])
+            cs = CoinSelection(values, confirmations=confirmations, max_utxos=max_utxos)
+            expected = select_inputs_previous(list(enumerate(values)), amount, variance, max_utxos)
+            self.assertEqual(cs.select(amount, 'default', variance), expected)
+
+    def test_coinselect_bnb(self):
+        cs = CoinSelection([100000, 50000, 30000, 25000], sizes=147, fee_per_kb=1024)
+        self.assertEqual(cs.effective_values, [99853, 49853, 29853, 24853])
+        self.assertEqual(cs.select(54700, 'bnb', cost_of_change=2000), [2, 3])
+        self.assertEqual(cs.select(54700, 'bnb', cost_of_change=0), [])
+        self.assertEqual(cs.select(179559, 'bnb'), [0, 1, 2])
+        cs.max_utxos = 2
+        self.assertEqual(cs.select(179559, 'bnb'), [])
+
+    def test_coinselect_strategies(self):
+        random.seed(42)
+        values = [random.randint(1000, 1000000) for _ in range(500)]
+        cs = CoinSelection(values, sizes=68, fee_per_kb=10000)
+        for strategy in ['bnb', 'knapsack', 'srd', 'auto']:
+            selection = cs.select(2500000, strategy, cost_of_change=5000)
+            self.assertGreaterEqual(cs.effective_total(selection), 2500000, msg=strategy)
+            self.assertEqual(len(set(selection)), len(selection))
+        selection = cs.select(2500000, 'bnb', cost_of_change=5000)
+        self.assertLessEqual(cs.effective_total(selection), 2505000)
+        self.assertLessEqual(cs.waste(cs.select(2500000, 'auto', cost_of_change=5000), 2500000, 5000),
+                             cs.waste(cs.select(2500000, 'srd', cost_of_change=5000), 2500000, 5000))
+        self.assertEqual(cs.select(sum(values), 'knapsack'), [])
+        self.assertRaisesRegexp(CoinSelectionError, "Unknown coin selection strategy", cs.select, 1000, 'unknown')
+
+    def test_coinselect_dust_ignored(self):
+        cs = CoinSelection([100, 200, 50000], sizes=147, fee_per_kb=2048)
+        self.assertEqual(cs.effective_values, [-194, -94, 49706])
+        for strategy in ['bnb', 'knapsack', 'auto']:
+            self.assertEqual(cs.select(40000, strategy, cost_of_change=10000), [2], msg=strategy)
+        # Single random draw needs enough value for a change output
+        self.assertEqual(cs.select(40000, 'srd', cost_of_change=10000), [])
+        self.assertEqual(cs.select(40000, 'srd', cost_of_change=5000), [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,8 +20,10 @@
 import os
 import unittest
 
-from bitcoinlib.config.config import BCL_DATABASE_DIR
-from bitcoinlib.db import DbConfig
+from sqlalchemy import inspect
+
+from bitcoinlib.config.config import BCL_DATABASE_DIR, BITCOINLIB_VERSION
+from bitcoinlib.db import DbConfig, DbInit, db_update
 from tests.db_0_4_10 import DbInit as DbInitOld
 
 DATABASEFILE_UNITTESTS = os.path.join(str(BCL_DATABASE_DIR), 'bitcoinlib.unittest.sqlite')
@@ -49,6 +51,36 @@ class TestDb(unittest.TestCase):
         version_db = dbold.session.query(DbConfig.value).filter_by(variable='version').scalar()
         self.assertEqual(version_db, '0.4.12')
 
+        db_update(dbold, version_db, '0.4.17')
+        index_names = [ix['name'] for ix in inspect(dbold.engine).get_indexes('transaction_outputs')]
+        self.assertIn('ix_transaction_outputs_key_id_spent', index_names)
+        self.assertIn('ix_transaction_outputs_transaction_id_output_n_spent', index_names)
+        index_names = [ix['name'] for ix in inspect(dbold.engine).get_indexes('transaction_inputs')]
+        self.assertIn('ix_transaction_inputs_prev_hash_output_n', index_names)
+        version_db = dbold.session.query(DbConfig.value).filter_by(variable='version').scalar()
+        self.assertEqual(version_db, '0.4.17')
+
+    def test_database_upgrade_indexes(self):
+        if os.path.isfile(DATABASEFILE_UNITTESTS):
+            os.remove(DATABASEFILE_UNITTESTS)
+        db = DbInit(DATABASEFILE_UNITTESTS)
+        index_names = ['ix_transaction_outputs_key_id_spent', 'ix_transaction_outputs_transaction_id_output_n_spent']
+        for index_name in index_names:
+            db.engine.execute("DROP INDEX %s" % index_name)
+        db.session.query(DbConfig).filter_by(variable='version').update({DbConfig.value: '0.4.16'})
+        db.session.commit()
+        db.session.close()
+        db.engine.dispose()
+
+        # Opening a database from a previous version creates the missing indexes
+        db = DbInit(DATABASEFILE_UNITTESTS)
+        db_index_names = [ix['name'] for ix in inspect(db.engine).get_indexes('transaction_outputs')]
+        for index_name in index_names:
+            self.assertIn(index_name, db_index_names)
+        version_db = db.session.query(DbConfig.value).filter_by(variable='version').scalar()
+        self.assertEqual(version_db, BITCOINLIB_VERSION)
+        db.session.close()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -18,13 +18,15 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 import binascii
+import os
 import unittest
 
 from bitcoinlib.config.config import PY3
 
 from bitcoinlib.config.opcodes import opcode
 from bitcoinlib.encoding import (EncodingError, _bech32_polymod, _codestring_to_array, addr_bech32_to_pubkeyhash,
-                                 addr_to_pubkeyhash, change_base, convert_der_sig, der_encode_sig, int_to_varbyteint,
+                                 addr_to_pubkeyhash, base58_decode, base58_encode, base58check_decode,
+                                 base58check_encode, change_base, convert_der_sig, der_encode_sig, int_to_varbyteint,
                                  normalize_string, pubkeyhash_to_addr, pubkeyhash_to_addr_bech32, to_bytes,
                                  to_hexstring, varbyteint_to_int,
                                  varstr)
@@ -156,8 +158,28 @@ class TestEncodingMethodsAddressConversion(unittest.TestCase):
                          pubkeyhash_to_addr('13d215d212cd5188ae02c5635faabdc4d7d4ec91'))
 
     def test_pkh_to_addr_conversion_2(self):
-        self.assertEqual('11111111111111111111111111114oLvT2',
+        self.assertEqual('1111111111111111111114oLvT2',
                          pubkeyhash_to_addr('00' * 20))
+        self.assertEqual(addr_to_pubkeyhash('1111111111111111111114oLvT2'), b'\0' * 20)
+
+    def test_base58_encode_decode(self):
+        self.assertEqual(base58_encode(b''), '')
+        self.assertEqual(base58_decode(''), b'')
+        self.assertEqual(base58_encode(b'\0\0\x01'), '112')
+        self.assertEqual(base58_decode('112'), b'\0\0\x01')
+        for n in range(1, 80):
+            data = os.urandom(n)
+            self.assertEqual(base58_decode(base58_encode(data)), data)
+            data = b'\0' * (n % 5) + data
+            self.assertEqual(base58_decode(base58_encode(data)), data)
+        wif = 'xpub661MyMwAqRbcFnkbk13gaJba22ibnEdJS7KAMY99C4jBBHMxWaCBSTrTinNTc9G5LTFtUqbLpWnzY5yPTNEF9u8sB1kBSygy4U' \
+              'svuViAmiR'
+        self.assertEqual(to_hexstring(base58_decode(wif)), change_base(wif, 58, 16))
+        self.assertEqual(base58check_encode(base58check_decode(wif)), wif)
+        self.assertRaisesRegexp(EncodingError, "Invalid checksum for base58 string", base58check_decode,
+                                wif[:-1] + '1')
+        self.assertRaisesRegexp(EncodingError, "Unknown character 0 found in input string", base58_decode, '10I')
+        self.assertRaisesRegexp(EncodingError, "Invalid base58 character", base58_decode, u'K\u20ac')
 
     def test_address_to_pkh_bech32(self):
         addr = 'bc1qy8qmc6262m68ny0ftlexs4h9paud8sgce3sf84'
@@ -20,6 +20,7 @@
 import hashlib
 import json
 import os
+import threading
 import unittest
 
 from fastecdsa.util import RFC6979
@@ -27,9 +28,9 @@ from fastecdsa.util import RFC6979
 from bitcoinlib.config.config import PY3
 from bitcoinlib.config.secp256k1 import secp256k1_n
 from bitcoinlib.encoding import EncodingError, USE_FASTECDSA, USING_MODULE_SCRYPT, to_bytes, to_hexstring
-from bitcoinlib.keys import (Address, BKeyError, HDKey, Key, Signature, addr_convert, deserialize_address,
-                             get_key_format,
-                             path_expand, sign)
+from bitcoinlib.keys import (Address, BKeyError, DerivationCache, HDKey, Key, Signature, _generator_table, addr_convert,
+                             derivation_cache, deserialize_address, get_key_format,
+                             path_expand, sign, verify_batch)
 from bitcoinlib.networks import NETWORK_DEFINITIONS, wif_prefix_search
 
 # Number of bulktests for generation of private, public keys and HDKeys. Set to 0 to disable
@@ -470,6 +471,104 @@ class TestHDKeysPublicChildKeyDerivation(unittest.TestCase):
         self.assertEqual('Ltpv75tiiksDF3fUqK8jkAfwY1h3zDLs3oCFQa5wXDNh981n6LDJZ6juFWUJwwkN3pKbr3diSdMkZfYAhwhkhjP9qG'
                          'wviSbMXtEJYxoH2m3FbDQ', str(k.subkey_for_path('3H/1').wif(is_private=True)))
 
+    def test_hdkey_derive_public_children(self):
+        children = list(self.K.derive_public_children([0, 8]))
+        self.assertEqual(children[0][0], 0)
+        self.assertEqual(children[0][2], '1BvgsfsZQVtkLS69NvGF8rw6NZW2ShJQHr')
+        self.assertEqual(children[1][2], '17JbSP83rPWmbdcdtiiTNqBE8MgGN8kmUk')
+        for witness_type in ['segwit', 'p2sh-segwit']:
+            k = HDKey(self.k.wif_private(), witness_type=witness_type)
+            children = list(k.derive_public_children(range(300)))
+            for index in [0, 255, 256, 299]:
+                ck = k.child_public(index)
+                self.assertEqual(children[index], (index, ck.public_byte, ck.address()))
+        k = HDKey('Ltpv71G8qDifUiNetj2H4no6Q4oB8o2eUH8tSU2BsJDGyKTyMJ6ejPDXHWtQeTzKQdEeEexxyw3vSAYtxnAz3qYZc'
+                  '59jfTiqHLzjKkwJ9iDJ1uC', network='litecoin')
+        self.assertEqual(list(k.derive_public_children([100]))[0][2], 'LfH72Fgeikvhu1y5rtMAkQ5SS5aJJUafLX')
+        self.assertRaisesRegexp(BKeyError, "Cannot derive hardened key", list,
+                                self.K.derive_public_children([0x80000001]))
+
+    def test_hdkey_derive_public_children_threads(self):
+        expected = list(self.K.derive_public_children(range(20)))
+        del _generator_table[:]
+        results = []
+
+        def derive():
+            results.append(list(self.K.derive_public_children(range(20))))
+        threads = [threading.Thread(target=derive) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(_generator_table), 32)
+        self.assertEqual(results, [expected] * 4)
+
+    def test_hdkey_derivation_cache(self):
+        derivation_cache.clear()
+        ck = self.k.subkey_for_path('3/2H')
+        self.assertEqual(derivation_cache.misses, 2)
+        self.assertEqual(derivation_cache.hits, 0)
+        ck2 = self.k.subkey_for_path('3/2H')
+        self.assertEqual(derivation_cache.hits, 2)
+        self.assertEqual(ck.wif(), ck2.wif())
+        self.assertIsNot(ck, ck2)
+        ck2.network_change('testnet')
+        self.assertEqual(self.k.subkey_for_path('3/2H').network.name, 'bitcoin')
+        self.assertEqual(self.K.child_public(8).address(), '17JbSP83rPWmbdcdtiiTNqBE8MgGN8kmUk')
+        self.assertEqual(self.K.child_public(8).address(), '17JbSP83rPWmbdcdtiiTNqBE8MgGN8kmUk')
+        self.assertNotEqual(self.K.child_public(8, network='litecoin').address()[:1], '1')
+
+        cache = DerivationCache(size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.set('a', 4)
+        cache.set('d', 5)
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.get('a'), 4)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        cache = DerivationCache(size=0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_hdkey_derive_trusted_children(self):
+        attributes = ['public_hex', 'public_uncompressed_hex', 'public_byte', 'private_hex', 'secret', 'x_hex',
+                      'y_hex', 'compressed', 'key_format', 'is_private', 'script_type', 'encoding', 'witness_type',
+                      'multisig', 'chain', 'depth', 'parent_fingerprint', 'child_index', 'key_type']
+        for witness_type, multisig in [('legacy', False), ('segwit', False), ('p2sh-segwit', True)]:
+            k = HDKey(self.k.wif_private(), witness_type=witness_type, multisig=multisig)
+            for ck in [k.child_private(3), k.child_private(5, hardened=True), k.public().child_public(7)]:
+                key = ck.private_byte if ck.is_private else ck.public_byte
+                ck2 = HDKey(key=key, chain=ck.chain, depth=ck.depth, parent_fingerprint=ck.parent_fingerprint,
+                            child_index=ck.child_index, is_private=ck.is_private, witness_type=witness_type,
+                            multisig=multisig, encoding=k.encoding)
+                for attr in attributes:
+                    self.assertEqual(getattr(ck, attr), getattr(ck2, attr), attr)
+                self.assertEqual(ck.address(), ck2.address())
+                self.assertEqual(ck.wif(), ck2.wif())
+
+    def test_hdkey_from_wif_trusted(self):
+        for ck in [self.k.child_private(3), self.K.child_public(8)]:
+            for public_hex in [ck.public_hex, None]:
+                ck2 = HDKey._from_wif_trusted(ck.wif(), 'bitcoin', public_hex)
+                self.assertEqual(ck2.wif(), ck.wif())
+                self.assertEqual(ck2.public_uncompressed_hex, ck.public_uncompressed_hex)
+                self.assertEqual(ck2.script_type, HDKey(ck.wif()).script_type)
+        k = HDKey(witness_type='segwit', network='testnet').child_private(1)
+        ck = HDKey._from_wif_trusted(k.wif(), 'testnet', k.public_hex)
+        self.assertEqual(ck.witness_type, 'segwit')
+        self.assertEqual(ck.address(), k.address())
+        wif = 'L1odb1uUozbfK2NrsMyhJfvRsxGM2AxixgPL8vG9BUBnE6W1VyTX'
+        k = HDKey._from_wif_trusted(wif, 'bitcoin')
+        self.assertEqual(k.key_type, 'private')
+        self.assertEqual(k.wif_key(), wif)
+
 
 class TestHDKeys(unittest.TestCase):
 
@@ -572,6 +671,16 @@ class TestBip38(unittest.TestCase):
         k = HDKey(pkwif)
         self.assertEqual(k.bip38_encrypt('Satoshi'), bip38_wif)
 
+    def test_bip38_decrypt_many(self):
+        if not USING_MODULE_SCRYPT:
+            return
+        vectors = [v for v in self.vectors["valid"] if v['passphrase'] == 'Satoshi']
+        keys = Key.bip38_decrypt_many([v['bip38'] for v in vectors], 'Satoshi', max_workers=2)
+        self.assertListEqual([k.wif() for k in keys], [v['wif'] for v in vectors])
+        self.assertListEqual(list(Key.bip38_decrypt_many([], 'Satoshi')), [])
+        self.assertRaisesRegexp(BKeyError, "Addresshash verification failed", list,
+                                Key.bip38_decrypt_many([vectors[0]['bip38']], 'wrong', max_workers=1))
+
 
 class TestKeysBulk(unittest.TestCase):
     """
@@ -902,6 +1011,18 @@ class TestKeysSignatures(unittest.TestCase):
         self.assertRaisesRegexp(BKeyError, "s is not a positive integer smaller than the curve order",
                                 Signature, 11, outofcurveint)
 
+    def test_signatures_verify_batch(self):
+        k = HDKey('b2da575054fb5daba0efde613b0b8e37159b8110e4be50f73cbe6479f6038f5b')
+        k2 = HDKey('728afb86a98a0b60cc81faadaa2c12bc17d5da61b8deaf1c08fc07caf424d493')
+        tx_hash = '0d12fdc4aac9eaaab9730999e0ce84c3bd5bb38dfd1f4c90c613ee177987429c'
+        sig = sign(tx_hash, k)
+        sig2 = sign(tx_hash, k2)
+        items = [(tx_hash, sig, k.public()), (tx_hash, sig.hex(), k2.public()), (tx_hash, sig2, k2.public_byte),
+                 (to_bytes(tx_hash), sig2.bytes(), k.public())]
+        self.assertListEqual(verify_batch(items), [True, False, True, False])
+        self.assertListEqual(verify_batch(items * 100, max_workers=2), [True, False, True, False] * 100)
+        self.assertListEqual(verify_batch([]), [])
+
 
 if __name__ == '__main__':
     unittest.main()
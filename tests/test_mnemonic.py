@@ -97,5 +97,30 @@ class TestMnemonics(unittest.TestCase):
         self.assertEqual(Mnemonic(language='chinese_traditional').word(2047), '歇')
         self.assertEqual(len(Mnemonic().wordlist()), 2048)
 
+    def test_mnemonic_wordlist_index(self):
+        for language in ['english', 'japanese', 'chinese_traditional']:
+            mnemo = Mnemonic(language)
+            phrase = mnemo.to_mnemonic('28acfc94465fd2f6774759d6897ec122')
+            self.assertEqual(mnemo.to_entropy(phrase), b'(\xac\xfc\x94F_\xd2\xf6wGY\xd6\x89~\xc1"')
+            self.assertEqual(Mnemonic.detect_language(phrase), language)
+        phrase = 'chunk gun celery million wood kite tackle twenty story episode raccoon dutch'
+        self.assertEqual(Mnemonic('dutch').detect_language(phrase), 'english')
+        self.assertRaisesRegexp(ValueError, "Word chunk not found in wordlist", Mnemonic('dutch').to_entropy, phrase)
+        self.assertEqual(Mnemonic.detect_language('的 一 是 在 不 了 有 和 人 这 中 大'), 'chinese_simplified')
+        self.assertEqual(Mnemonic.detect_language('的 一 是 在 不 了 有 和 人 這 中 大'), 'chinese_traditional')
+
+    def test_mnemonic_to_seeds(self):
+        mnemo = Mnemonic()
+        phrases = [mnemo.generate() for _ in range(10)]
+        seeds = [mnemo.to_seed(phrase, 'password') for phrase in phrases]
+        self.assertListEqual(list(mnemo.to_seeds(phrases, 'password')), seeds)
+        self.assertListEqual(list(mnemo.to_seeds(phrases * 30, 'password', max_workers=2)), seeds * 30)
+        self.assertListEqual(list(mnemo.to_seeds([])), [])
+        phrase = mnemo.to_mnemonic(b'\0\0' + b'\xff' * 14, check_on_curve=False)
+        self.assertEqual(mnemo.to_entropy(phrase), b'\0\0' + b'\xff' * 14)
+        self.assertListEqual(list(mnemo.to_seeds([phrase])), [mnemo.to_seed(phrase)])
+        self.assertRaisesRegexp(ValueError, "Invalid checksum", list, mnemo.to_seeds(
+            ["runway truly foil future recall scatter garage over floor clutch shy boat"]))
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,10 +5,12 @@
 #    © 2018 August - 1200 Web Development <http://1200wd.com/>
 #
 
+import pickle
 import unittest
+from copy import deepcopy
 
-from bitcoinlib.networks import (Network, NetworkError, network_by_value, network_defined, network_values_for,
-                                 wif_prefix_search)
+from bitcoinlib.networks import (NETWORK_DEFINITIONS, Network, NetworkError, network_by_value, network_defined,
+                                 network_values_for, wif_prefix_search)
 
 
 class TestNetworks(unittest.TestCase):
@@ -56,6 +58,43 @@ class TestNetworks(unittest.TestCase):
         self.assertEqual(wif_prefix_search('0488ADE4', network='bitcoin', multisig=False)[0], exp_dict)
         self.assertEqual(wif_prefix_search('lettrythisstrangestring', network='bitcoin', multisig=False), [])
 
+    def test_networks_prefix_index(self):
+        for field in ['prefix_wif', 'prefix_address', 'prefix_address_p2sh', 'prefix_bech32']:
+            for nw, nw_def in NETWORK_DEFINITIONS.items():
+                networks = network_by_value(field, nw_def[field])
+                self.assertIn(nw, networks)
+                self.assertListEqual(networks, [n for n in sorted(NETWORK_DEFINITIONS, reverse=True,
+                                                                  key=lambda x: NETWORK_DEFINITIONS[x]['priority'])
+                                                if NETWORK_DEFINITIONS[n][field] == nw_def[field]])
+        for nw, nw_def in NETWORK_DEFINITIONS.items():
+            for pf in nw_def['prefixes_wif']:
+                self.assertIn(pf[1], [m['prefix_str'] for m in wif_prefix_search(pf[0], network=nw)])
+        self.assertEqual(network_by_value('prefix_address', b'\x6f'), ['testnet', 'litecoin_testnet'])
+        self.assertEqual(network_by_value('prefix_bech32', 'xx'), [])
+
+    def test_network_registry(self):
+        network = Network('testnet')
+        self.assertIs(network, Network('testnet'))
+        self.assertIs(network, Network(network))
+        self.assertIs(network, deepcopy(network))
+        self.assertIs(network, pickle.loads(pickle.dumps(network)))
+        self.assertIsNot(network, Network('bitcoin'))
+        self.assertEqual(network.prefix_address, b'\x6f')
+        self.assertRaisesRegexp(NetworkError, "Network objects are immutable", setattr, network, 'name', 'bitcoin')
+        self.assertEqual(network.name, 'testnet')
+        self.assertEqual(Network('bitcoin').wif_prefix(is_private=True, witness_type='p2sh-segwit'), b'\x04\x9d\x78\x78')
+        self.assertEqual(Network('testnet').wif_prefix(witness_type='segwit', multisig=True), b'\x02\x57\x54\x83')
+
+    def test_network_as_dict(self):
+        network_dict = Network('bitcoin').as_dict()
+        self.assertEqual(network_dict['name'], 'bitcoin')
+        self.assertEqual(network_dict['prefix_wif'], b'\x80')
+        self.assertFalse([k for k in network_dict if k.startswith('_')])
+        network_dict['name'] = 'changed'
+        network_dict['prefixes_wif'].clear()
+        self.assertEqual(Network('bitcoin').name, 'bitcoin')
+        self.assertTrue(Network('bitcoin').prefixes_wif)
+
 
 if __name__ == '__main__':
     unittest.main()
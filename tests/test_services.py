@@ -17,16 +17,32 @@
 #    You should have received a copy of the GNU Affero General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import json
 import os
+import threading
+import time
 import unittest
 from datetime import datetime
 
-from bitcoinlib.config.config import BCL_DATABASE_DIR, DEFAULT_NETWORK
+from bitcoinlib.config.config import BCL_DATABASE_DIR, DEFAULT_NETWORK, PY3
+from bitcoinlib.db_cache import DbCacheTransaction, DbCacheTransactionNode
 from bitcoinlib.encoding import to_hexstring
+from bitcoinlib.keys import HDKey
 from bitcoinlib.networks import Network
-from bitcoinlib.services.services import Service, ServiceError
+from bitcoinlib.services.baseclient import BaseClient, ClientError, RateLimiter, close_provider_sessions, \
+    provider_rate_limiter
+from bitcoinlib.services import services
+from bitcoinlib.services.services import Cache, Service, ServiceError
+from bitcoinlib.transactions import Transaction
 from tests.test_custom import CustomAssertions
 
+if PY3:
+    import asyncio
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from bitcoinlib.services.asyncservice import AsyncService
+else:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
 MAXIMUM_ESTIMATED_FEE_DIFFERENCE = 3.00  # Maximum difference from average estimated fee before test_estimatefee fails.
 # Use value above >0, and 1 for 100%
 
@@ -119,6 +135,19 @@ class TestService(unittest.TestCase, CustomAssertions):
             else:
                 prev = balance
 
+    def test_service_gettxcounts(self):
+        address_unused = HDKey().address()
+        srv = ServiceTest(providers=['blockchaininfo', 'blockcypher'], cache_uri='')
+        txcounts = srv.gettxcounts(['15gHNr4TCKmhHDEG31L2XFNvpnEcnPSQvd', address_unused])
+        if not txcounts:
+            self.fail("No service provider available for gettxcounts. Errors %s" % srv.errors)
+        self.assertGreaterEqual(txcounts['15gHNr4TCKmhHDEG31L2XFNvpnEcnPSQvd'], 4)
+        self.assertEqual(txcounts[address_unused], 0)
+
+    def test_service_gettxcounts_not_supported(self):
+        srv = ServiceTest(network='bitcoinlib_test')
+        self.assertFalse(srv.gettxcounts([HDKey(network='bitcoinlib_test').address()]))
+
     def test_service_get_balance_litecoin(self):
         srv = ServiceTest(min_providers=5, network='litecoin')
         srv.getbalance('Lct7CEpiN7e72rUXmYucuhqnCy5F5Vc6Vg')
@@ -892,6 +921,39 @@ class TestServiceCache(unittest.TestCase):
         print(srv.results)
         self.assertTrue(txs[0].outputs[0].spent)
 
+    def test_service_cache_store_transactions(self):
+        cache = Cache(Network('bitcoinlib_test'), db_uri=DATABASEFILE_CACHE_UNITTESTS2)
+        k = HDKey(network='bitcoinlib_test')
+        txs = []
+        for n in range(3):
+            t = Transaction(network='bitcoinlib_test', hash='%02x' % (n + 1) * 32, date=datetime(2020, 1, 1),
+                            block_height=100 + n, confirmations=10 - n)
+            t.add_input('%02x' % (n + 10) * 32, 0, keys=k.public(), value=200000)
+            t.add_output(100000, k.address())
+            t.add_output(90000, k.address())
+            txs.append(t)
+        t_unconfirmed = Transaction(network='bitcoinlib_test', hash='ff' * 32)
+
+        # Caching stops at first transaction which can not be stored
+        self.assertEqual(cache.store_transactions(txs[:2] + [t_unconfirmed] + txs[2:], order_n=5),
+                         [t_unconfirmed, txs[2]])
+        self.assertIsNone(cache.session.query(DbCacheTransaction).filter_by(txid=txs[2].txid).scalar())
+        self.assertEqual(cache.store_transactions(txs, order_n=5), [])
+        self.assertEqual(cache.session.query(DbCacheTransaction).filter_by(txid=txs[2].txid).scalar().order_n, 7)
+        self.assertEqual(cache.session.query(DbCacheTransactionNode).
+                         filter(DbCacheTransactionNode.txid.in_([t.txid for t in txs])).count(), 9)
+
+        # Update spent information of cached transaction
+        txs[0].outputs[1].spent = True
+        txs[0].outputs[1].spending_txid = txs[1].hash
+        txs[0].outputs[1].spending_index_n = 0
+        self.assertIsNone(cache.store_transaction(txs[0]))
+        node = cache.session.query(DbCacheTransactionNode).filter_by(txid=txs[0].txid, output_n=1,
+                                                                     is_input=False).scalar()
+        self.assertTrue(node.spent)
+        self.assertEqual(node.spending_txid, txs[1].txid)
+        self.assertFalse(cache.store_transaction(t_unconfirmed))
+
     def test_service_cache_getblock_hash(self):
 
         def check_block_128594(b):
@@ -919,3 +981,245 @@ class TestServiceCache(unittest.TestCase):
         bc = srv.getblock('0000000000001a7dcac3c01bf10c5d5fe53dc8cc4b9c94001662e9d7bd36f6cc')
         self.assertEqual(srv.results_cache_n, 1)
         check_block_128594(bc)
+
+    def test_service_cache_disabled_commit(self):
+        cache = Cache(Network('bitcoinlib_test'), db_uri=DATABASEFILE_CACHE_UNITTESTS)
+        cache.session = None
+        self.assertIsNone(cache.commit())
+
+    def test_service_gettransactions_spent_index(self):
+        class StandInClient(object):
+            def __init__(self, txs):
+                self.txs = txs
+
+            def gettransactions(self, address, after_txid='', limit=100):
+                return list(self.txs)
+
+        k = HDKey(network='bitcoinlib_test')
+        address = k.address()
+        t1 = Transaction(hash='11' * 32, network='bitcoinlib_test')
+        t1.add_input('aa' * 32, 0, value=300000)
+        t1.add_output(200000, address)
+        t1.add_output(100000, address)
+        t2 = Transaction(hash='22' * 32, network='bitcoinlib_test')
+        t2.add_input(t1.hash, 0, keys=k.public(), value=200000)
+        t2.add_output(150000, address)
+        t3 = Transaction(hash='33' * 32, network='bitcoinlib_test')
+        t3.add_input(t1.hash, 1, keys=k.public(), value=100000)
+        t3.add_output(90000, '21DBmFUMQMP7A6KeENXgZQ4wJdSCeGc2zFo')
+        client = StandInClient([t1, t2])
+        srv = Service(network='bitcoinlib_test', cache_uri=DATABASEFILE_CACHE_UNITTESTS)
+        srv.providers = {'standin': {'priority': 10, 'url': 'http://standin'}}
+        srv._provider_client = lambda sp: client
+
+        indexed = []
+        transaction_spent_index = services.transaction_spent_index
+
+        def spent_index_counter(txs, address, spent_index=None):
+            indexed.append(len(txs))
+            return transaction_spent_index(txs, address, spent_index)
+
+        services.transaction_spent_index = spent_index_counter
+        try:
+            txs = srv.gettransactions(address)
+            self.assertTrue(txs[0].outputs[0].spent)
+            self.assertFalse(txs[0].outputs[1].spent)
+            client.txs.append(t3)
+            srv._blockcount += 1
+            txs = srv.gettransactions(address)
+        finally:
+            services.transaction_spent_index = transaction_spent_index
+        self.assertEqual(indexed, [2, 1])
+        self.assertEqual([t.txid for t in txs], [t1.txid, t2.txid, t3.txid])
+        self.assertEqual(txs[0].outputs[0].spending_txid, t2.hash)
+        self.assertEqual(txs[0].outputs[1].spending_txid, t3.hash)
+        self.assertFalse(txs[1].outputs[0].spent)
+
+
+class TestServiceSessions(unittest.TestCase):
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        responses_todo = []
+        client_ports = []
+
+        def do_GET(self):
+            self.client_ports.append(self.client_address[1])
+            status = self.responses_todo.pop(0) if self.responses_todo else 200
+            body = json.dumps({'path': self.path}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), self.StandInHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.base_url = 'http://127.0.0.1:%d/' % self.server.server_port
+        self.StandInHandler.client_ports.clear()
+        close_provider_sessions()
+
+    def tearDown(self):
+        close_provider_sessions()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_service_session_keep_alive(self):
+        client = BaseClient('bitcoin', 'standin', self.base_url, 100000000)
+        client2 = BaseClient('bitcoin', 'standin', self.base_url, 100000000)
+        self.assertIs(client.session, client2.session)
+        self.assertIsNot(client.session, BaseClient('bitcoin', 'standin2', self.base_url, 1).session)
+        self.assertEqual(client.request('first'), {'path': '/first'})
+        self.assertEqual(client2.request('second', {'a': 1}), {'path': '/second?a=1'})
+        # Second request is send over the same connection
+        self.assertEqual(len(set(self.StandInHandler.client_ports)), 1)
+
+    def test_service_session_retry(self):
+        self.StandInHandler.responses_todo = [503]
+        client = BaseClient('bitcoin', 'standin', self.base_url, 100000000)
+        self.assertEqual(client.request('retry'), {'path': '/retry'})
+        self.assertEqual(len(self.StandInHandler.client_ports), 2)
+        self.StandInHandler.responses_todo = [503] * 5
+        self.assertRaisesRegexp(ClientError, "Error connecting to standin", client.request, 'fail')
+        self.StandInHandler.responses_todo = []
+        # Connection errors and timeouts are not retried, Service continues with next provider
+        retries = client.session.get_adapter(self.base_url).max_retries
+        self.assertEqual((retries.connect, retries.read), (0, 0))
+
+    def test_service_session_rate_limit(self):
+        limiter = RateLimiter(20)
+        t = time.time()
+        for _ in range(5):
+            limiter.wait()
+        self.assertGreaterEqual(time.time() - t, 0.19)
+        t = time.time()
+        for _ in range(100):
+            RateLimiter().wait()
+        self.assertLess(time.time() - t, 0.1)
+
+        client = BaseClient('bitcoin', 'standin_limited', self.base_url, 100000000)
+        self.assertIs(provider_rate_limiter('standin_limited', 10), provider_rate_limiter('standin_limited'))
+        t = time.time()
+        for _ in range(3):
+            client.request('limited')
+        self.assertGreaterEqual(time.time() - t, 0.19)
+        provider_rate_limiter('standin_limited', 0)
+
+
+class TestAsyncService(unittest.TestCase):
+
+    class StandInClient(object):
+        def __init__(self, result, barrier=None, wait_until=None, gate=None):
+            self.result = result
+            self.barrier = barrier
+            self.wait_until = wait_until
+            self.gate = gate
+            self.started = threading.Event()
+            self.calls = 0
+
+        def estimatefee(self, blocks):
+            self.calls += 1
+            self.started.set()
+            if self.barrier:
+                self.barrier.wait()
+            if self.wait_until:
+                deadline = time.time() + TIMEOUT_TEST
+                while not self.wait_until() and time.time() < deadline:
+                    time.sleep(0.01)
+            if self.gate and self.calls == 1:
+                self.gate.wait(TIMEOUT_TEST)
+            if isinstance(self.result, Exception):
+                raise self.result
+            return self.result
+
+    def setUp(self):
+        if not PY3:
+            self.skipTest("AsyncService is only available on Python 3")
+
+    @staticmethod
+    def _run_async(coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def _service(self, clients, max_providers=1):
+        srv = AsyncService(network='bitcoinlib_test', max_providers=max_providers,
+                           cache_uri=DATABASEFILE_CACHE_UNITTESTS)
+        self.addCleanup(srv.close)
+        srv.providers = {name: {'priority': 10 - i, 'url': 'http://%s' % name}
+                         for i, name in enumerate(clients)}
+        srv.ignore_priority = False
+        srv._provider_client = lambda sp: clients[sp]
+        return srv
+
+    def test_service_async_bitcoinlib_test(self):
+        srv = AsyncService(network='bitcoinlib_test', cache_uri=DATABASEFILE_CACHE_UNITTESTS)
+        self.assertIs(self._run_async(srv.__aenter__()), srv)
+        self.assertEqual(self._run_async(srv.getbalance(['21DBmFUMQMP7A6KeENXgZQ4wJdSCeGc2zFo'])), 100000000)
+        self.assertEqual(srv.resultcount, 1)
+        utxos = self._run_async(srv.getutxos('21DBmFUMQMP7A6KeENXgZQ4wJdSCeGc2zFo'))
+        self.assertEqual(len(utxos), 2)
+        self.assertEqual(self._run_async(srv.estimatefee()), 33333)
+        self._run_async(srv.__aexit__(None, None, None))
+        self.assertRaises(RuntimeError, srv._executor.submit, int)
+
+    def test_service_async_concurrent_providers(self):
+        # All providers must be running at the same time to pass the barrier. The first response is returned, the
+        # other providers only respond after the first result is stored.
+        barrier = threading.Barrier(3, timeout=TIMEOUT_TEST)
+        clients = {'slow1': self.StandInClient(10000, barrier),
+                   'slow2': self.StandInClient(20000, barrier, wait_until=lambda: srv.resultcount >= 1),
+                   'slow3': self.StandInClient(30000, barrier, wait_until=lambda: srv.resultcount >= 2)}
+        srv = self._service(clients, max_providers=3)
+        self.assertEqual(self._run_async(srv._provider_execute_async('estimatefee', 3)), 10000)
+        self.assertEqual(srv.errors, {})
+        self.assertEqual(srv.resultcount, 3)
+        self.assertEqual(srv.results, {'slow1': 10000, 'slow2': 20000, 'slow3': 30000})
+
+    def test_service_async_errors_and_fallback(self):
+        clients = {'broken': self.StandInClient(ClientError("Provider down")),
+                   'empty': self.StandInClient(False),
+                   'working': self.StandInClient(12345),
+                   'unused': self.StandInClient(54321)}
+        srv = self._service(clients)
+        self.assertEqual(self._run_async(srv._provider_execute_async('estimatefee', 3)), 12345)
+        self.assertEqual(srv.resultcount, 1)
+        self.assertEqual(srv.results, {'working': 12345})
+        self.assertEqual(srv.errors, {'broken': 'Provider down', 'empty': 'Received empty response'})
+        self.assertEqual(clients['unused'].calls, 0)
+
+        srv = self._service({'broken': self.StandInClient(ClientError("Provider down"))})
+        self.assertFalse(self._run_async(srv._provider_execute_async('estimatefee', 3)))
+        self.assertEqual(srv.resultcount, 0)
+
+    def test_service_async_sync_call_from_event_loop(self):
+        # A synchronous call from the event loop thread while a coroutine method is running must not deadlock
+        client = self.StandInClient(10000, gate=threading.Event())
+        srv = self._service({'gated': client})
+        results = []
+
+        def calls():
+            loop = asyncio.new_event_loop()
+            task = loop.create_task(srv._run(AsyncService._provider_execute, 'estimatefee', 3))
+            loop.run_until_complete(loop.run_in_executor(None, client.started.wait, TIMEOUT_TEST))
+            results.append(srv._provider_execute('estimatefee', 3))
+            client.gate.set()
+            results.append(loop.run_until_complete(task))
+            loop.close()
+
+        thread = threading.Thread(target=calls)
+        thread.daemon = True
+        thread.start()
+        thread.join(TIMEOUT_TEST * 2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [10000, 10000])
+        self.assertEqual(client.calls, 2)
+
@@ -20,6 +20,7 @@
 import binascii
 import json
 import os
+import struct
 import unittest
 
 from bitcoinlib.config.config import SEQUENCE_LOCKTIME_TYPE_FLAG
@@ -29,7 +30,8 @@ from bitcoinlib.transactions import (Input, Output, Transaction, TransactionErro
                                      script_add_locktime_cltv,
                                      script_add_locktime_csv, script_deserialize,
                                      script_to_string,
-                                     serialize_multisig_redeemscript)
+                                     serialize_multisig_redeemscript, transaction_deserialize_from,
+                                     transaction_spent_index, transaction_update_spents)
 from tests.test_custom import CustomAssertions
 
 
@@ -223,6 +225,77 @@ class TestTransactions(unittest.TestCase):
                                 "Error when deserializing raw transaction, bytes left for locktime must be 4 not 3",
                                 Transaction.import_raw, rawtx)
 
+    def test_transactions_deserialize_from_offset(self):
+        raws = [to_bytes(r[1]) for r in self.rawtxs if r[4] == 'bitcoin']
+        data = b''.join(raws)
+        offset = 0
+        for rawtx in raws:
+            t, size = transaction_deserialize_from(data, offset)
+            self.assertEqual(size, len(rawtx))
+            self.assertEqual(t.rawtx, rawtx)
+            self.assertEqual(t.txid, Transaction.import_raw(rawtx).txid)
+            offset += size
+        self.assertEqual(offset, len(data))
+        self.assertRaisesRegexp(TransactionError, "Unexpected end of data at position",
+                                transaction_deserialize_from, raws[0][:41])
+
+    def test_transactions_deserialize_lazy(self):
+        for r in self.rawtxs:
+            t = Transaction.import_raw(r[1], r[4], lazy=True)
+            self.assertTrue(t.is_lazy)
+            t_eager = Transaction.import_raw(r[1], r[4])
+            self.assertEqual(t.txid, t_eager.txid)
+            self.assertEqual(t.raw_hex(), r[1])
+            self.assertTrue(t.is_lazy)
+            self.assertEqual(len(t.outputs), r[3])
+            self.assertEqual(len(t.inputs), r[2])
+            self.assertFalse(t.is_lazy)
+            self.assertEqual(t.as_dict(), t_eager.as_dict())
+
+    def test_transactions_lazy_update_items(self):
+        t = Transaction.import_raw(self.rawtxs[0][1], self.rawtxs[0][4], lazy=True)
+        t.update_items(inputs={0: {'value': 1000}}, outputs={0: {'spent': True}})
+        self.assertTrue(t.is_lazy)
+        self.assertEqual(t.inputs[0].value, 1000)
+        self.assertTrue(t.outputs[0].spent)
+        t.update_items(outputs={0: {'spent': False}})
+        self.assertFalse(t.outputs[0].spent)
+
+    def test_transactions_lazy_raw_reuse(self):
+        for r in self.rawtxs:
+            t = Transaction.import_raw(r[1], r[4], lazy=True)
+            # Inputs and outputs are created, but raw transaction is build from original bytes
+            self.assertEqual(len(t.inputs), r[2])
+            self.assertEqual(len(t.outputs), r[3])
+            self.assertFalse(t.is_lazy)
+            self.assertTrue(all([i._original_raw() for i in t.inputs]))
+            self.assertTrue(all([o._original_raw() for o in t.outputs]))
+            self.assertEqual(t.raw_hex(), r[1])
+            t.outputs[0].value += 1
+            self.assertIsNone(t.outputs[0]._original_raw())
+            self.assertEqual(Transaction.import_raw(t.raw(), r[4]).outputs[0].value, t.outputs[0].value)
+            t.inputs[0].sequence = 1
+            self.assertIsNone(t.inputs[0]._original_raw())
+            t2 = Transaction.import_raw(t.raw(), r[4])
+            self.assertEqual(t2.inputs[0].sequence, 1)
+            self.assertEqual([i.unlocking_script for i in t2.inputs], [i.unlocking_script for i in t.inputs])
+            self.assertEqual([o.lock_script for o in t2.outputs], [o.lock_script for o in t.outputs])
+
+    def test_transactions_slots(self):
+        t = Transaction.import_raw(self.rawtxs[0][1], self.rawtxs[0][4])
+        for obj in [t, t.inputs[0], t.outputs[0]]:
+            self.assertFalse(hasattr(obj, '__dict__'))
+            self.assertRaises(AttributeError, setattr, obj, 'unknown_attribute', 1)
+        self.assertEqual(t.version_int, struct.unpack('>L', t.version)[0])
+        ti = t.inputs[0]
+        self.assertEqual(ti.output_n, struct.pack('>I', ti.output_n_int))
+        ti.output_n = 3
+        self.assertEqual(ti.output_n, b'\x00\x00\x00\x03')
+        self.assertEqual(t.outputs[0].address_obj.address, t.outputs[0].address)
+        address_obj = Address.import_address(t.outputs[1].address)
+        t.outputs[0].address_obj = address_obj
+        self.assertIs(t.outputs[0].address_obj, address_obj)
+
     def test_transactions_verify_signature(self):
         for r in self.rawtxs:
             # print("Verify %s" % r[0])
@@ -1009,6 +1082,37 @@ class TestTransactions(unittest.TestCase):
         t.update_totals()
         self.assertIsNone(t.info())
 
+    def test_transaction_update_spents(self):
+        k = HDKey()
+        address = k.address()
+        t1 = Transaction(hash='11' * 32)
+        t1.add_input('aa' * 32, 0, value=300000)
+        t1.add_output(200000, address)
+        t1.add_output(100000, address)
+        t2 = Transaction(hash='22' * 32)
+        t2.add_input(t1.hash, 0, keys=k.public(), value=200000)
+        t2.add_output(150000, address)
+        txs = transaction_update_spents([t1, t2], address)
+        self.assertTrue(txs[0].outputs[0].spent)
+        self.assertEqual(txs[0].outputs[0].spending_txid, t2.hash)
+        self.assertEqual(txs[0].outputs[0].spending_index_n, 0)
+        self.assertFalse(txs[0].outputs[1].spent)
+        self.assertFalse(txs[1].outputs[0].spent)
+
+        # Add new transaction to existing index
+        spent_index = transaction_spent_index([t1, t2], address)
+        t3 = Transaction(hash='33' * 32)
+        t3.add_input(t1.hash, 1, keys=k.public(), value=100000)
+        t3.add_input(t2.hash, 0, keys=k.public(), value=150000)
+        t3.add_output(240000, '1MMMMSUb1piy2ufrSguNUdFmAcvqrQF8M5')
+        spent_index = transaction_spent_index([t3], address, spent_index)
+        self.assertEqual(len(spent_index), 3)
+        txs = transaction_update_spents([t1, t2, t3], address, spent_index)
+        self.assertTrue(txs[0].outputs[1].spent)
+        self.assertEqual(txs[1].outputs[0].spending_txid, t3.hash)
+        self.assertEqual(txs[1].outputs[0].spending_index_n, 1)
+        self.assertFalse(txs[2].outputs[0].spent)
+
     def test_transaction_errors(self):
         self.assertRaisesRegexp(TransactionError, "Please specify a valid witness type: legacy or segwit",
                                 Transaction, witness_type='error')
@@ -1544,6 +1648,55 @@ class TestTransactionsSegwit(unittest.TestCase, CustomAssertions):
         self.assertEqual(to_hexstring(t2.signature_hash(1)),
                          'c37af31116d1b27caf68aae9e3ac82f1477929014d5b917657d0eb49478cb670')
 
+    def test_transaction_segwit_signature_hashes_cache(self):
+        key = Key('bbc27228ddcb9209d7fd6f36b02f7dfa6252af40bb2f1cbc7a557da8027ff866')
+        prev_tx = 'fff7f7881a8099afa6940d42d1e7f6362bec38171ea3edf433541db4e4ad969f'
+        t = Transaction(witness_type='segwit')
+        for n in range(10):
+            t.add_input(prev_tx, n, keys=key, value=100000, witness_type='segwit')
+        t.add_output(900000, key.address())
+        hashes = t.signature_segwit_hashes()
+        self.assertEqual(len(t._segwit_hashes), 1)
+        self.assertIs(t.signature_segwit_hashes(), hashes)
+        sighash_0 = t.signature_hash(0)
+        t.sign(key)
+        self.assertTrue(t.verify())
+        t.add_output(1000, key.address())
+        self.assertEqual(t._segwit_hashes, {})
+        self.assertNotEqual(t.signature_hash(0), sighash_0)
+        self.assertNotEqual(t.signature_segwit_hashes()[2], hashes[2])
+        self.assertEqual(t.signature_segwit_hashes()[0], hashes[0])
+        self.assertFalse(t.verify())
+
+    def test_transaction_segwit_signature_hashes_cache_modified(self):
+        key = Key('bbc27228ddcb9209d7fd6f36b02f7dfa6252af40bb2f1cbc7a557da8027ff866')
+        prev_tx = 'fff7f7881a8099afa6940d42d1e7f6362bec38171ea3edf433541db4e4ad969f'
+        t = Transaction(witness_type='segwit')
+        for n in range(3):
+            t.add_input(prev_tx, n, keys=key, value=100000, witness_type='segwit')
+        t.add_output(290000, key.address())
+        t.sign(key)
+        self.assertTrue(t.verify())
+        hashes = t.signature_segwit_hashes()
+        sighash_0 = t.signature_hash(0)
+        signature_0 = t.inputs[0].signatures[0].as_der_encoded()
+
+        t.outputs[0].value = 280000
+        self.assertNotEqual(t.signature_segwit_hashes()[2], hashes[2])
+        self.assertNotEqual(t.signature_hash(0), sighash_0)
+        self.assertFalse(t.verify())
+        for inp in t.inputs:
+            inp.signatures = []
+        t.sign(key)
+        self.assertTrue(t.verify())
+        self.assertNotEqual(t.inputs[0].signatures[0].as_der_encoded(), signature_0)
+
+        t2 = Transaction.import_raw(t.raw_hex())
+        self.assertEqual(t2.outputs[0].value, 280000)
+        t.inputs[1].sequence = 0xfffffffd
+        self.assertNotEqual(t.signature_segwit_hashes()[1], hashes[1])
+        self.assertFalse(t.verify())
+
     def test_transactions_segwit_p2sh_p2wpkh(self):
         pk_input1 = 'eb696a065ef48a2192da5b28b694f87544b30fae8327c4510137a922f32c6dcf'
         pk1 = Key(pk_input1)
@@ -20,10 +20,15 @@
 import json
 import os
 import random
+import threading
+import time
 import unittest
 from random import shuffle
 
-from bitcoinlib.config.config import BCL_DATABASE_DIR, PY3, UNITTESTS_FULL_DATABASE_TEST
+from bitcoinlib.config.config import BCL_DATABASE_DIR, MAX_TRANSACTIONS, PY3, UNITTESTS_FULL_DATABASE_TEST
+from bitcoinlib.db import DbKey, DbTransaction
+from bitcoinlib.services.bitcoinlibtest import BitcoinLibTestClient
+from bitcoinlib.services.services import Cache
 from bitcoinlib.transactions import Input, Output, Transaction
 from bitcoinlib.wallets import (HDWallet, HDWalletKey, HDWalletTransaction, WalletError, normalize_path,
                                 wallet_create_or_open, wallet_delete, wallet_delete_if_exists, wallet_empty,
@@ -235,6 +240,35 @@ class TestWalletCreate(TestWalletMixin, unittest.TestCase):
         keys = wlt.get_key(number_of_keys=5)
         self.assertEqual(keys[4].address, "Li5nEi62nAKWjv6fpixEpoLzN1pYFK621g")
 
+    def test_wallet_new_keys(self):
+        passphrase = "always reward element perfect chunk father margin slab pond suffer episode deposit"
+        wlt1 = HDWallet.create("wallet-new-keys-bulk", keys=passphrase, network='testnet', db_uri=self.DATABASE_URI)
+        wlt2 = HDWallet.create("wallet-new-keys-single", keys=passphrase, network='testnet',
+                               db_uri=self.DATABASE_URI)
+        keys = wlt1.new_keys(20, change=1)
+        expected = [wlt2.new_key(change=1) for _ in range(20)]
+        self.assertEqual([(k.address, k.path, k.name, k.wif, k.address_index, k.change) for k in keys],
+                         [(k.address, k.path, k.name, k.wif, k.address_index, k.change) for k in expected])
+        self.assertEqual(len(set([k.parent_id for k in keys])), 1)
+        self.assertEqual(wlt1.new_key(change=1).address_index, 20)
+        self.assertEqual(wlt1.new_keys(0), [])
+
+    def test_wallet_new_keys_multisig(self):
+        key_list = [
+            'Pdke4WfXvALPdbrKEfBU9z9BNuRNbv1gRr66BEiZHKcRXDSZQ3gV',
+            'PhUTR4ZkZu9Xkzn3ee3xMU1TxbNx6ENJvUjX4wBaZDyTCMrn1zuE',
+            'PdnZFcwpxUSAcFE6MHB78weVAguwzSTUMBqswkqie7Uxfxsd77Zs'
+        ]
+        wlt1 = HDWallet.create('multisig_new_keys_bulk', key_list, sigs_required=2, network='bitcoinlib_test',
+                               cosigner_id=0, db_uri=self.DATABASE_URI)
+        wlt2 = HDWallet.create('multisig_new_keys_single', key_list, sigs_required=2, network='bitcoinlib_test',
+                               cosigner_id=0, db_uri=self.DATABASE_URI)
+        keys = wlt1.new_keys(5)
+        expected = [wlt2.new_key() for _ in range(5)]
+        self.assertEqual([(k.address, k.path, k.address_index) for k in keys],
+                         [(k.address, k.path, k.address_index) for k in expected])
+        self.assertEqual([len(k.key()) for k in keys], [3] * 5)
+
     def test_wallet_create_change_name(self):
         wlt = HDWallet.create('test_wallet_create_change_name', db_uri=self.DATABASE_URI)
         wlt.name = 'wallet_renamed'
@@ -390,6 +424,16 @@ class TestWalletImport(TestWalletMixin, unittest.TestCase):
                                 w.import_key, 'T43gB4F6k1Ly3YWbMuddq13xLb56hevUDP3RthKArr7FPHjQiXpp',
                                 network='litecoin')
 
+    def test_wallet_import_keys(self):
+        w = HDWallet.create('test_wallet_import_keys', db_uri=self.DATABASE_URI)
+        keys = w.import_keys(['KwYgW8gcxj1JWJXhPSu4Fqwzfhp5Yfi42mdYmMa4XqK7NJxXUSK7',
+                              '6PYNKZ1EAgYgmQfmNVamxyXVWHzK5s6DGhwP4J5o44cvXdoY7sRzhtpUeo'],
+                             passphrase='TestingOneTwoThree')
+        self.assertListEqual([k.address for k in keys],
+                             ['1HmPbwsvG5qJ3KJfxzsZRZWhbm1xBMuS8B', '164MQi977u9GUteHr4EPH27VkkdxmfCvGW'])
+        self.assertListEqual([k.key_type for k in keys], ['single', 'single'])
+        self.assertEqual(keys[1].key().wif_key(), 'L44B5gGEpqEDRS9vVPz7QT35jcBG2r3CZwSwQ4fCewXAhAhqGVpP')
+
     def test_wallet_import_hdwif(self):
         # p2wpkh
         wif = \
@@ -544,6 +588,14 @@ class TestWalletKeys(TestWalletMixin, unittest.TestCase):
                                 '13uQKuiWwWp15BsEijnpKZSuTuHVTpZMvP']
         self.assertListEqual(self.wallet.addresslist(depth=-1), expected_addresslist)
 
+    def test_wallet_keys_by_address(self):
+        addresslist = self.wallet.addresslist(depth=-1)
+        keys = self.wallet.keys_by_address(addresslist + ['1J6jppU5mWf4ausGfHMumrKrztpDKq2MrX'])
+        self.assertEqual(sorted(keys.keys()), sorted(addresslist))
+        self.assertTrue(all(k.address == address and k.wallet_id == self.wallet.wallet_id
+                            for address, k in keys.items()))
+        self.assertEqual(self.wallet.keys_by_address([]), {})
+
     def test_wallet_keys_method_masterkey(self):
         self.assertEqual(self.wallet.keys(name='test_wallet_keys', depth=0)[0].wif, self.private_wif)
 
@@ -911,6 +963,169 @@ class TestWalletBitcoinlibTestnet(TestWalletMixin, unittest.TestCase):
         self.assertRaisesRegexp(WalletError, "Cannot sweep wallet, no UTXO's found",
                                 w.sweep, '21DBmFUMQMP7A6KeENXgZQ4wJdSCeGc2zFo')
 
+    def test_wallet_bitcoinlib_testnet_utxos_update_concurrent(self):
+        w = HDWallet.create(
+            network='bitcoinlib_test',
+            name='test_wallet_bitcoinlib_testnet_utxos_update_concurrent',
+            db_uri=self.DATABASE_URI)
+        for _ in range(5):
+            w.new_key()
+        w.utxos_update(max_workers=4)
+        utxos = sorted((u['tx_hash'], u['output_n']) for u in w.utxos())
+        self.assertEqual(len(utxos), 2 * len(w.addresslist()))
+        balance = w.balance()
+        w.utxos_update(max_workers=1)
+        self.assertEqual(sorted((u['tx_hash'], u['output_n']) for u in w.utxos()), utxos)
+        self.assertEqual(w.balance(), balance)
+
+    def test_wallet_bitcoinlib_testnet_service_map_cache_lock(self):
+        if not PY3:
+            self.skipTest("Requests are send one by one on Python 2")
+        w = HDWallet.create(
+            network='bitcoinlib_test',
+            name='test_wallet_bitcoinlib_testnet_service_map_cache_lock',
+            db_uri=self.DATABASE_URI)
+        for _ in range(5):
+            w.new_key()
+        lock = threading.Lock()
+        barrier = threading.Barrier(2, timeout=5)
+        active = []
+        cache_overlap = []
+        provider_calls = []
+        getaddress = Cache.getaddress
+        getutxos = BitcoinLibTestClient.getutxos
+
+        def cache_getaddress(cache, address):
+            with lock:
+                active.append(address)
+                cache_overlap.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(address)
+            return getaddress(cache, address)
+
+        def provider_getutxos(client, address, *args, **kwargs):
+            # The first two requests can only continue if they are running at the same time
+            with lock:
+                provider_calls.append(address)
+                wait = len(provider_calls) <= 2
+            if wait:
+                barrier.wait()
+            return getutxos(client, address, *args, **kwargs)
+
+        Cache.getaddress = cache_getaddress
+        BitcoinLibTestClient.getutxos = provider_getutxos
+        try:
+            w.utxos_update(max_workers=4)
+        finally:
+            Cache.getaddress = getaddress
+            BitcoinLibTestClient.getutxos = getutxos
+        self.assertEqual(len(w.utxos()), 2 * len(w.addresslist()))
+        self.assertEqual(max(cache_overlap), 1)
+        self.assertEqual(len(provider_calls), len(w.addresslist()))
+
+    def test_wallet_bitcoinlib_testnet_scan_gap_limit(self):
+        w = HDWallet.create(
+            network='bitcoinlib_test',
+            name='test_wallet_bitcoinlib_testnet_scan_gap_limit',
+            db_uri=self.DATABASE_URI)
+        used_addresses = [k.address for k in w.get_key(number_of_keys=3)]
+        txcounts_requests = []
+        transactions_requests = []
+
+        def gettxcounts(client, addresslist):
+            txcounts_requests.append(list(addresslist))
+            return dict([(address, int(address in used_addresses)) for address in addresslist])
+
+        def gettransactions(client, address, after_txid='', limit=MAX_TRANSACTIONS):
+            transactions_requests.append(address)
+            if address not in used_addresses or after_txid:
+                return []
+            t = Transaction(network='bitcoinlib_test', block_height=1, confirmations=1, status='confirmed',
+                            hash=os.urandom(32))
+            t.add_input(os.urandom(32), 0, value=200000)
+            t.add_output(100000, address)
+            return [t]
+
+        BitcoinLibTestClient.gettxcounts = gettxcounts
+        BitcoinLibTestClient.gettransactions = gettransactions
+        try:
+            w.scan(scan_gap_limit=2, max_workers=1)
+        finally:
+            del BitcoinLibTestClient.gettxcounts
+            del BitcoinLibTestClient.gettransactions
+
+        # Windows of 2 keys are scanned until a window without transactions is found, already scanned keys are
+        # skipped so the third window only contains 1 new key
+        self.assertEqual(len(w.keys(change=0, depth=5)), 5)
+        self.assertEqual(len(w.keys(change=1, depth=5)), 2)
+        self.assertEqual([len(addresses) for addresses in txcounts_requests], [2, 2, 1, 2])
+        self.assertEqual(sorted(transactions_requests), sorted(used_addresses))
+        self.assertEqual(w.balance(), 300000)
+
+    def test_wallet_bitcoinlib_testnet_coin_selection_strategies(self):
+        w = HDWallet.create(
+            network='bitcoinlib_test',
+            name='test_wallet_bitcoinlib_testnet_coin_selection_strategies',
+            db_uri=self.DATABASE_URI)
+        for _ in range(3):
+            w.new_key()
+        w.utxos_update()
+        for strategy in ['default', 'knapsack', 'srd', 'auto']:
+            t = w.transaction_create([('21DBmFUMQMP7A6KeENXgZQ4wJdSCeGc2zFo', 20000000)], strategy=strategy)
+            t.sign()
+            self.assertTrue(t.verify(), msg=strategy)
+            self.assertGreaterEqual(t.fee, 0, msg=strategy)
+            self.assertEqual(sum([i.value for i in t.inputs]), sum([o.value for o in t.outputs]) + t.fee,
+                             msg=strategy)
+            self.assertTrue(all(o.value >= 0 for o in t.outputs), msg=strategy)
+        # Wallet only contains UTXO's of 1 BTC, so a selection without change output is not possible
+        self.assertRaisesRegexp(WalletError, "No selection of UTXO's without change output found",
+                                w.transaction_create, [('21DBmFUMQMP7A6KeENXgZQ4wJdSCeGc2zFo', 20000000)],
+                                strategy='bnb')
+        self.assertRaisesRegexp(WalletError, "Unknown coin selection strategy", w.select_inputs, 10000,
+                                strategy='unknown')
+
+    def test_wallet_bitcoinlib_testnet_utxo_cache(self):
+        w = HDWallet.create(
+            network='bitcoinlib_test',
+            name='test_wallet_bitcoinlib_testnet_utxo_cache',
+            db_uri=self.DATABASE_URI)
+        w.utxo_cache = True
+        for _ in range(3):
+            w.new_key()
+        w.utxos_update()
+        w2 = HDWallet('test_wallet_bitcoinlib_testnet_utxo_cache', db_uri=self.DATABASE_URI)
+        w2.utxo_cache = False
+
+        def utxo_list(wlt):
+            return sorted((u['tx_hash'], u['output_n'], u['value'], u['key_id']) for u in wlt.utxos())
+
+        self.assertEqual(utxo_list(w), utxo_list(w2))
+        self.assertEqual(w.balance(), w2.balance())
+        t = w.send_to('21DBmFUMQMP7A6KeENXgZQ4wJdSCeGc2zFo', 50000000)
+        self.assertTrue(t.pushed)
+        self.assertEqual(len(w._utxo_set.utxos), len(w2.utxos()))
+        self.assertEqual(utxo_list(w), utxo_list(w2))
+        self.assertEqual(w.balance(), w2.balance())
+        self.assertEqual([(k.id, k.balance) for k in w.keys()], [(k.id, k.balance) for k in w2.keys()])
+
+    def test_wallet_bitcoinlib_testnet_confirmations_update(self):
+        w = HDWallet.create(
+            network='bitcoinlib_test',
+            name='test_wallet_bitcoinlib_testnet_confirmations_update',
+            db_uri=self.DATABASE_URI)
+        w.utxos_update()
+        db_txs = w._session.query(DbTransaction).filter(DbTransaction.wallet_id == w.wallet_id)
+        n_txs = db_txs.count()
+        db_txs.update({DbTransaction.block_height: 5})
+        w._commit()
+        self.assertEqual(w._transactions_confirmations_update('bitcoinlib_test', 10), n_txs)
+        self.assertEqual(set([(t.confirmations, t.status) for t in db_txs.all()]), {(5, 'confirmed')})
+        self.assertEqual(w._transactions_confirmations_update('bitcoinlib_test', 10), 0)
+        self.assertEqual(w._transactions_confirmations_update('bitcoinlib_test', 11), n_txs)
+        self.assertEqual(set([t.confirmations for t in db_txs.all()]), {6})
+
 
 @parameterized_class(*params)
 class TestWalletMultisig(TestWalletMixin, unittest.TestCase):
@@ -1525,6 +1740,13 @@ class TestWalletTransactions(TestWalletMixin, unittest.TestCase, CustomAssertion
         w.scan()
         self.assertEqual(w.transactions()[0].txid, 'bae05e65c13a1b1635abf581a6250a458cbd672c914e2563b5bb175274f9c5a7')
 
+    def test_wallet_scan_gap_window(self):
+        wallet = HDWallet.create('scan-gap-window-test', network='testnet', db_uri=self.DATABASE_URI)
+        wallet.scan(scan_gap_limit=4)
+        self.assertEqual(len(wallet.keys(change=0, depth=5)), 4)
+        self.assertEqual(len(wallet.keys(change=1, depth=5)), 4)
+        self.assertEqual(wallet.balance(), 0)
+
     def test_wallet_scan_utxos(self):
         pk = 'tpubDDi7dF92m7UrWNuAmzR9mzETcCjFT9v6XZq2oXjvhH4Bzr4L13np7d6bBB5tZk1Kg3y2vB79ohpgsLiubcRA8RfA6L69nmZvSG26XfmC5Ao'
         w = wallet_create_or_open('kladkladklieder3', keys=pk, db_uri=self.DATABASE_URI)
@@ -1802,6 +2024,24 @@ class TestWalletTransactions(TestWalletMixin, unittest.TestCase, CustomAssertion
         self.assertEqual(len(txs), 1)
         self.assertEqual(txs[0].block_height, 368209)
 
+    def test_wallet_transactions_save_bulk(self):
+        w = HDWallet.create('wallet_transactions_save_bulk', network='bitcoinlib_test', db_uri=self.DATABASE_URI)
+        keys = w.get_key(number_of_keys=3)
+        w.utxos_update()
+        to_key = w.get_key_change()
+        txs = [w.transaction_create([(to_key.address, 50000000)], input_key_id=k.key_id) for k in keys]
+        tx_ids = w.transactions_save(txs, batch_size=2)
+        self.assertEqual(len(set(tx_ids)), 3)
+        self.assertEqual(w.transactions_save(txs + txs[:1]), tx_ids + tx_ids[:1])
+        self.assertEqual(txs[0].save(), tx_ids[0])
+        for t in txs:
+            wt = HDWalletTransaction.from_txid(w, t.txid)
+            self.assertEqual([i.address for i in wt.inputs], [i.address for i in t.inputs])
+            self.assertEqual([o.value for o in wt.outputs], [o.value for o in t.outputs])
+        self.assertTrue(to_key.used)
+        self.assertTrue(w.key(to_key.key_id).used)
+        self.assertTrue(w._session.query(DbKey).get(to_key.key_id).used)
+
     def test_wallet_transactions_sign_with_mnenomic(self):
         phr = 'battle alter frequent adult tuna follow always jar obtain until ice arrange'
         prv_key = HDKey.from_passphrase(phr, network='bitcoinlib_test')
@@ -2132,6 +2372,10 @@ class TestWalletSegwit(TestWalletMixin, unittest.TestCase):
 
         networks_expected = ['bitcoin', 'litecoin', 'testnet']
         self.assertListEqual(sorted([nw.name for nw in wallet.networks()]), networks_expected)
+        networks_dict = wallet.networks(as_dict=True)
+        self.assertListEqual(sorted([nw['name'] for nw in networks_dict]), networks_expected)
+        networks_dict[0]['name'] = 'changed'
+        self.assertListEqual(sorted([nw.name for nw in wallet.networks()]), networks_expected)
         self.assertListEqual([k.path for k in wallet.keys_accounts(network='litecoin')],
                              ["m/48'/2'/0'/2'", "m/48'/2'/1'/2'"])
         self.assertEqual(wallet.keys(network='litecoin')[0].address, "MQNA8FYrN2fvD7SSYny3Ccvpapvsu9cVJH")